@@ -0,0 +1,202 @@
+import struct
+import numpy as np
+from storage_scan.scanner import DiskScanner
+from storage_scan.extents import mask_to_extents, clip_extents
+from typing import Dict, Any, List, Optional, Tuple
+
+# Superblock location and magic
+SUPERBLOCK_OFFSET = 1024
+EXT_MAGIC = 0xEF53
+
+# Feature flags
+RO_COMPAT_SPARSE_SUPER = 0x0001  # Superblock backups only in groups 0, 1 and powers of 3, 5, 7
+RO_COMPAT_GDT_CSUM = 0x0010
+RO_COMPAT_METADATA_CSUM = 0x0400
+INCOMPAT_64BIT = 0x0080
+INCOMPAT_FLEX_BG = 0x0200
+
+# Group descriptor flag: block bitmap was never initialised, only metadata is in use
+BG_BLOCK_UNINIT = 0x0002
+
+
+class EXTParser:
+    """
+    Parses the superblock and group descriptors of an ext2/3/4 file system
+    and reads its block bitmaps into an allocation map.
+    """
+
+    def __init__(self, scanner: DiskScanner, partition_offset: int = 0):
+        self.scanner = scanner
+        self.partition_offset: int = partition_offset  # Byte offset of the volume in the image
+        self.block_size: int = 1024
+        self.blocks_count: int = 0
+        self.first_data_block: int = 0
+        self.blocks_per_group: int = 0
+        self.inodes_per_group: int = 0
+        self.inode_size: int = 128
+        self.desc_size: int = 32
+        self.group_count: int = 0
+        self.reserved_gdt_blocks: int = 0
+        self.feature_incompat: int = 0
+        self.feature_ro_compat: int = 0
+        self.groups_per_flex: int = 1
+
+    def parse(self) -> Dict[str, Any]:
+        """Reads and parses the superblock of the volume through the scanner."""
+        return self.parse_superblock(self.scanner.read_range(self.partition_offset + SUPERBLOCK_OFFSET, 1024))
+
+    def parse_superblock(self, sb: bytes) -> Dict[str, Any]:
+        """
+        Parses an ext2/3/4 superblock.
+        Expects sb to be the 1024 bytes starting at volume offset 1024.
+        """
+        if len(sb) < 1024:
+            return {"error": "Insufficient data"}
+
+        # Magic (Offset 0x38, 2 bytes)
+        magic = struct.unpack("<H", sb[0x38:0x3A])[0]
+        if magic != EXT_MAGIC:
+            return {"error": f"Invalid ext magic: 0x{magic:04x}"}
+
+        # Block size is 1024 << s_log_block_size (Offset 0x18)
+        self.block_size = 1024 << struct.unpack("<I", sb[0x18:0x1C])[0]
+        self.first_data_block = struct.unpack("<I", sb[0x14:0x18])[0]
+        self.blocks_per_group = struct.unpack("<I", sb[0x20:0x24])[0]
+        self.inodes_per_group = struct.unpack("<I", sb[0x28:0x2C])[0]
+        rev_level = struct.unpack("<I", sb[0x4C:0x50])[0]
+        self.inode_size = struct.unpack("<H", sb[0x58:0x5A])[0] if rev_level >= 1 else 128
+        self.feature_incompat = struct.unpack("<I", sb[0x60:0x64])[0]
+        self.feature_ro_compat = struct.unpack("<I", sb[0x64:0x68])[0]
+        self.reserved_gdt_blocks = struct.unpack("<H", sb[0xCE:0xD0])[0]
+
+        self.blocks_count = struct.unpack("<I", sb[0x04:0x08])[0]
+        self.desc_size = 32
+        if self.feature_incompat & INCOMPAT_64BIT:
+            self.blocks_count |= struct.unpack("<I", sb[0x150:0x154])[0] << 32
+            self.desc_size = max(32, struct.unpack("<H", sb[0xFE:0x100])[0])
+        self.groups_per_flex = 1
+        if self.feature_incompat & INCOMPAT_FLEX_BG:
+            self.groups_per_flex = 1 << sb[0x174]
+
+        if not self.blocks_per_group:
+            return {"error": "Invalid blocks per group"}
+        self.group_count = -(-(self.blocks_count - self.first_data_block) // self.blocks_per_group)
+
+        return {
+            "block_size": self.block_size,
+            "blocks_count": self.blocks_count,
+            "blocks_per_group": self.blocks_per_group,
+            "group_count": self.group_count,
+            "desc_size": self.desc_size,
+            "flex_bg": bool(self.feature_incompat & INCOMPAT_FLEX_BG),
+            "groups_per_flex": self.groups_per_flex
+        }
+
+    def configure_scanner(self) -> None:
+        """Points the scanner's cluster mapping at this volume's blocks."""
+        self.scanner.set_filesystem_info(self.block_size, self.partition_offset)
+
+    def block_offset(self, block: int) -> int:
+        """Absolute image offset of a file system block number."""
+        return self.partition_offset + block * self.block_size
+
+    def group_descriptors(self) -> List[Dict[str, int]]:
+        """
+        Reads the group descriptor table following the primary superblock.
+        Returns one { "block_bitmap", "inode_bitmap", "inode_table",
+        "free_blocks", "flags" } dict per block group.
+        """
+        table_block = self.first_data_block + 1
+        raw = self.scanner.read_range(self.block_offset(table_block), self.group_count * self.desc_size)
+        wide = self.desc_size >= 64
+        descriptors = []
+        for g in range(len(raw) // self.desc_size):
+            d = raw[g * self.desc_size:(g + 1) * self.desc_size]
+            block_bitmap, inode_bitmap, inode_table = struct.unpack_from("<III", d, 0x00)
+            free_blocks, = struct.unpack_from("<H", d, 0x0C)
+            flags, = struct.unpack_from("<H", d, 0x12)
+            if wide:
+                hi = struct.unpack_from("<III", d, 0x20)
+                block_bitmap |= hi[0] << 32
+                inode_bitmap |= hi[1] << 32
+                inode_table |= hi[2] << 32
+                free_blocks |= struct.unpack_from("<H", d, 0x2C)[0] << 16
+            descriptors.append({
+                "block_bitmap": block_bitmap,
+                "inode_bitmap": inode_bitmap,
+                "inode_table": inode_table,
+                "free_blocks": free_blocks,
+                "flags": flags,
+            })
+        return descriptors
+
+    def _has_superblock_backup(self, group: int) -> bool:
+        """Whether a group starts with a superblock/GDT copy (sparse_super rule)."""
+        if group <= 1 or not self.feature_ro_compat & RO_COMPAT_SPARSE_SUPER:
+            return True
+        for base in (3, 5, 7):
+            n = base
+            while n < group:
+                n *= base
+            if n == group:
+                return True
+        return False
+
+    def allocated_block_bitmap(self, descriptors: Optional[List[Dict[str, int]]] = None) -> np.ndarray:
+        """
+        Boolean array indexed by block number; True where the block is in
+        use. Block bitmaps are read in as few requests as possible: with
+        flex_bg the bitmaps of a flex group are stored back to back and are
+        fetched together. Groups flagged BLOCK_UNINIT have no bitmap on disk;
+        only their metadata (superblock copy, descriptor table, and the
+        bitmaps and inode tables placed anywhere by flex_bg) is marked used.
+        """
+        descriptors = self.group_descriptors() if descriptors is None else descriptors
+        bpg = self.blocks_per_group
+        bitmap_bytes = bpg // 8
+        allocated = np.zeros(self.first_data_block + self.group_count * bpg, dtype=bool)
+        allocated[:self.first_data_block] = True  # Boot block of 1 KiB-block volumes
+
+        uninit_valid = bool(self.feature_ro_compat & (RO_COMPAT_GDT_CSUM | RO_COMPAT_METADATA_CSUM))
+        to_read = [g for g, d in enumerate(descriptors) if not (uninit_valid and d["flags"] & BG_BLOCK_UNINIT)]
+
+        # Coalesce groups whose bitmap blocks are adjacent into single reads
+        to_read.sort(key=lambda g: descriptors[g]["block_bitmap"])
+        i = 0
+        while i < len(to_read):
+            j = i + 1
+            first_block = descriptors[to_read[i]]["block_bitmap"]
+            while j < len(to_read) and descriptors[to_read[j]]["block_bitmap"] == first_block + (j - i):
+                j += 1
+            raw = self.scanner.read_range(self.block_offset(first_block), (j - i) * self.block_size)
+            for k, g in enumerate(to_read[i:j]):
+                chunk = np.frombuffer(raw, dtype=np.uint8, count=bitmap_bytes, offset=k * self.block_size) \
+                    if (k + 1) * self.block_size <= len(raw) else np.zeros(bitmap_bytes, dtype=np.uint8)
+                start = self.first_data_block + g * bpg
+                # Bit n of byte k describes block 8k + n of the group
+                allocated[start:start + bpg] = np.unpackbits(chunk, bitorder="little").astype(bool)
+            i = j
+
+        gdt_blocks = -(-self.group_count * self.desc_size // self.block_size)
+        inode_table_blocks = -(-self.inodes_per_group * self.inode_size // self.block_size)
+        for g, d in enumerate(descriptors):
+            if not (uninit_valid and d["flags"] & BG_BLOCK_UNINIT):
+                continue
+            start = self.first_data_block + g * bpg
+            if self._has_superblock_backup(g):
+                allocated[start:start + 1 + gdt_blocks + self.reserved_gdt_blocks] = True
+        for d in descriptors:
+            allocated[d["block_bitmap"]:d["block_bitmap"] + 1] = True
+            allocated[d["inode_bitmap"]:d["inode_bitmap"] + 1] = True
+            allocated[d["inode_table"]:d["inode_table"] + inode_table_blocks] = True
+
+        return allocated[:self.blocks_count]
+
+    def free_extents(self, bitmap: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+        """
+        Coalesced (start, end) image byte ranges of blocks clear in the
+        group block bitmaps, excluding group metadata.
+        """
+        bitmap = self.allocated_block_bitmap() if bitmap is None else bitmap
+        extents = mask_to_extents(~bitmap, self.block_size, self.partition_offset)
+        return clip_extents(extents, 0, self.scanner.file_size)
@@ -1,6 +1,21 @@
 import struct
+import numpy as np
 from storage_scan.scanner import DiskScanner
-from typing import Dict, Any
+from storage_scan.extents import mask_to_extents, clip_extents, coalesce_extents
+from typing import Dict, Any, List, Optional, Tuple
+
+# FAT32 entries use the low 28 bits
+FAT32_ENTRY_MASK = 0x0FFFFFFF
+FAT32_FREE = 0x00000000
+FAT32_BAD = 0x0FFFFFF7
+FAT32_EOC_MIN = 0x0FFFFFF8
+
+# Directory entry layout
+DIR_ENTRY_SIZE = 32
+DELETED_MARKER = 0xE5
+ATTR_VOLUME_ID = 0x08
+ATTR_DIRECTORY = 0x10
+ATTR_LFN = 0x0F
 
 
 class FAT32Parser:
@@ -9,12 +24,20 @@ class FAT32Parser:
     Specifically targets the FAT location and cluster size.
     """
 
-    def __init__(self, scanner: DiskScanner):
+    def __init__(self, scanner: DiskScanner, partition_offset: int = 0):
         self.scanner = scanner
+        self.partition_offset: int = partition_offset  # Byte offset of the volume in the image
         self.sector_size: int = 512
         self.cluster_size: int = 4096
         self.fat_offset: int = 0
         self.data_offset: int = 0
+        self.fat_size: int = 0
+        self.cluster_count: int = 0
+        self.root_cluster: int = 2
+
+    def parse(self) -> Dict[str, Any]:
+        """Reads and parses the boot sector at partition_offset through the scanner."""
+        return self.parse_boot_sector(self.scanner.read_range(self.partition_offset, 512))
 
     def parse_boot_sector(self, sector_data: bytes) -> Dict[str, Any]:
         """
@@ -39,15 +62,241 @@ class FAT32Parser:
         num_fats = struct.unpack("B", sector_data[0x10:0x11])[0]
         # Sectors Per FAT (Offset 0x24, 4 bytes for FAT32)
         sectors_per_fat = struct.unpack("<I", sector_data[0x24:0x28])[0]
+        # Total Sectors (Offset 0x13, 2 bytes; 0x20, 4 bytes when the former is 0)
+        total_sectors = struct.unpack("<H", sector_data[0x13:0x15])[0] or \
+            struct.unpack("<I", sector_data[0x20:0x24])[0]
+        # Root Directory Cluster (Offset 0x2C, 4 bytes)
+        self.root_cluster = struct.unpack("<I", sector_data[0x2C:0x30])[0]
 
         # Calculate FAT and Data offsets
         self.fat_offset = reserved_sectors * self.sector_size
         self.data_offset = (reserved_sectors + (num_fats * sectors_per_fat)) * self.sector_size
+        self.fat_size = sectors_per_fat * self.sector_size
+
+        # Data clusters are numbered from 2
+        data_sectors = total_sectors - reserved_sectors - num_fats * sectors_per_fat
+        self.cluster_count = max(0, data_sectors // sectors_per_cluster) if sectors_per_cluster else 0
 
         return {
             "oem_id": oem_id,
             "sector_size": self.sector_size,
             "cluster_size": self.cluster_size,
             "fat_offset": self.fat_offset,
-            "data_offset": self.data_offset
+            "data_offset": self.data_offset,
+            "cluster_count": self.cluster_count,
+            "root_cluster": self.root_cluster
+        }
+
+    def configure_scanner(self) -> None:
+        """Points the scanner's cluster mapping at this volume's data area."""
+        self.scanner.set_filesystem_info(self.cluster_size, self.partition_offset + self.data_offset)
+
+    def cluster_offset(self, cluster: int) -> int:
+        """Absolute image offset of a FAT cluster number (the first data cluster is 2)."""
+        return self.scanner.cluster_to_sector(cluster - 2)
+
+    def load_fat(self) -> np.ndarray:
+        """
+        Reads the first FAT into a uint32 array indexed by cluster number,
+        with the reserved top 4 bits masked off.
+        """
+        num_entries = min(self.cluster_count + 2, self.fat_size // 4)
+        raw = self.scanner.read_range(self.partition_offset + self.fat_offset, num_entries * 4)
+        fat = np.frombuffer(raw, dtype="<u4", count=len(raw) // 4).astype(np.uint32)
+        return fat & FAT32_ENTRY_MASK
+
+    def free_cluster_bitmap(self, fat: Optional[np.ndarray] = None) -> np.ndarray:
+        """Boolean array indexed by cluster number; True where the cluster is free."""
+        fat = self.load_fat() if fat is None else fat
+        free = fat == FAT32_FREE
+        free[:2] = False  # Entries 0 and 1 are reserved, not clusters
+        return free
+
+    def free_extents(self, fat: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+        """
+        Coalesced (start, end) image byte ranges of clusters marked free in
+        the FAT. Deleting a file only zeroes its chain, so its data stays
+        there until reused.
+        """
+        self.configure_scanner()
+        free = self.free_cluster_bitmap(fat)
+        extents = mask_to_extents(free[2:], self.cluster_size, self.cluster_offset(2))
+        return clip_extents(extents, 0, self.scanner.file_size)
+
+
+def _lfn_checksum(short_name: bytes) -> int:
+    """Checksum of an 11-byte 8.3 name, as stored in its long-file-name entries."""
+    checksum = 0
+    for b in short_name:
+        checksum = (((checksum & 1) << 7) + (checksum >> 1) + b) & 0xFF
+    return checksum
+
+
+def _lfn_chars(entry: bytes) -> str:
+    """Decodes the 13 UTF-16 characters held by one long-file-name entry."""
+    raw = entry[1:11] + entry[14:26] + entry[28:32]
+    name = raw.decode("utf-16-le", errors="replace")
+    return name.split("\x00", 1)[0].replace("\uffff", "")
+
+
+class FAT32Undeleter:
+    """
+    Recovers deleted files from FAT32 directory entries (first byte 0xE5)
+    without carving. Directory clusters are walked from the root, deleted
+    short entries are paired with their long-file-name fragments, and each
+    file is rebuilt from its start cluster and size. Deleting a file zeroes
+    its FAT chain, so the clusters are assumed to be contiguous.
+    """
+
+    def __init__(self, parser: FAT32Parser, fat: Optional[np.ndarray] = None):
+        self.parser = parser
+        self.scanner = parser.scanner
+        if not parser.fat_size:
+            parser.parse()
+        parser.configure_scanner()
+        self.fat = parser.load_fat() if fat is None else fat
+
+    def cluster_chain(self, start: int, max_clusters: Optional[int] = None) -> List[int]:
+        """Follows a FAT chain until end-of-chain, a free/bad entry or a loop."""
+        limit = max_clusters or len(self.fat)
+        chain: List[int] = []
+        seen = set()
+        cluster = start
+        while 2 <= cluster < len(self.fat) and cluster not in seen and len(chain) < limit:
+            chain.append(cluster)
+            seen.add(cluster)
+            nxt = int(self.fat[cluster])
+            if nxt == FAT32_FREE or nxt == FAT32_BAD or nxt >= FAT32_EOC_MIN:
+                break
+            cluster = nxt
+        return chain
+
+    def _read_clusters(self, clusters: List[int]) -> bytes:
+        cluster_size = self.parser.cluster_size
+        return b"".join(self.scanner.read_range(self.parser.cluster_offset(c), cluster_size) for c in clusters)
+
+    def deleted_entries(self) -> List[Dict[str, Any]]:
+        """
+        Walks every reachable directory (live ones through their FAT chain,
+        deleted ones through their first cluster) and returns one dict per
+        deleted entry: { "path", "name", "size", "start_cluster",
+        "is_dir", "extents", "overwritten" }.
+        """
+        results: List[Dict[str, Any]] = []
+        pending = [(self.parser.root_cluster, "", False)]
+        visited = set()
+        while pending:
+            cluster, path, deleted_dir = pending.pop(0)
+            if cluster in visited or not 2 <= cluster < len(self.fat):
+                continue
+            visited.add(cluster)
+            clusters = [cluster] if deleted_dir else self.cluster_chain(cluster)
+            for entry in self._parse_directory(self._read_clusters(clusters)):
+                full_path = f"{path}/{entry['name']}"
+                if entry["is_dir"]:
+                    pending.append((entry["start_cluster"], full_path, deleted_dir or entry["deleted"]))
+                if entry["deleted"]:
+                    results.append(self._rebuild(entry, full_path))
+        return results
+
+    def _parse_directory(self, data: bytes) -> List[Dict[str, Any]]:
+        """Decodes 32-byte directory entries, attaching preceding LFN fragments."""
+        entries = []
+        lfn_parts: List[bytes] = []
+        for pos in range(0, len(data) - DIR_ENTRY_SIZE + 1, DIR_ENTRY_SIZE):
+            raw = data[pos:pos + DIR_ENTRY_SIZE]
+            if raw[0] == 0x00:  # End of directory
+                break
+            attr = raw[11]
+            if attr == ATTR_LFN:
+                lfn_parts.append(raw)
+                continue
+            parts, lfn_parts = lfn_parts, []
+            if attr & ATTR_VOLUME_ID or raw[0:2] in (b". ", b".."):
+                continue
+
+            deleted = raw[0] == DELETED_MARKER
+            short_name = bytearray(raw[0:11])
+            if deleted:
+                short_name[0] = self._recover_first_char(bytes(short_name), parts)
+            # LFN entries are stored last fragment first
+            long_name = "".join(_lfn_chars(p) for p in reversed(parts))
+            entries.append({
+                "name": long_name or self._format_short_name(bytes(short_name)),
+                "deleted": deleted,
+                "is_dir": bool(attr & ATTR_DIRECTORY),
+                "start_cluster": (struct.unpack("<H", raw[20:22])[0] << 16) | struct.unpack("<H", raw[26:28])[0],
+                "size": struct.unpack("<I", raw[28:32])[0],
+            })
+        return entries
+
+    @staticmethod
+    def _recover_first_char(short_name: bytes, lfn_parts: List[bytes]) -> int:
+        """
+        Restores the first 8.3 character overwritten by 0xE5, using the LFN
+        checksum when fragments are available and '_' otherwise.
+        """
+        if lfn_parts:
+            expected = lfn_parts[-1][13]
+            for candidate in range(0x20, 0x7F):
+                if _lfn_checksum(bytes([candidate]) + short_name[1:]) == expected:
+                    return candidate
+        return ord("_")
+
+    @staticmethod
+    def _format_short_name(short_name: bytes) -> str:
+        base = short_name[0:8].decode("ascii", errors="replace").rstrip()
+        ext = short_name[8:11].decode("ascii", errors="replace").rstrip()
+        return f"{base}.{ext}" if ext else base
+
+    def _rebuild(self, entry: Dict[str, Any], path: str) -> Dict[str, Any]:
+        """Maps a deleted entry to image extents, assuming contiguous clusters."""
+        cluster_size = self.parser.cluster_size
+        start = entry["start_cluster"]
+        num_clusters = -(-entry["size"] // cluster_size) if not entry["is_dir"] else 1
+        extents: List[Tuple[int, int]] = []
+        overwritten = False
+        if 2 <= start < len(self.fat) and num_clusters:
+            last = min(start + num_clusters, len(self.fat))
+            # Clusters now in use by another file hold someone else's data
+            overwritten = bool((self.fat[start:last] != FAT32_FREE).any()) or last - start < num_clusters
+            offset = self.parser.cluster_offset(start)
+            length = entry["size"] if not entry["is_dir"] else cluster_size
+            extents = clip_extents([(offset, offset + length)], 0, self.scanner.file_size)
+        return {
+            "path": path,
+            "name": entry["name"],
+            "size": entry["size"],
+            "start_cluster": start,
+            "is_dir": entry["is_dir"],
+            "extents": extents,
+            "overwritten": overwritten,
         }
+
+    def read_data(self, entry: Dict[str, Any]) -> bytes:
+        """Reads a deleted file's contents directly from the image over its extents."""
+        return b"".join(self.scanner.read_range(start, end - start) for start, end in entry["extents"])
+
+    def recover_files(self, include_overwritten: bool = False):
+        """
+        Yields (entry, data) for every deleted regular file, read directly
+        from the image over its extents without a full-image carve.
+        """
+        for entry in self.deleted_entries():
+            if entry["is_dir"] or not entry["extents"] or (entry["overwritten"] and not include_overwritten):
+                continue
+            yield entry, self.read_data(entry)
+
+
+def recovered_extents(entries: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+    """Coalesced image ranges already covered by undeleted files."""
+    return coalesce_extents([extent for entry in entries for extent in entry["extents"]])
+
+
+def deduplicate_carved(carved_files: List[Dict], entries: List[Dict[str, Any]]) -> List[Dict]:
+    """Drops carved files that start inside a file already recovered by undelete."""
+    covered = recovered_extents(entries)
+    return [
+        f for f in carved_files
+        if not any(start <= f["start_offset"] < end for start, end in covered)
+    ]
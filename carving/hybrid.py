@@ -1,3 +1,4 @@
+import numpy as np
 import torch
 import torch.nn.functional as F
 from typing import List, Dict, Optional
@@ -14,10 +15,12 @@ class HybridCarver:
     def __init__(self, 
                  checkpoint_path: str = "models/checkpoints/classifier_best.pth",
                  confidence_threshold: float = 0.7,
-                 device: str = "cpu"):
+                 device: str = "cpu",
+                 batch_size: int = 256):
         self.signature_carver = SignatureCarver()
         self.confidence_threshold = confidence_threshold
         self.device = device
+        self.batch_size = batch_size
         
         # Initialize Classifier
         self.classifier = FragmentClassifier(num_classes=3)
@@ -60,15 +63,49 @@ class HybridCarver:
             probabilities = F.softmax(output, dim=1)
             conf, pred = torch.max(probabilities, 1)
             
-            label = self.labels[pred.item()]
-            confidence = conf.item()
-            
-            if confidence >= self.confidence_threshold:
-                res = {"type": label, "confidence": confidence, "source": "ai"}
-            else:
-                res = {"type": "other", "confidence": confidence, "source": "ai_low_confidence"}
-            
-            return res
+            return self._ai_result(pred.item(), conf.item())
+
+    def identify_chunk(self, blocks) -> List[Dict]:
+        """
+        Identifies every block of a (n_blocks, block_size) uint8 array, as
+        yielded by DiskScanner.scan_chunks, in one batched pass.
+        Returns one identification dict per block, in block order.
+        """
+        blocks = np.asarray(blocks, dtype=np.uint8)
+        results: List[Optional[Dict]] = [None] * len(blocks)
+        if len(blocks) == 0:
+            return []
+
+        # Vectorized fast paths: zero blocks and header signatures
+        zero = ~blocks.any(axis=1)
+        jpeg = (blocks[:, 0] == 0xFF) & (blocks[:, 1] == 0xD8)
+        pdf = (blocks[:, :4] == np.frombuffer(b"%PDF", dtype=np.uint8)).all(axis=1)
+        for i in np.flatnonzero(zero):
+            results[i] = {"type": "other", "confidence": 1.0, "source": "zero_block"}
+        for i in np.flatnonzero(jpeg):
+            results[i] = {"type": "jpeg", "confidence": 1.0, "source": "signature"}
+        for i in np.flatnonzero(pdf):
+            results[i] = {"type": "pdf", "confidence": 1.0, "source": "signature"}
+
+        # Remaining blocks go through the classifier in mini-batches
+        pending = np.flatnonzero(~(zero | jpeg | pdf))
+        for start in range(0, len(pending), self.batch_size):
+            idx = pending[start:start + self.batch_size]
+            batch = torch.from_numpy(blocks[idx].astype(np.float32) / 255.0)
+            batch = batch.unsqueeze(1).to(self.device)  # (n, 1, block_size)
+            with torch.no_grad():
+                probabilities = F.softmax(self.classifier(batch), dim=1)
+                conf, pred = torch.max(probabilities, 1)
+            for i, p, c in zip(idx, pred.tolist(), conf.tolist()):
+                results[i] = self._ai_result(p, c)
+
+        return results
+
+    def _ai_result(self, label_index: int, confidence: float) -> Dict:
+        """Builds the identification dict for a classifier prediction."""
+        if confidence >= self.confidence_threshold:
+            return {"type": self.labels[label_index], "confidence": confidence, "source": "ai"}
+        return {"type": "other", "confidence": confidence, "source": "ai_low_confidence"}
 
     def scan_disk(self, scanner_generator) -> List[Dict]:
         """
@@ -82,3 +119,42 @@ class HybridCarver:
                 "identification": identification
             })
         return results
+
+    def scan_chunks(self, chunk_generator) -> List[Dict]:
+        """
+        Chunked counterpart of scan_disk for (base_offset, blocks) pairs
+        yielded by DiskScanner.scan_chunks.
+        """
+        results = []
+        for base_offset, blocks in chunk_generator:
+            block_size = blocks.shape[1]
+            for i, identification in enumerate(self.identify_chunk(blocks)):
+                results.append({
+                    "offset": base_offset + i * block_size,
+                    "identification": identification
+                })
+        return results
+
+    def scan_segments(self, segment_generator) -> List[Dict]:
+        """
+        Scans ScanSegments from DiskScanner.scan_segments. Data blocks get one
+        result each; empty runs get a single run-length record with "length"
+        and "fill" keys instead of per-block results.
+        """
+        results = []
+        for segment in segment_generator:
+            if segment.fill is not None:
+                results.append({
+                    "offset": segment.offset,
+                    "length": segment.length,
+                    "fill": segment.fill,
+                    "identification": {"type": "other", "confidence": 1.0, "source": "fill_run"}
+                })
+                continue
+            block_size = segment.blocks.shape[1]
+            for i, identification in enumerate(self.identify_chunk(segment.blocks)):
+                results.append({
+                    "offset": segment.offset + i * block_size,
+                    "identification": identification
+                })
+        return results
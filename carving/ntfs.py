@@ -1,6 +1,30 @@
 import struct
+import numpy as np
 from storage_scan.scanner import DiskScanner
-from typing import Dict, Any
+from storage_scan.extents import mask_to_extents, clip_extents
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+# MFT record layout
+MFT_RECORD_MAGIC = b"FILE"
+MFT_FLAG_IN_USE = 0x0001
+MFT_FLAG_DIRECTORY = 0x0002
+MFT_ROOT_RECORD = 5
+MFT_BITMAP_RECORD = 6
+# Records read and fixed up per batch
+MFT_BATCH_RECORDS = 4096
+# Update sequence entries protect every 512 bytes, whatever the volume's sector size
+UPDATE_SEQUENCE_STRIDE = 512
+
+# Attribute type codes
+ATTR_STANDARD_INFORMATION = 0x10
+ATTR_FILE_NAME = 0x30
+ATTR_DATA = 0x80
+ATTR_END = 0xFFFFFFFF
+
+# $FILE_NAME namespace of 8.3 aliases, only used when no long name exists
+FILE_NAME_DOS = 2
+# 100ns intervals between 1601-01-01 and the Unix epoch
+FILETIME_UNIX_EPOCH = 116444736000000000
 
 
 class NTFSParser:
@@ -9,12 +33,19 @@ class NTFSParser:
     Specifically targets the $MFT location and cluster size.
     """
 
-    def __init__(self, scanner: DiskScanner):
+    def __init__(self, scanner: DiskScanner, partition_offset: int = 0):
         self.scanner = scanner
+        self.partition_offset: int = partition_offset  # Byte offset of the volume in the image
         self.sector_size: int = 512
         self.cluster_size: int = 4096
         self.mft_cluster: int = 0
         self.mft_offset: int = 0
+        self.record_size: int = 1024
+        self.total_clusters: int = 0
+
+    def parse(self) -> Dict[str, Any]:
+        """Reads and parses the boot sector at partition_offset through the scanner."""
+        return self.parse_boot_sector(self.scanner.read_range(self.partition_offset, 512))
 
     def parse_boot_sector(self, sector_data: bytes) -> Dict[str, Any]:
         """
@@ -35,14 +66,348 @@ class NTFSParser:
         sectors_per_cluster = struct.unpack("B", sector_data[0x0D:0x0E])[0]
         self.cluster_size = self.sector_size * sectors_per_cluster
 
+        # Total Sectors (Offset 0x28, 8 bytes)
+        total_sectors = struct.unpack("<Q", sector_data[0x28:0x30])[0]
+        self.total_clusters = total_sectors // sectors_per_cluster if sectors_per_cluster else 0
+
         # Logical Cluster Number for the File $MFT (Offset 0x30, 8 bytes)
         self.mft_cluster = struct.unpack("<Q", sector_data[0x30:0x38])[0]
         self.mft_offset = self.mft_cluster * self.cluster_size
 
+        # Clusters Per MFT Record (Offset 0x40, signed byte); negative n means 2^-n bytes
+        clusters_per_record = struct.unpack("b", sector_data[0x40:0x41])[0]
+        if clusters_per_record < 0:
+            self.record_size = 1 << -clusters_per_record
+        elif clusters_per_record > 0:
+            self.record_size = clusters_per_record * self.cluster_size
+
         return {
             "oem_id": oem_id,
             "sector_size": self.sector_size,
             "cluster_size": self.cluster_size,
             "mft_cluster": self.mft_cluster,
-            "mft_offset": self.mft_offset
+            "mft_offset": self.mft_offset,
+            "record_size": self.record_size,
+            "total_clusters": self.total_clusters
+        }
+
+    def cluster_offset(self, lcn: int) -> int:
+        """Absolute image offset of a logical cluster number."""
+        return self.partition_offset + lcn * self.cluster_size
+
+
+def filetime_to_unix(filetime: int) -> float:
+    """Converts an NTFS FILETIME (100ns ticks since 1601) to Unix seconds."""
+    return (filetime - FILETIME_UNIX_EPOCH) / 1e7
+
+
+def decode_data_runs(runlist: bytes) -> List[Tuple[Optional[int], int]]:
+    """
+    Decodes an NTFS mapping-pairs array into (lcn, cluster_count) runs.
+    Sparse runs (no offset field) have lcn None.
+    """
+    runs: List[Tuple[Optional[int], int]] = []
+    pos = 0
+    lcn = 0
+    while pos < len(runlist) and runlist[pos] != 0:
+        header = runlist[pos]
+        length_size, offset_size = header & 0x0F, header >> 4
+        pos += 1
+        if length_size == 0 or pos + length_size + offset_size > len(runlist):
+            break
+        count = int.from_bytes(runlist[pos:pos + length_size], "little")
+        pos += length_size
+        if offset_size:
+            lcn += int.from_bytes(runlist[pos:pos + offset_size], "little", signed=True)
+            runs.append((lcn, count))
+        else:
+            runs.append((None, count))
+        pos += offset_size
+    return runs
+
+
+def apply_fixups(records: np.ndarray, stride: int = UPDATE_SEQUENCE_STRIDE) -> np.ndarray:
+    """
+    Applies the update sequence array to a writable (n, record_size) uint8
+    batch of MFT records in place. Returns a boolean mask of records that
+    carry the FILE magic and whose sector tails all matched the update
+    sequence number (torn or foreign records are False).
+    """
+    num_records, record_size = records.shape
+    sectors = record_size // stride
+    valid = (records[:, 0:4] == np.frombuffer(MFT_RECORD_MAGIC, dtype=np.uint8)).all(axis=1)
+    usa_offset = _field(records, 0x04, "<u2").astype(np.int64)
+    usa_count = _field(records, 0x06, "<u2").astype(np.int64)
+    valid &= (usa_count == sectors + 1) & (usa_offset + 2 * usa_count <= record_size) & (usa_offset >= 0x28)
+
+    # Records of one volume share the array offset, so this loops once or twice
+    for offset in np.unique(usa_offset[valid]):
+        rows = np.flatnonzero(valid & (usa_offset == offset))
+        usn = records[rows, offset:offset + 2]
+        for i in range(1, sectors + 1):
+            tail = slice(i * stride - 2, i * stride)
+            valid[rows[~(records[rows, tail] == usn).all(axis=1)]] = False
+            records[rows, tail] = records[rows, offset + 2 * i:offset + 2 * i + 2]
+    return valid
+
+
+def _field(records: np.ndarray, offset: int, dtype: str) -> np.ndarray:
+    """One little-endian header field of every record in a batch."""
+    size = np.dtype(dtype).itemsize
+    return np.ascontiguousarray(records[:, offset:offset + size]).view(dtype).ravel()
+
+
+class MFTParser:
+    """
+    Streams the $MFT of an NTFS volume in fixed-size batches.
+    Fixups and header fields are handled with vectorized numpy operations
+    over whole batches; attributes are decoded only for the records a
+    caller selects (e.g. deleted files), so millions of records can be
+    walked without building an object per record.
+    """
+
+    def __init__(self, ntfs: NTFSParser, batch_records: int = MFT_BATCH_RECORDS):
+        self.ntfs = ntfs
+        self.scanner = ntfs.scanner
+        if not ntfs.mft_cluster:
+            ntfs.parse()
+        self.record_size = ntfs.record_size
+        self.batch_records = batch_records
+        self._extents: Optional[List[Tuple[int, int]]] = None
+
+    def mft_extents(self) -> List[Tuple[int, int]]:
+        """
+        Absolute (start, end) byte ranges of the $MFT, taken from the $DATA
+        runs of record 0 so a fragmented MFT is followed correctly.
+        """
+        if self._extents is None:
+            start = self.ntfs.cluster_offset(self.ntfs.mft_cluster)
+            raw = np.frombuffer(bytearray(self.scanner.read_range(start, self.record_size)), dtype=np.uint8)
+            self._extents = []
+            if len(raw) == self.record_size:
+                record = raw.reshape(1, -1)
+                if apply_fixups(record)[0]:
+                    self._extents = self.record_extents(self.parse_record(record[0]))
+            if not self._extents:
+                self._extents = [(start, start + self.record_size)]
+        return self._extents
+
+    def iter_batches(self) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Yields (first_record_number, records, valid) for consecutive batches,
+        where records is a fixed-up (n, record_size) uint8 array and valid
+        the mask returned by apply_fixups().
+        """
+        record_number = 0
+        batch_bytes = self.batch_records * self.record_size
+        for start, end in self.mft_extents():
+            end = min(end, self.scanner.file_size)
+            for offset in range(start, end, batch_bytes):
+                length = min(batch_bytes, end - offset) // self.record_size * self.record_size
+                if length == 0:
+                    break
+                raw = bytearray(self.scanner.read_range(offset, length))
+                records = np.frombuffer(raw, dtype=np.uint8).reshape(-1, self.record_size)
+                valid = apply_fixups(records)
+                yield record_number, records, valid
+                record_number += len(records)
+
+    def read_record(self, record_number: int) -> Optional[Dict[str, Any]]:
+        """Reads, fixes up and parses a single record by number; None if unreadable."""
+        offset = record_number * self.record_size
+        for start, end in self.mft_extents():
+            if offset < end - start:
+                raw = bytearray(self.scanner.read_range(start + offset, self.record_size))
+                if len(raw) < self.record_size:
+                    return None
+                record = np.frombuffer(raw, dtype=np.uint8).reshape(1, -1)
+                if not apply_fixups(record)[0]:
+                    return None
+                return self.parse_record(record[0])
+            offset -= end - start
+        return None
+
+    def allocated_cluster_bitmap(self) -> Optional[np.ndarray]:
+        """
+        Reads the $Bitmap metafile (record 6) into a boolean array indexed by
+        cluster number; True where the cluster is allocated. Returns None if
+        $Bitmap cannot be read.
+        """
+        entry = self.read_record(MFT_BITMAP_RECORD)
+        if entry is None or (entry["resident_data"] is None and not entry["runs"]):
+            return None
+        raw = np.frombuffer(self.read_data(entry), dtype=np.uint8)
+        # Bit n of byte k describes cluster 8k + n
+        bitmap = np.unpackbits(raw, bitorder="little").astype(bool)
+        if self.ntfs.total_clusters:
+            bitmap = bitmap[:self.ntfs.total_clusters]
+        return bitmap
+
+    def free_extents(self, bitmap: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+        """
+        Coalesced (start, end) image byte ranges of clusters clear in
+        $Bitmap; empty when $Bitmap cannot be read.
+        """
+        bitmap = self.allocated_cluster_bitmap() if bitmap is None else bitmap
+        if bitmap is None:
+            return []
+        extents = mask_to_extents(~bitmap, self.ntfs.cluster_size, self.ntfs.partition_offset)
+        return clip_extents(extents, 0, self.scanner.file_size)
+
+    @staticmethod
+    def record_headers(records: np.ndarray) -> Dict[str, np.ndarray]:
+        """Vectorized decode of the header fields of a batch of records."""
+        flags = _field(records, 0x16, "<u2")
+        return {
+            "sequence": _field(records, 0x10, "<u2"),
+            "flags": flags,
+            "in_use": (flags & MFT_FLAG_IN_USE).astype(bool),
+            "is_dir": (flags & MFT_FLAG_DIRECTORY).astype(bool),
+            # Extension records of a multi-record file point at their base record
+            "base_record": _field(records, 0x20, "<u8") & 0xFFFFFFFFFFFF,
         }
+
+    def parse_record(self, record: np.ndarray) -> Dict[str, Any]:
+        """
+        Decodes the attributes of one fixed-up record:
+        { "flags", "in_use", "is_dir", "name", "parent_record", "created",
+          "modified", "size", "resident_data", "runs" }.
+        Only the unnamed $DATA stream is considered.
+        """
+        view = record.tobytes()
+        flags = struct.unpack_from("<H", view, 0x16)[0]
+        entry: Dict[str, Any] = {
+            "flags": flags,
+            "in_use": bool(flags & MFT_FLAG_IN_USE),
+            "is_dir": bool(flags & MFT_FLAG_DIRECTORY),
+            "name": None,
+            "parent_record": None,
+            "created": None,
+            "modified": None,
+            "size": 0,
+            "resident_data": None,
+            "runs": [],
+        }
+        name_namespace = None
+        pos = struct.unpack_from("<H", view, 0x14)[0]
+        used = min(struct.unpack_from("<I", view, 0x18)[0], len(view))
+        while pos + 16 <= used:
+            attr_type, attr_len = struct.unpack_from("<II", view, pos)
+            if attr_type == ATTR_END or attr_len < 16 or pos + attr_len > used:
+                break
+            non_resident, name_len = view[pos + 8], view[pos + 9]
+            if not non_resident:
+                value_len, value_off = struct.unpack_from("<IH", view, pos + 0x10)
+                value = view[pos + value_off:pos + value_off + value_len]
+            else:
+                value = b""
+
+            if attr_type == ATTR_STANDARD_INFORMATION and len(value) >= 16:
+                created, modified = struct.unpack_from("<QQ", value, 0)
+                entry["created"] = filetime_to_unix(created)
+                entry["modified"] = filetime_to_unix(modified)
+            elif attr_type == ATTR_FILE_NAME and len(value) >= 0x42:
+                namespace = value[0x41]
+                # Prefer a long (POSIX/Win32) name over the DOS 8.3 alias
+                if name_namespace is None or name_namespace == FILE_NAME_DOS:
+                    chars = value[0x40]
+                    entry["name"] = value[0x42:0x42 + 2 * chars].decode("utf-16-le", errors="replace")
+                    entry["parent_record"] = struct.unpack_from("<Q", value, 0)[0] & 0xFFFFFFFFFFFF
+                    name_namespace = namespace
+            elif attr_type == ATTR_DATA and name_len == 0:
+                if non_resident:
+                    runlist_off = struct.unpack_from("<H", view, pos + 0x20)[0]
+                    entry["size"] = struct.unpack_from("<Q", view, pos + 0x30)[0]
+                    entry["runs"] = decode_data_runs(view[pos + runlist_off:pos + attr_len])
+                else:
+                    entry["size"] = len(value)
+                    entry["resident_data"] = value
+            pos += attr_len
+        return entry
+
+    def record_extents(self, entry: Dict[str, Any]) -> List[Tuple[int, int]]:
+        """Absolute byte extents of a non-resident $DATA stream (sparse runs skipped)."""
+        extents = []
+        cluster_size = self.ntfs.cluster_size
+        remaining = entry["size"]
+        for lcn, count in entry["runs"]:
+            if remaining <= 0:
+                break
+            length = min(count * cluster_size, remaining)
+            if lcn is not None:
+                start = self.ntfs.cluster_offset(lcn)
+                extents.append((start, start + length))
+            remaining -= length
+        return extents
+
+    def read_data(self, entry: Dict[str, Any]) -> bytes:
+        """Reads a record's $DATA stream: resident bytes, or its runs with sparse runs zero-filled."""
+        if entry["resident_data"] is not None:
+            return entry["resident_data"]
+        parts = []
+        cluster_size = self.ntfs.cluster_size
+        remaining = entry["size"]
+        for lcn, count in entry["runs"]:
+            if remaining <= 0:
+                break
+            length = min(count * cluster_size, remaining)
+            if lcn is None:
+                parts.append(bytes(length))
+            else:
+                parts.append(self.scanner.read_range(self.ntfs.cluster_offset(lcn), length))
+            remaining -= length
+        return b"".join(parts)
+
+    def deleted_records(self) -> List[Dict[str, Any]]:
+        """
+        Streams the MFT and returns one dict per deleted base record with
+        a file name: the parse_record() fields plus "record_number",
+        "path", "extents" and "overwritten". Only deleted records and
+        directories (needed to resolve paths) are decoded.
+        """
+        deleted: List[Dict[str, Any]] = []
+        directories: Dict[int, Tuple[str, int]] = {}
+        for first, records, valid in self.iter_batches():
+            headers = self.record_headers(records)
+            base = valid & (headers["base_record"] == 0)
+            for i in np.flatnonzero(base & (~headers["in_use"] | headers["is_dir"])):
+                entry = self.parse_record(records[i])
+                if entry["name"] is None:
+                    continue
+                entry["record_number"] = first + int(i)
+                if entry["is_dir"]:
+                    directories[entry["record_number"]] = (entry["name"], entry["parent_record"])
+                if not entry["in_use"]:
+                    deleted.append(entry)
+
+        bitmap = self.allocated_cluster_bitmap()
+        for entry in deleted:
+            entry["path"] = self._resolve_path(entry, directories)
+            entry["extents"] = self.record_extents(entry)
+            # Clusters allocated again since deletion hold another file's data
+            entry["overwritten"] = bitmap is not None and any(
+                lcn is not None and bitmap[lcn:lcn + count].any() for lcn, count in entry["runs"]
+            )
+        return deleted
+
+    @staticmethod
+    def _resolve_path(entry: Dict[str, Any], directories: Dict[int, Tuple[str, int]]) -> str:
+        """Builds a path by following parent references up to the root directory."""
+        parts = [entry["name"]]
+        parent = entry["parent_record"]
+        seen = set()
+        while parent != MFT_ROOT_RECORD and parent not in seen:
+            seen.add(parent)
+            if parent not in directories:
+                parts.append(f"$Orphan{parent}")
+                break
+            name, parent = directories[parent]
+            parts.append(name)
+        return "/" + "/".join(reversed(parts))
+
+    def recover_files(self, include_overwritten: bool = False):
+        """Yields (entry, data) for every deleted file, from resident $DATA or its runs."""
+        for entry in self.deleted_records():
+            if entry["is_dir"] or (entry["overwritten"] and not include_overwritten):
+                continue
+            yield entry, self.read_data(entry)
@@ -0,0 +1,352 @@
+import os
+import re
+import struct
+import uuid
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Any, Tuple
+
+from storage_scan.scanner import DiskScanner
+from storage_scan.extents import clip_extents, coalesce_extents
+from carving.fat32 import FAT32Parser, FAT32Undeleter
+from carving.ntfs import NTFSParser, MFTParser
+from carving.ext import EXTParser
+
+# MBR partition types that describe an extended partition container
+EXTENDED_TYPES = {0x05, 0x0F, 0x85}
+# Protective MBR entry announcing a GPT disk
+GPT_PROTECTIVE_TYPE = 0xEE
+# Upper bound on EBR chain length, guards against looping chains
+MAX_LOGICAL_PARTITIONS = 128
+# GPT headers are at least 92 bytes; disks use 128 entries, tools allow up to 1024
+GPT_HEADER_MIN_SIZE = 92
+MAX_GPT_ENTRIES = 1024
+# Characters of recovered file names replaced before writing them out
+UNSAFE_NAME_CHARS = re.compile(r"[\x00-\x1f\\]")
+
+GPT_TYPES = {
+    "c12a7328-f81f-11d2-ba4b-00a0c93ec93b": "EFI System",
+    "ebd0a0a2-b9e5-4433-87c0-68b6b72699c7": "Microsoft Basic Data",
+    "e3c9e316-0b5c-4db8-817d-f92df00215ae": "Microsoft Reserved",
+    "de94bba4-06d1-4d40-a16a-bfd50179d6ac": "Windows Recovery",
+    "0fc63daf-8483-4772-8e79-3d69d8477de4": "Linux Filesystem",
+    "0657fd6d-a4ab-43c4-84e5-0933c84b4f4f": "Linux Swap",
+    "e6d6d379-f507-44c2-a23c-238f2a3df928": "Linux LVM",
+}
+
+
+class ScanUnit(NamedTuple):
+    """
+    A byte range of the image scheduled as one unit of work.
+    kind is "partition" or "gap"; fs_type is the detected file system
+    of a partition ("fat32", "ntfs", "ext", ...) or None.
+    """
+    start: int
+    end: int
+    kind: str
+    fs_type: Optional[str]
+    partition_index: Optional[int]
+
+
+class PartitionTable:
+    """
+    Parses MBR (including extended partition chains) and GPT partition
+    tables and detects the file system inside each partition.
+    """
+
+    def __init__(self, scanner: DiskScanner, sector_size: int = 512):
+        self.scanner = scanner
+        self.sector_size = sector_size
+        self.scheme: Optional[str] = None
+        self.partitions: List[Dict[str, Any]] = []
+
+    def parse(self) -> List[Dict[str, Any]]:
+        """
+        Reads the partition table from sector 0.
+        Returns a list of { "index", "scheme", "start", "length", "type",
+        "name", "fs_type" } dicts sorted by start offset (bytes).
+        An image without a valid table returns an empty list.
+        """
+        self.partitions = []
+        self.scheme = None
+        mbr = self.scanner.read_range(0, self.sector_size)
+        if len(mbr) < 512 or mbr[510:512] != b"\x55\xaa":
+            return self.partitions
+        # Volume boot records carry the same 0x55AA marker; a bare volume has no table
+        if self.detect_filesystem(0):
+            return self.partitions
+        # Boot indicator of every entry must be 0x00 or 0x80
+        if any(mbr[446 + slot * 16] not in (0x00, 0x80) for slot in range(4)):
+            return self.partitions
+
+        entries = [self._mbr_entry(mbr, i) for i in range(4)]
+        if any(entry["type"] == GPT_PROTECTIVE_TYPE for entry in entries):
+            self.scheme = "gpt"
+            self.partitions = self._parse_gpt()
+        else:
+            self.scheme = "mbr"
+            self.partitions = self._parse_mbr(entries)
+
+        self.partitions.sort(key=lambda p: p["start"])
+        for index, partition in enumerate(self.partitions):
+            partition["index"] = index
+            partition["fs_type"] = self.detect_filesystem(partition["start"])
+        return self.partitions
+
+    def _mbr_entry(self, sector: bytes, slot: int) -> Dict[str, int]:
+        """Decodes one 16-byte MBR/EBR partition entry."""
+        base = 446 + slot * 16
+        part_type = sector[base + 4]
+        lba_start, num_sectors = struct.unpack("<II", sector[base + 8:base + 16])
+        return {"type": part_type, "lba_start": lba_start, "num_sectors": num_sectors}
+
+    def _parse_mbr(self, entries: List[Dict[str, int]]) -> List[Dict[str, Any]]:
+        """Collects primary partitions and walks the EBR chain of an extended partition."""
+        partitions = []
+        for entry in entries:
+            if entry["type"] == 0 or entry["num_sectors"] == 0:
+                continue
+            if entry["type"] in EXTENDED_TYPES:
+                partitions.extend(self._parse_ebr_chain(entry["lba_start"]))
+                continue
+            partitions.append(self._mbr_partition(entry, 0, "primary"))
+        return partitions
+
+    def _parse_ebr_chain(self, extended_lba: int) -> List[Dict[str, Any]]:
+        """
+        Follows the linked list of Extended Boot Records. Each EBR holds a
+        logical partition (relative to the EBR) and a link to the next EBR
+        (relative to the start of the extended partition).
+        """
+        partitions = []
+        ebr_lba = extended_lba
+        visited = set()
+        while ebr_lba not in visited and len(visited) < MAX_LOGICAL_PARTITIONS:
+            visited.add(ebr_lba)
+            ebr = self.scanner.read_range(ebr_lba * self.sector_size, self.sector_size)
+            if len(ebr) < 512 or ebr[510:512] != b"\x55\xaa":
+                break
+
+            logical = self._mbr_entry(ebr, 0)
+            if logical["type"] != 0 and logical["num_sectors"] > 0:
+                partitions.append(self._mbr_partition(logical, ebr_lba, "logical"))
+
+            link = self._mbr_entry(ebr, 1)
+            if link["type"] not in EXTENDED_TYPES or link["lba_start"] == 0:
+                break
+            ebr_lba = extended_lba + link["lba_start"]
+        return partitions
+
+    def _mbr_partition(self, entry: Dict[str, int], base_lba: int, role: str) -> Dict[str, Any]:
+        return {
+            "scheme": "mbr",
+            "start": (base_lba + entry["lba_start"]) * self.sector_size,
+            "length": entry["num_sectors"] * self.sector_size,
+            "type": f"0x{entry['type']:02x}",
+            "name": role,
+        }
+
+    def _parse_gpt(self) -> List[Dict[str, Any]]:
+        """
+        Reads the GPT partition entry array, from the primary header at LBA 1
+        or, if that one fails its checks, the backup header in the last sector.
+        """
+        last_lba = self.scanner.file_size // self.sector_size - 1
+        table = self._read_gpt_table(1)
+        if table is None and last_lba > 1:
+            table = self._read_gpt_table(last_lba)
+        if table is None:
+            return []
+        table, entry_size = table
+
+        partitions = []
+        for i in range(len(table) // entry_size):
+            entry = table[i * entry_size:(i + 1) * entry_size]
+            if entry[0:16] == b"\x00" * 16:
+                continue
+            type_guid = str(uuid.UUID(bytes_le=bytes(entry[0:16])))
+            first_lba, last_lba = struct.unpack("<QQ", entry[32:48])
+            if last_lba < first_lba:
+                continue
+            name = entry[56:128].decode("utf-16-le", errors="ignore").rstrip("\x00")
+            partitions.append({
+                "scheme": "gpt",
+                "start": first_lba * self.sector_size,
+                "length": (last_lba - first_lba + 1) * self.sector_size,
+                "type": GPT_TYPES.get(type_guid, type_guid),
+                "name": name,
+            })
+        return partitions
+
+    def _read_gpt_table(self, header_lba: int) -> Optional[Tuple[bytes, int]]:
+        """
+        Returns (entry array, entry size) for the GPT header at header_lba,
+        or None if the header or its entry array fails the CRC32 checks or
+        declares an implausible entry count or size.
+        """
+        header = self.scanner.read_range(header_lba * self.sector_size, self.sector_size)
+        if len(header) < GPT_HEADER_MIN_SIZE or header[0:8] != b"EFI PART":
+            return None
+        header_size, header_crc = struct.unpack("<II", header[0x0C:0x14])
+        if not GPT_HEADER_MIN_SIZE <= header_size <= len(header):
+            return None
+        if zlib.crc32(header[:0x10] + b"\x00" * 4 + header[0x14:header_size]) != header_crc:
+            return None
+
+        entries_lba, num_entries, entry_size, entries_crc = struct.unpack("<QIII", header[0x48:0x5C])
+        if not 0 < num_entries <= MAX_GPT_ENTRIES or entry_size < 128 or entry_size % 8:
+            return None
+        table = self.scanner.read_range(entries_lba * self.sector_size, num_entries * entry_size)
+        if len(table) != num_entries * entry_size or zlib.crc32(table) != entries_crc:
+            return None
+        return table, entry_size
+
+    def detect_filesystem(self, offset: int) -> Optional[str]:
+        """Identifies the file system whose boot sector/superblock starts at offset."""
+        boot = self.scanner.read_range(offset, 2048)
+        if len(boot) < 512:
+            return None
+        if boot[3:11] == b"NTFS    ":
+            return "ntfs"
+        if boot[3:11] == b"EXFAT   ":
+            return "exfat"
+        if boot[0x52:0x5A] == b"FAT32   ":
+            return "fat32"
+        if boot[0x36:0x3B] in (b"FAT12", b"FAT16"):
+            return boot[0x36:0x3B].decode("ascii").lower()
+        if len(boot) >= 1024 + 0x3A and boot[1024 + 0x38:1024 + 0x3A] == b"\x53\xef":
+            return "ext"
+        return None
+
+    def scan_units(self) -> List[ScanUnit]:
+        """
+        Splits the image into partitions and the gaps around them (the
+        partition table area, unpartitioned space and trailing slack), as
+        block-aligned ScanUnits in offset order. Each unit can be scanned
+        with DiskScanner.scan_segments(start=unit.start, end=unit.end),
+        given its own strategy, skipped, or handed to a parallel scan.
+        """
+        if not self.partitions and self.scheme is None:
+            self.parse()
+
+        block_size = self.scanner.block_size
+        image_end = (self.scanner.file_size // block_size) * block_size
+        if not self.partitions:
+            # No partition table: the image may be a bare volume
+            fs_type = self.detect_filesystem(0)
+            kind = "partition" if fs_type else "gap"
+            return [ScanUnit(0, image_end, kind, fs_type, None)] if image_end else []
+
+        units: List[ScanUnit] = []
+        cursor = 0
+        for partition in self.partitions:
+            start = min((partition["start"] // block_size) * block_size, image_end)
+            end = min(-(-(partition["start"] + partition["length"]) // block_size) * block_size, image_end)
+            if start > cursor:
+                units.append(ScanUnit(cursor, start, "gap", None, None))
+            start = max(start, cursor)  # Overlapping entries are not scanned twice
+            if end > start:
+                units.append(ScanUnit(start, end, "partition", partition["fs_type"], partition["index"]))
+            cursor = max(cursor, end)
+        if cursor < image_end:
+            units.append(ScanUnit(cursor, image_end, "gap", None, None))
+        return units
+
+
+def unallocated_ranges(scanner: DiskScanner, table: Optional[PartitionTable] = None) -> List[Tuple[int, int]]:
+    """
+    Returns coalesced (start, end) byte ranges worth carving: the free space
+    of every partition whose file system allocation map can be read, plus
+    all gaps and partitions of unsupported file systems in full.
+    """
+    table = table or PartitionTable(scanner)
+    ranges: List[Tuple[int, int]] = []
+    for unit in table.scan_units():
+        if unit.kind == "partition" and unit.fs_type == "fat32":
+            parser = FAT32Parser(scanner, partition_offset=unit.start)
+            if "error" not in parser.parse() and parser.cluster_size:
+                ranges.extend(clip_extents(parser.free_extents(), unit.start, unit.end))
+                continue
+        elif unit.kind == "partition" and unit.fs_type == "ntfs":
+            ntfs = NTFSParser(scanner, partition_offset=unit.start)
+            if "error" not in ntfs.parse() and ntfs.cluster_size:
+                mft = MFTParser(ntfs)
+                bitmap = mft.allocated_cluster_bitmap()
+                if bitmap is not None:
+                    ranges.extend(clip_extents(mft.free_extents(bitmap), unit.start, unit.end))
+                    continue
+        elif unit.kind == "partition" and unit.fs_type == "ext":
+            ext = EXTParser(scanner, partition_offset=unit.start)
+            if "error" not in ext.parse():
+                ranges.extend(clip_extents(ext.free_extents(), unit.start, unit.end))
+                continue
+        ranges.append((unit.start, unit.end))
+    return coalesce_extents(ranges)
+
+
+def _volume_undeleters(scanner: DiskScanner, table: PartitionTable):
+    """Yields (partition offset, deleted entries, read_data) for every FAT32 and NTFS volume."""
+    for unit in table.scan_units():
+        if unit.kind != "partition":
+            continue
+        if unit.fs_type == "fat32":
+            parser = FAT32Parser(scanner, partition_offset=unit.start)
+            if "error" not in parser.parse() and parser.cluster_size:
+                undeleter = FAT32Undeleter(parser)
+                yield unit.start, undeleter.deleted_entries(), undeleter.read_data
+        elif unit.fs_type == "ntfs":
+            ntfs = NTFSParser(scanner, partition_offset=unit.start)
+            if "error" not in ntfs.parse() and ntfs.cluster_size:
+                mft = MFTParser(ntfs)
+                yield unit.start, mft.deleted_records(), mft.read_data
+
+
+def undelete_volumes(scanner: DiskScanner, table: Optional[PartitionTable] = None) -> List[Dict[str, Any]]:
+    """
+    Collects deleted files from the metadata of every FAT32 (directory
+    entries) and NTFS (MFT records) volume of the image.
+    """
+    entries: List[Dict[str, Any]] = []
+    for _, deleted, _ in _volume_undeleters(scanner, table or PartitionTable(scanner)):
+        entries.extend(deleted)
+    return entries
+
+
+def _free_name(directory: str, name: str, is_dir: bool) -> str:
+    """Path for `name` in directory, with a "~<n>" suffix if a file (or non-directory) holds it."""
+    candidate, n = os.path.join(directory, name), 1
+    while os.path.lexists(candidate) and not (is_dir and os.path.isdir(candidate)):
+        candidate, n = os.path.join(directory, f"{name}~{n}"), n + 1
+    return candidate
+
+
+def recover_volumes(scanner: DiskScanner, output_dir: str,
+                    table: Optional[PartitionTable] = None) -> List[Dict[str, Any]]:
+    """
+    Like undelete_volumes(), and also writes every deleted file that was
+    not overwritten to output_dir/part_<offset>/<path>. The written path
+    is stored in the entry as "recovered_path"; a name already taken (by
+    an earlier file, or a file where a directory is needed) gets a "~<n>"
+    suffix. A file that cannot be written gets a "recovery_error" instead.
+    """
+    entries: List[Dict[str, Any]] = []
+    for start, deleted, read_data in _volume_undeleters(scanner, table or PartitionTable(scanner)):
+        volume_dir = os.path.join(output_dir, f"part_{start}")
+        for entry in deleted:
+            entries.append(entry)
+            if entry["is_dir"] or entry["overwritten"]:
+                continue
+            # Names come from the image: keep them inside the output directory and printable
+            parts = [UNSAFE_NAME_CHARS.sub("_", p) for p in entry["path"].split("/") if p not in ("", ".", "..")]
+            try:
+                directory = volume_dir
+                for part in parts[:-1]:
+                    directory = _free_name(directory, part, is_dir=True)
+                target = _free_name(directory, parts[-1] if parts else "unnamed", is_dir=False)
+                os.makedirs(directory, exist_ok=True)
+                with open(target, "wb") as f:
+                    f.write(read_data(entry))
+            except (OSError, ValueError) as e:
+                entry["recovery_error"] = str(e)
+                continue
+            entry["recovered_path"] = target
+    return entries
@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Up to this many distinct first bytes, candidates come from one equality
+# pass per byte; beyond it a single lookup over every byte pair is cheaper.
+FIRST_BYTE_PASSES = 6
+
+
+class Signature(NamedTuple):
+    """A byte pattern marking the start ("header") or end ("footer") of a file type."""
+    file_type: str
+    kind: str
+    pattern: bytes
+
+
+class SignatureHit(NamedTuple):
+    """A match of signature `pattern_id` starting at absolute image `offset`."""
+    offset: int
+    pattern_id: int
+
+
+# Patterns need a selective two-byte prefix: candidates are filtered on it
+DEFAULT_SIGNATURES: List[Signature] = [
+    Signature("jpeg", "header", b"\xff\xd8\xff\xe0"),
+    Signature("jpeg", "header", b"\xff\xd8\xff\xe1"),
+    Signature("jpeg", "header", b"\xff\xd8\xff\xdb"),
+    Signature("jpeg", "header", b"\xff\xd8\xff\xee"),
+    Signature("jpeg", "footer", b"\xff\xd9"),
+    Signature("png", "header", b"\x89PNG\r\n\x1a\n"),
+    Signature("png", "footer", b"IEND\xaeB`\x82"),
+    Signature("gif", "header", b"GIF87a"),
+    Signature("gif", "header", b"GIF89a"),
+    Signature("bmp", "header", b"BM6"),
+    Signature("tiff", "header", b"II*\x00"),
+    Signature("tiff", "header", b"MM\x00*"),
+    Signature("webp", "header", b"WEBPVP8"),
+    Signature("pdf", "header", b"%PDF-"),
+    Signature("pdf", "footer", b"%%EOF"),
+    Signature("zip", "header", b"PK\x03\x04"),
+    Signature("zip", "footer", b"PK\x05\x06"),
+    Signature("rar", "header", b"Rar!\x1a\x07"),
+    Signature("7z", "header", b"7z\xbc\xaf\x27\x1c"),
+    Signature("gzip", "header", b"\x1f\x8b\x08"),
+    Signature("bzip2", "header", b"BZh91AY&SY"),
+    Signature("xz", "header", b"\xfd7zXZ\x00"),
+    Signature("ole2", "header", b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"),
+    Signature("sqlite", "header", b"SQLite format 3\x00"),
+    Signature("elf", "header", b"\x7fELF"),
+    Signature("mp3", "header", b"ID3\x03"),
+    Signature("mp3", "header", b"ID3\x04"),
+    Signature("ogg", "header", b"OggS\x00"),
+    Signature("flac", "header", b"fLaC\x00\x00\x00\x22"),
+    Signature("wav", "header", b"WAVEfmt "),
+    Signature("avi", "header", b"AVI LIST"),
+    Signature("mp4", "header", b"ftypisom"),
+    Signature("mp4", "header", b"ftypmp42"),
+    Signature("mkv", "header", b"\x1aE\xdf\xa3"),
+]
+
+
+def as_byte_array(data) -> np.ndarray:
+    """Flat uint8 view of bytes, a memoryview or a (n_blocks, block_size) array (no copy if contiguous)."""
+    if isinstance(data, np.ndarray):
+        return np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+class MultiPatternMatcher:
+    """
+    Finds every occurrence of many byte signatures in one pass per chunk.
+
+    Candidate positions come from a vectorized prefilter on the first two
+    bytes (a 256x256 lookup table), so the cost of a pass barely depends on
+    the number of signatures; candidates are then confirmed byte by byte
+    per signature, again vectorized. scan() keeps the last
+    max_length - 1 bytes of the previous chunk, so signatures straddling
+    chunk boundaries are found exactly once.
+    """
+
+    def __init__(self, signatures: Sequence[Signature] = DEFAULT_SIGNATURES):
+        if not signatures:
+            raise ValueError("At least one signature is required")
+        if any(len(s.pattern) < 2 for s in signatures):
+            raise ValueError("Signatures must be at least 2 bytes long")
+        self.signatures = list(signatures)
+        self.max_length = max(len(s.pattern) for s in self.signatures)
+        self._patterns = [np.frombuffer(s.pattern, dtype=np.uint8) for s in self.signatures]
+        self._pair_table = np.zeros((256, 256), dtype=bool)
+        for s in self.signatures:
+            self._pair_table[s.pattern[0], s.pattern[1]] = True
+        self._first_bytes = sorted({s.pattern[0] for s in self.signatures})
+        # The same table indexed by a little-endian uint16 of the byte pair
+        self._pair_lookup = np.ascontiguousarray(self._pair_table.T).reshape(-1)
+        self.carry = b""
+        self.next_offset: Optional[int] = None
+
+    def _candidates(self, data: np.ndarray) -> np.ndarray:
+        """Positions whose first two bytes start some signature."""
+        n = len(data) - 1
+        if n <= 0:
+            return np.empty(0, dtype=np.intp)
+        if len(self._first_bytes) <= FIRST_BYTE_PASSES:
+            mask = data[:n] == self._first_bytes[0]
+            for byte in self._first_bytes[1:]:
+                mask |= data[:n] == byte
+            positions = np.flatnonzero(mask)
+            return positions[self._pair_table[data[positions], data[positions + 1]]]
+        # Even and odd byte pairs as (unaligned) little-endian uint16 views
+        even = data[:n + 1 - (n + 1) % 2].view("<u2")
+        odd = data[1:1 + n // 2 * 2].view("<u2")
+        return np.sort(np.concatenate([np.flatnonzero(self._pair_lookup[even]) * 2,
+                                       np.flatnonzero(self._pair_lookup[odd]) * 2 + 1]))
+
+    def find(self, data) -> List[SignatureHit]:
+        """
+        Every signature lying entirely inside `data`, as hits with offsets
+        relative to its start, sorted by (offset, pattern_id). Stateless.
+        """
+        data = as_byte_array(data)
+        candidates = self._candidates(data)
+        if len(candidates) == 0:
+            return []
+        hits = []
+        for pattern_id, pattern in enumerate(self._patterns):
+            positions = candidates[candidates <= len(data) - len(pattern)]
+            for j, byte in enumerate(pattern):
+                if len(positions) == 0:
+                    break
+                positions = positions[data[positions + j] == byte]
+            hits.extend(SignatureHit(int(p), pattern_id) for p in positions)
+        hits.sort()
+        return hits
+
+    def scan(self, offset: int, chunk) -> List[SignatureHit]:
+        """
+        Hits with absolute offsets for the chunk at `offset`, including
+        signatures that began in the previous chunk when it ended at
+        `offset`. A non-contiguous offset starts afresh.
+        """
+        data = as_byte_array(chunk)
+        if offset != self.next_offset:
+            self.carry = b""
+        hits = []
+        if self.carry:
+            # Only signatures starting in the carry and ending in this chunk
+            boundary = self.carry + data[:self.max_length - 1].tobytes()
+            edge = len(self.carry)
+            hits = [SignatureHit(offset - edge + hit.offset, hit.pattern_id)
+                    for hit in self.find(boundary)
+                    if hit.offset < edge < hit.offset + len(self.signatures[hit.pattern_id].pattern)]
+        hits.extend(SignatureHit(offset + hit.offset, hit.pattern_id) for hit in self.find(data))
+        self._advance(offset + len(data), self.carry + data[-(self.max_length - 1):].tobytes())
+        return hits
+
+    def feed_fill(self, offset: int, length: int, fill: int) -> List[SignatureHit]:
+        """
+        Advances over a run of `length` bytes equal to `fill` without
+        materialising it. Only signatures straddling into the run are
+        reported; a 0x00/0xFF run itself holds none.
+        """
+        if length <= 0:
+            return []
+        head = bytes([fill]) * min(length, self.max_length - 1)
+        hits = self.scan(offset, head)
+        self._advance(offset + length, self.carry)
+        return hits
+
+    def _advance(self, next_offset: int, tail: bytes) -> None:
+        self.carry = tail[-(self.max_length - 1):]
+        self.next_offset = next_offset
+
+    def reset(self) -> None:
+        """Forgets the carried bytes, e.g. before scanning an unrelated range."""
+        self.carry = b""
+        self.next_offset = None
+
+    def get_state(self) -> Dict[str, Any]:
+        """Returns the carry-over state for checkpointing."""
+        return {"carry": self.carry, "next_offset": self.next_offset}
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """Restores a state produced by get_state()."""
+        self.carry = bytes(state["carry"])[-(self.max_length - 1):]
+        self.next_offset = state["next_offset"]
@@ -1,61 +1,142 @@
-from typing import List, Dict
+from typing import Any, List, Dict
+
+from carving.patterns import MultiPatternMatcher, Signature, as_byte_array
+
+# Largest file carved; an open file growing past it (e.g. a header with no
+# footer, or one followed by a long empty run) is abandoned
+MAX_FILE_SIZE = 64 * 1024 * 1024
 
 
 class SignatureCarver:
     """
     Initial scan for known file signatures.
-    Currently scoped to JPEG files (FFD8 header, FFD9 footer).
+    Currently scoped to JPEG files (FFD8 header, FFD9 footer); markers are
+    located with a MultiPatternMatcher over whole chunks.
     """
 
     JPEG_HEADER1 = b"\xff\xd8\xff\xe0"
     JPEG_HEADER2 = b"\xff\xd8\xff\xe1"
     JPEG_FOOTER = b"\xff\xd9"
+    SIGNATURES = [
+        Signature("jpeg", "header", JPEG_HEADER1),
+        Signature("jpeg", "header", JPEG_HEADER2),
+        Signature("jpeg", "footer", JPEG_FOOTER),
+    ]
 
-    def __init__(self, block_size: int = 512):
+    def __init__(self, block_size: int = 512, max_file_size: int = MAX_FILE_SIZE):
         self.block_size = block_size
+        self.max_file_size = max_file_size
         self.in_file = False
         self.current_file_data = bytearray()
         self.start_offset = -1
         self.carved_files = []
+        self.matcher = MultiPatternMatcher(self.SIGNATURES)
+        # End of the last carved file; headers inside it are not reopened
+        self._carved_until = -1
 
     def process_block(self, offset: int, block: bytes):
         """
         Process a single data block to find JPEG headers and footers.
+        Consecutive blocks are matched as one stream, so markers split
+        across a block boundary are found.
         """
-        header_idx1 = block.find(self.JPEG_HEADER1)
-        header_idx2 = block.find(self.JPEG_HEADER2)
+        self.process_chunk(offset, block)
 
-        header_idx = -1
-        if header_idx1 != -1 and header_idx2 != -1:
-            header_idx = min(header_idx1, header_idx2)
-        else:
-            header_idx = max(header_idx1, header_idx2)
+    def process_chunk(self, offset: int, chunk):
+        """
+        Process a contiguous run of blocks starting at `offset`.
+        Accepts bytes or a (n_blocks, block_size) array from
+        DiskScanner.scan_chunks, which is matched without copying. Every
+        header/footer pair is carved, including markers split across the
+        previous chunk and this one.
+        """
+        data = as_byte_array(chunk)
+        pos = offset  # Image offset up to which data is accounted for
 
-        if header_idx != -1 and not self.in_file:
-            self.in_file = True
-            self.start_offset = offset + header_idx
-            self.current_file_data = bytearray(block[header_idx:])
+        for hit in self.matcher.scan(offset, data):
+            signature = self.matcher.signatures[hit.pattern_id]
+            if self.in_file and self._exceeds_limit(hit.offset + len(signature.pattern) - pos):
+                self._abandon_file()
+            if not self.in_file:
+                if signature.kind != "header" or hit.offset < self._carved_until:
+                    continue
+                self.in_file = True
+                self.start_offset = hit.offset
+                # A header that began in the previous chunk: its bytes are the pattern
+                self.current_file_data = bytearray(signature.pattern[:max(0, offset - hit.offset)])
+                pos = max(offset, hit.offset)
+            elif signature.kind == "footer" and hit.offset >= self.start_offset:
+                end_offset = hit.offset + len(signature.pattern)
+                self.current_file_data.extend(data[pos - offset:end_offset - offset])
+                self._close_file(end_offset)
+                pos = end_offset
 
-            # Check if footer is also in the same block
-            self._check_and_close_footer()
-            return
+        if self.in_file and self._exceeds_limit(offset + len(data) - pos):
+            self._abandon_file()
+        if self.in_file:
+            self.current_file_data.extend(data[pos - offset:])
 
+    def process_fill(self, offset: int, length: int, fill: int):
+        """
+        Process a run of `length` bytes that all equal `fill`, as reported
+        by DiskScanner.scan_segments. A 0x00/0xFF run holds no header or
+        footer, so it only matters while a file is open; a run that would
+        grow the file past max_file_size abandons it without allocating.
+        """
+        self.matcher.feed_fill(offset, length, fill)
+        if self.in_file and self._exceeds_limit(length):
+            self._abandon_file()
         if self.in_file:
-            self.current_file_data.extend(block)
-            self._check_and_close_footer()
-
-    def _check_and_close_footer(self):
-        footer_idx = self.current_file_data.find(self.JPEG_FOOTER)
-        if footer_idx != -1:
-            end_idx = footer_idx + 2
-            self.carved_files.append(
-                {
-                    "start_offset": self.start_offset,
-                    "data": bytes(self.current_file_data[:end_idx]),
-                }
-            )
-            self.in_file = False
-            self.current_file_data = bytearray()
+            self.current_file_data.extend(bytes([fill]) * length)
+
+    def _exceeds_limit(self, extra: int) -> bool:
+        """Whether adding `extra` bytes would grow the open file past max_file_size."""
+        return len(self.current_file_data) + extra > self.max_file_size
+
+    def _abandon_file(self):
+        """Drops the open file; later headers, even inside its bytes, start new files."""
+        self.in_file = False
+        self.current_file_data = bytearray()
+
+    def _close_file(self, end_offset: int):
+        self.carved_files.append(
+            {
+                "start_offset": self.start_offset,
+                "data": bytes(self.current_file_data),
+            }
+        )
+        self.in_file = False
+        self.current_file_data = bytearray()
+        self._carved_until = end_offset
 
     def get_carved_files(self) -> List[Dict]:
         return self.carved_files
+
+    def get_state(self) -> Dict[str, Any]:
+        """Returns the carver state, including an open file, for checkpointing."""
+        return {
+            "in_file": self.in_file,
+            "start_offset": self.start_offset,
+            "current_file_data": bytes(self.current_file_data),
+            "carved_files": self.carved_files,
+            "matcher": self.matcher.get_state(),
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """Restores a state produced by get_state()."""
+        self.in_file = state["in_file"]
+        self.start_offset = state["start_offset"]
+        self.current_file_data = bytearray(state["current_file_data"])
+        self.carved_files = list(state["carved_files"])
+        self._carved_until = -1
+        if "matcher" in state:
+            self.matcher.load_state(state["matcher"])
+        elif self.in_file:
+            # States built by hand (or by older journals) carry no match context;
+            # the open file's tail still completes a footer split at the resume point
+            self.matcher.load_state({
+                "carry": bytes(self.current_file_data[-self.matcher.max_length:]),
+                "next_offset": self.start_offset + len(self.current_file_data),
+            })
+        else:
+            self.matcher.reset()
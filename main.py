@@ -1,40 +1,299 @@
 import argparse
-import os
 import sys
 
 from storage_scan.scanner import DiskScanner
+from storage_scan.sources import image_exists, image_size
+from storage_scan.parallel import parallel_scan
+from storage_scan.checkpoint import ScanCheckpoint
+from storage_scan.regions import IncrementalScanner
+from storage_scan.extents import clip_extents, subtract_extents
+from storage_scan.entropy import EntropyMap, FLAG_ZERO_FILL, FLAG_FF_FILL
+from storage_scan.stream import StreamScanner, is_stream_path, open_stream
+from storage_scan.hashing import ImageHashTree
+from storage_scan.throttle import set_background_priority
 from carving.signature import SignatureCarver
+from carving.partition import PartitionTable, unallocated_ranges, recover_volumes
+from carving.fat32 import recovered_extents, deduplicate_carved
 from utils.validation import assign_confidence_score, check_file_integrity
 
 
-def run_pipeline(image_path: str):
-    print(f"[*] Starting full recovery pipeline on: {image_path}")
-    if not os.path.exists(image_path):
+def build_entropy_map(image_path: str):
+    print(f"[*] Building entropy map for: {image_path}")
+    if not image_exists(image_path):
+        print(f"Error: Virtual disk {image_path} not found.")
+        return
+
+    with DiskScanner(image_path, block_size=512) as scanner:
+        entropy_map = EntropyMap.load_or_build(scanner)
+
+    num_blocks = len(entropy_map.entropy)
+    if num_blocks == 0:
+        print("[*] Image is smaller than one block; nothing to map.")
+        return
+    zero_blocks = int((entropy_map.flags & FLAG_ZERO_FILL).astype(bool).sum())
+    ff_blocks = int((entropy_map.flags & FLAG_FF_FILL).astype(bool).sum())
+    print(f"[*] Map saved to {EntropyMap.default_path(image_path)}")
+    print(
+        f"  -> Blocks: {num_blocks} | Mean entropy: {entropy_map.entropy.astype(float).mean():0.2f} | "
+        f"Zero-filled: {zero_blocks} | 0xFF-filled: {ff_blocks}"
+    )
+
+
+def list_partitions(image_path: str):
+    print(f"[*] Reading partition table of: {image_path}")
+    if not image_exists(image_path):
         print(f"Error: Virtual disk {image_path} not found.")
         return
 
+    with DiskScanner(image_path, block_size=512) as scanner:
+        table = PartitionTable(scanner)
+        partitions = table.parse()
+        units = table.scan_units()
+
+    print(f"[*] Scheme: {table.scheme or 'none'} | Partitions: {len(partitions)}")
+    for p in partitions:
+        print(
+            f"  [{p['index']}] Offset: {p['start']} | Size: {p['length']} bytes | "
+            f"Type: {p['type']} | FS: {p['fs_type'] or 'unknown'} | Name: {p['name']}"
+        )
+    print("[*] Scan units:")
+    for unit in units:
+        label = f"partition {unit.partition_index} ({unit.fs_type or 'unknown'})" if unit.kind == "partition" else "gap"
+        print(f"  -> {unit.start}-{unit.end} | {label}")
+
+
+def scan_sequential(image_path: str, journal: ScanCheckpoint, resume: bool = False,
+                    ranges=None, direct_io: bool = False, prefetch_window: int = 0,
+                    hash_image: bool = False, max_read_rate: float = 0.0):
     # 1. Scanner & Extractor
     print("[*] Initializing Raw Sector Scanner...")
-    scanner = DiskScanner(image_path, block_size=512)
+    scanner = DiskScanner(image_path, block_size=512, direct_io=direct_io,
+                          prefetch_window=prefetch_window, max_read_rate=max_read_rate)
+    if direct_io:
+        mode = "O_DIRECT" if getattr(scanner.source, "direct", False) else "buffered (O_DIRECT unavailable)"
+        print(f"[*] Direct I/O reads: {mode}")
 
     # 2. Carver
     print("[*] Initializing Signature Carver for JPEG...")
     carver = SignatureCarver(block_size=512)
 
+    start_offset = 0
+    if resume:
+        state = journal.load()
+        if state:
+            carver.load_state(state["carver"])
+            start_offset = state["offset"]
+            print(f"[*] Resuming from offset {start_offset} using {journal.journal_path}")
+        else:
+            print(f"[!] No usable checkpoint at {journal.journal_path}; starting from the beginning.")
+
+    if hash_image:
+        if start_offset == 0 and ranges is None:
+            # Hashed from the same reads the carver consumes
+            scanner.enable_hashing()
+        else:
+            print("[!] --hash needs a full scan from offset 0; skipping image hashing.")
+
     # Scanning loop
     print("[*] Scanning starting. This may take a while depending on image size...")
-    total_blocks = 0
+    total_blocks = start_offset // 512
+    empty_blocks = 0
+    offset_done = start_offset
+    completed = False
     try:
-        for offset, block in scanner.scan_blocks():
-            carver.process_block(offset, block)
-            total_blocks += 1
-            if total_blocks % 100000 == 0:
+        if ranges is None:
+            segments = scanner.scan_segments(start=start_offset)
+        else:
+            segments = scanner.scan_extents(clip_extents(ranges, start_offset, scanner.file_size))
+        for segment in segments:
+            if segment.fill is not None:
+                # Empty 0x00/0xFF run or sparse hole: no per-block work
+                carver.process_fill(segment.offset, segment.length, segment.fill)
+                empty_blocks += segment.length // 512
+            else:
+                carver.process_chunk(segment.offset, segment.blocks)
+            previous = total_blocks
+            total_blocks += segment.length // 512
+            if total_blocks // 100000 > previous // 100000:
                 print(f"  -> Scanned {total_blocks} blocks...")
+
+            offset_done = segment.offset + segment.length
+            journal.maybe_save(offset_done, carver.get_state, [])
+        completed = True
     except Exception as e:
         print(f"Scanner exception: {e}")
+    finally:
+        if completed:
+            journal.clear()
+            tree = scanner.finish_hashing()
+            if tree is not None:
+                tree.save(ImageHashTree.default_path(image_path))
+                print(f"[*] MD5: {tree.md5}")
+                print(f"[*] SHA-256: {tree.sha256}")
+                print(f"[*] Region hash tree ({len(tree.leaves)} regions, root {tree.root[:16]}...) "
+                      f"saved to {ImageHashTree.default_path(image_path)}")
+        else:
+            journal.save(offset_done, carver.get_state(), [])
+            print(f"[*] Progress saved to {journal.journal_path}; rerun with --resume to continue.")
+
+    print(f"[*] Skipped {empty_blocks} empty (zero/0xFF-filled or sparse) blocks.")
+    scanner.close()
+    return total_blocks, carver.get_carved_files()
+
+
+def verify_image_hashes(image_path: str, ranges=None):
+    # Only regions overlapping the ranges this run reads are re-hashed
+    tree = ImageHashTree.load(ImageHashTree.default_path(image_path))
+    if tree is None:
+        print("[!] No stored hash tree for this image; run a full scan with --hash first.")
+        return
+    with DiskScanner(image_path, block_size=512) as scanner:
+        mismatched = tree.verify_ranges(scanner, ranges)
+    checked = len({i for start, end in (ranges or [(0, tree.size)]) for i in tree.regions(start, end)})
+    if mismatched:
+        print(f"[!] Hash verification FAILED for {len(mismatched)} of {checked} regions:")
+        for start, end in mismatched:
+            print(f"  -> {start}-{end}")
+    else:
+        print(f"[*] Hash verification passed for {checked} regions (image SHA-256 {tree.sha256}).")
+
+
+def scan_stream(image_path: str):
+    # Pipes and stdin cannot seek: one forward pass, carving as data arrives
+    source = "stdin" if image_path == "-" else image_path
+    print(f"[*] Reading image stream from {source}...")
+    carver = SignatureCarver(block_size=512)
+    progress_step = 256 * 1024 * 1024
+    next_report = progress_step
+
+    def report(bytes_read):
+        nonlocal next_report
+        if bytes_read >= next_report:
+            print(f"  -> Read {bytes_read // (1024 * 1024)} MiB from stream...")
+            next_report = (bytes_read // progress_step + 1) * progress_step
+
+    empty_blocks = 0
+    with open_stream(image_path) as stream:
+        scanner = StreamScanner(stream, block_size=512, progress=report)
+        for segment in scanner.scan_segments():
+            if segment.fill is not None:
+                carver.process_fill(segment.offset, segment.length, segment.fill)
+                empty_blocks += segment.length // 512
+            else:
+                carver.process_chunk(segment.offset, segment.blocks)
+        total_bytes = scanner.bytes_read
+        scanner.close()
+
+    print(f"[*] Stream ended after {total_bytes} bytes; skipped {empty_blocks} empty (zero/0xFF-filled) blocks.")
+    return total_bytes // 512, carver.get_carved_files()
+
+
+def run_pipeline(image_path: str, workers: int = 1, resume: bool = False,
+                 checkpoint_path: str = None, checkpoint_interval: float = 30.0,
+                 incremental: bool = False, free_space_only: bool = False,
+                 undelete: bool = False, undelete_dir: str = "undeleted",
+                 direct_io: bool = False,
+                 prefetch_window: int = 0, hash_image: bool = False,
+                 verify_hash: bool = False, max_read_rate: float = 0.0,
+                 background: bool = False):
+    print(f"[*] Starting full recovery pipeline on: {image_path}")
+    streaming = is_stream_path(image_path)
+    if not streaming and not image_exists(image_path):
+        print(f"Error: Virtual disk {image_path} not found.")
+        return
+
+    if streaming and (workers > 1 or resume or incremental or free_space_only or undelete):
+        print("[!] Streaming input is scanned in a single forward pass; ignoring "
+              "--workers, --resume, --incremental, --free-space-only and --undelete.")
+        workers, resume, incremental, free_space_only, undelete = 1, False, False, False, False
+
+    if incremental and (free_space_only or undelete):
+        # The region index caches whole-image results; it cannot honour restricted ranges
+        print("Error: --incremental rescans the whole image and cannot be combined "
+              "with --free-space-only or --undelete.")
+        return
+
+    if workers > 1 and resume:
+        print("[!] --resume is only supported for sequential scans; ignoring --workers.")
+        workers = 1
+
+    if hash_image and (workers > 1 or incremental or streaming):
+        print("[!] --hash is computed by the sequential file scan only; skipping image hashing.")
+
+    if background:
+        # Inherited by worker processes started below
+        niceness = set_background_priority()
+        print(f"[*] Background mode: running at niceness {niceness}.")
+    if max_read_rate and streaming:
+        print("[!] --max-read-rate applies to file scans only; reading unthrottled.")
+    elif max_read_rate:
+        print(f"[*] Throttling image reads to {max_read_rate:g} MB/s (lower while the disk is busy).")
+
+    ranges = None
+    if free_space_only:
+        # Deleted data can only live in unallocated clusters
+        with DiskScanner(image_path, block_size=512) as scanner:
+            ranges = unallocated_ranges(scanner)
+            image_bytes = scanner.file_size
+        free_bytes = sum(end - start for start, end in ranges)
+        print(f"[*] Restricting scan to unallocated space: {free_bytes}/{image_bytes} bytes.")
+
+    undeleted = []
+    if undelete:
+        # File system metadata gives name, size and location of deleted files without carving
+        with DiskScanner(image_path, block_size=512) as scanner:
+            undeleted = recover_volumes(scanner, undelete_dir)
+            image_bytes = scanner.file_size
+        undeleted = [e for e in undeleted if not e["is_dir"]]
+        recovered_count = sum(1 for e in undeleted if "recovered_path" in e)
+        print(f"[*] Found {len(undeleted)} deleted FAT32/NTFS files; "
+              f"recovered {recovered_count} to {undelete_dir}.")
+        for entry in undeleted:
+            status = "OVERWRITTEN" if entry["overwritten"] else "RECOVERED"
+            offset = entry["extents"][0][0] if entry["extents"] else "-"
+            saved = f" | Saved: {entry['recovered_path']}" if "recovered_path" in entry else ""
+            if "recovery_error" in entry:
+                status, saved = "NOT WRITTEN", f" | Error: {entry['recovery_error']}"
+            print(f"  -> {entry['path']} | Offset: {offset} | Size: {entry['size']} bytes | Status: {status}{saved}")
+        # Ranges of the files written above are not carved again
+        covered = recovered_extents([e for e in undeleted if "recovered_path" in e])
+        if covered:
+            ranges = subtract_extents(ranges if ranges is not None else [(0, image_bytes)], covered)
+
+    if verify_hash and not streaming:
+        verify_image_hashes(image_path, ranges)
+
+    if streaming:
+        total_blocks, carved_files = scan_stream(image_path)
+    elif incremental:
+        # Rescan only regions whose hash changed since the last indexed scan
+        print("[*] Hashing regions for incremental rescan...")
+        with DiskScanner(image_path, block_size=512, max_read_rate=max_read_rate) as scanner:
+            results = IncrementalScanner(scanner).scan()
+            total_blocks = scanner.file_size // 512
+        print(
+            f"[*] Re-carved {results['dirty_regions']} changed regions, "
+            f"reused {results['reused_regions']} cached regions."
+        )
+        carved_files = results["carved_files"]
+    elif workers > 1:
+        # Sharded scan: each worker process owns its own scanner and carver
+        print(f"[*] Scanning with {workers} worker processes...")
+        results = parallel_scan(image_path, workers=workers, block_size=512, ranges=ranges,
+                                direct_io=direct_io, prefetch_window=prefetch_window,
+                                max_read_rate=max_read_rate)
+        total_blocks = image_size(image_path) // 512
+        carved_files = results["carved_files"]
+    else:
+        journal = ScanCheckpoint(image_path, checkpoint_path, block_size=512,
+                                 interval=checkpoint_interval)
+        total_blocks, carved_files = scan_sequential(image_path, journal, resume=resume, ranges=ranges,
+                                                     direct_io=direct_io, prefetch_window=prefetch_window,
+                                                     hash_image=hash_image, max_read_rate=max_read_rate)
 
     print(f"[*] Scanning complete. Total blocks read: {total_blocks}")
-    carved_files = carver.get_carved_files()
+    if undeleted:
+        carved_files = deduplicate_carved(carved_files, [e for e in undeleted if "recovered_path" in e])
     print(f"\n[*] Found {len(carved_files)} carved JPEG stream fragments.")
 
     valid_count = 0
@@ -64,11 +323,117 @@ def main():
     parser = argparse.ArgumentParser(
         description="AI-Based Deleted Image Recovery and Reconstruction System"
     )
-    parser.add_argument("--image", type=str, help="Path to raw disk image (.img, .dd)")
+    parser.add_argument("--image", type=str, help="Path to disk image (.img/.dd raw, .001 split set, .szi, qcow2, VHD, .raid.json descriptor or http(s) URL; '-' or a FIFO to stream)")
+    parser.add_argument(
+        "--entropy-map",
+        action="store_true",
+        help="Build (or reuse) the per-block entropy map stored next to the image and exit",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for a sharded parallel scan (default: 1)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted scan from its checkpoint journal",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Checkpoint journal path (default: <image>.checkpoint.json)",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between checkpoint writes (default: 30)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse cached results for unchanged regions (index stored as <image>.regions.json)",
+    )
+    parser.add_argument(
+        "--list-partitions",
+        action="store_true",
+        help="Print the MBR/GPT partition table and scan units of the image and exit",
+    )
+    parser.add_argument(
+        "--free-space-only",
+        action="store_true",
+        help="Carve only unallocated space of file systems whose allocation map can be read",
+    )
+    parser.add_argument(
+        "--undelete",
+        action="store_true",
+        help="Recover deleted files from FAT32 directory entries and NTFS MFT records before carving",
+    )
+    parser.add_argument(
+        "--undelete-dir",
+        type=str,
+        default="undeleted",
+        help="Directory that files recovered by --undelete are written to (default: undeleted)",
+    )
+    parser.add_argument(
+        "--direct-io",
+        action="store_true",
+        help="Read raw images with O_DIRECT and double-buffered read-ahead, bypassing the page cache",
+    )
+    parser.add_argument(
+        "--prefetch-window",
+        type=int,
+        default=0,
+        help="Chunks to read ahead on a background thread while scanning (default: 0, kernel readahead only)",
+    )
+    parser.add_argument(
+        "--hash",
+        action="store_true",
+        help="Compute MD5/SHA-256 and a region hash tree during a full sequential scan (saved as <image>.hashes.json)",
+    )
+    parser.add_argument(
+        "--verify-hash",
+        action="store_true",
+        help="Re-verify the regions this run reads against the stored hash tree before carving",
+    )
+    parser.add_argument(
+        "--max-read-rate",
+        type=float,
+        default=0.0,
+        help="Cap image reads at this many MB/s, backing off further while the disk is busy (default: 0, unlimited)",
+    )
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="Run at reduced CPU priority (nice) so the scan yields to other work on the machine",
+    )
     args = parser.parse_args()
 
-    if args.image:
-        run_pipeline(args.image)
+    if args.image and args.list_partitions:
+        list_partitions(args.image)
+    elif args.image and args.entropy_map:
+        build_entropy_map(args.image)
+    elif args.image:
+        run_pipeline(
+            args.image,
+            workers=args.workers,
+            resume=args.resume,
+            checkpoint_path=args.checkpoint,
+            checkpoint_interval=args.checkpoint_interval,
+            incremental=args.incremental,
+            free_space_only=args.free_space_only,
+            undelete=args.undelete,
+            undelete_dir=args.undelete_dir,
+            direct_io=args.direct_io,
+            prefetch_window=args.prefetch_window,
+            hash_image=args.hash,
+            verify_hash=args.verify_hash,
+            max_read_rate=args.max_read_rate,
+            background=args.background,
+        )
     else:
         print("Backend scaffold complete and ready.")
         print("Run `python main.py --image <path_to_img_file>` to scan an image.")
@@ -13,14 +13,18 @@ class FragmentGrouper:
 
     def __init__(self, classifier: Optional[torch.nn.Module] = None, 
                  search_radius: int = 1048576, 
-                 block_size: int = 512):
+                 block_size: int = 512,
+                 scanner=None):
         """
         Args:
             classifier: Optional FragmentClassifier model for sequence scoring.
             search_radius: Max distance (bytes) to search for the next fragment.
             block_size: Standard disk block size (default 512).
+            scanner: Optional DiskScanner; fragments without 'data' are read
+                from the image through its block cache.
         """
         self.classifier = classifier
+        self.scanner = scanner
         self.search_radius = search_radius
         self.block_size = block_size
         self.device = "cpu"
@@ -62,6 +66,7 @@ class FragmentGrouper:
         """
         if not fragments:
             return []
+        fragments = self._load_missing_data(fragments)
 
         # Sort fragments by disk offset
         sorted_frags = sorted(fragments, key=lambda x: x['offset'])
@@ -113,8 +118,8 @@ class FragmentGrouper:
                     if is_sequential and (type_match or frag_type == 'other'):
                         should_attach = True
                     
-                    # Guard: Never attach all-zero blocks to a stream (wasteful and often wrong)
-                    if ident.get('source') == 'zero_block':
+                    # Guard: Never attach all-zero blocks or empty fill runs to a stream (wasteful and often wrong)
+                    if ident.get('source') in ('zero_block', 'fill_run'):
                         should_attach = False
                     # Priority 2: Matches type within search radius
                     elif type_match:
@@ -151,6 +156,15 @@ class FragmentGrouper:
             
         return results
 
+    def _load_missing_data(self, fragments: List[Dict]) -> List[Dict]:
+        """Fills in 'data' of fragments that only carry an offset, in one batched read."""
+        missing = [f for f in fragments if f.get('data') is None]
+        if not missing or self.scanner is None:
+            return fragments
+        blocks = self.scanner.read_many([f['offset'] for f in missing], self.block_size)
+        loaded = {id(f): dict(f, data=data) for f, data in zip(missing, blocks)}
+        return [loaded.get(id(f), f) for f in fragments]
+
     def _is_footer(self, fragment: Dict, file_type: str) -> bool:
         """Checks if a fragment contains a known file footer."""
         ident = fragment.get('identification', {})
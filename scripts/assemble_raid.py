@@ -0,0 +1,50 @@
+import argparse
+import os
+
+from storage_scan.raid import RaidSource, guess_raid_geometry, SUFFIX, RAID5_LAYOUTS, DEFAULT_STRIPE_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Describe a RAID-0/RAID-5 set of member images for scanning")
+    parser.add_argument("members", nargs="+", help="Member images in slot order ('missing' for an absent RAID-5 member)")
+    parser.add_argument("--out", type=str, required=True, help=f"Descriptor path (must end with {SUFFIX})")
+    parser.add_argument("--level", type=int, choices=[0, 5], default=None, help="RAID level (default: guessed)")
+    parser.add_argument("--stripe-size", type=int, default=None, help="Stripe (chunk) size in bytes (default: guessed)")
+    parser.add_argument("--layout", type=str, choices=RAID5_LAYOUTS, default=None, help="RAID-5 parity layout")
+    parser.add_argument("--guess", action="store_true", help="Guess level, stripe size and member order from samples")
+    args = parser.parse_args()
+
+    if not args.out.endswith(SUFFIX):
+        print(f"Error: descriptor path must end with {SUFFIX}")
+        return
+    members = [None if m == "missing" else m for m in args.members]
+    level, stripe_size, layout = args.level, args.stripe_size, args.layout
+
+    if args.guess:
+        present = [m for m in members if m]
+        if len(present) != len(members):
+            print("Error: --guess needs every member image.")
+            return
+        guess = guess_raid_geometry(present)
+        print(
+            f"[*] Guess: RAID-{guess['level']} | Stripe: {guess['stripe_size']} | Order: {guess['order']} | "
+            f"Layout: {guess['layout']} | Confidence: {guess['confidence']:0.2f}"
+        )
+        if guess["order_search"] != "exhaustive":
+            print("[!] Member order found by a greedy search over many members; verify it before relying on it.")
+        members = [members[i] for i in guess["order"]]
+        level = guess["level"] if level is None else level
+        stripe_size = stripe_size or guess["stripe_size"]
+        layout = layout or guess["layout"]
+
+    base = os.path.dirname(os.path.abspath(args.out))
+    relative = [os.path.relpath(os.path.abspath(m), base) if m else None for m in members]
+    RaidSource.write_descriptor(args.out, relative, level=level or 0,
+                                stripe_size=stripe_size or DEFAULT_STRIPE_SIZE, layout=layout or "left-symmetric")
+    with RaidSource.from_descriptor(args.out) as source:
+        print(f"[*] Wrote {args.out} | Logical size: {source.size} bytes")
+    print(f"[*] Scan it with: python main.py --image {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import argparse
+import os
+from storage_scan.compressed import write_compressed_image, DEFAULT_FRAME_SIZE, SUFFIX
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a raw (or .gz) disk image into a seekable compressed image")
+    parser.add_argument("--image", type=str, required=True, help="Raw image to convert (.dd, .img or .gz)")
+    parser.add_argument("--out", type=str, default=None, help=f"Output path (default: <image>{SUFFIX})")
+    parser.add_argument("--frame-size", type=int, default=DEFAULT_FRAME_SIZE, help="Uncompressed bytes per frame")
+    parser.add_argument("--level", type=int, default=6, help="zlib compression level (1-9)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.image):
+        print(f"Error: image {args.image} not found.")
+        return
+
+    out_path = args.out or (args.image[:-3] if args.image.endswith(".gz") else args.image) + SUFFIX
+    print(f"[*] Compressing {args.image} -> {out_path} ({args.frame_size} byte frames)")
+    size = write_compressed_image(args.image, out_path, frame_size=args.frame_size, level=args.level)
+    ratio = os.path.getsize(out_path) / size if size else 0.0
+    print(f"[*] Done. Image size: {size} bytes | Compressed: {os.path.getsize(out_path)} bytes ({ratio:0.1%})")
+
+
+if __name__ == "__main__":
+    main()
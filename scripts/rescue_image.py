@@ -0,0 +1,36 @@
+import argparse
+
+from storage_scan.rescue import RescueImager, DEFAULT_READ_SIZE, DEFAULT_SECTOR_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image a failing drive ddrescue-style, with a resumable rescue map")
+    parser.add_argument("source", help="Device or image to read (e.g. /dev/sdb)")
+    parser.add_argument("dest", help="Image file to write")
+    parser.add_argument("--map", type=str, default=None, help="Mapfile path (default: <dest>.rescue.map, the path DiskScanner reads)")
+    parser.add_argument("--read-size", type=int, default=DEFAULT_READ_SIZE,
+                        help=f"Read size of the first pass in bytes (default: {DEFAULT_READ_SIZE})")
+    parser.add_argument("--sector-size", type=int, default=DEFAULT_SECTOR_SIZE,
+                        help=f"Smallest read unit in bytes (default: {DEFAULT_SECTOR_SIZE})")
+    parser.add_argument("--retries", type=int, default=1, help="Extra attempts per bad sector (default: 1)")
+    args = parser.parse_args()
+
+    with RescueImager(args.source, args.dest, map_path=args.map, sector_size=args.sector_size,
+                      read_size=args.read_size, retries=args.retries) as imager:
+        print(f"[*] Rescuing {args.source} ({imager.map.size} bytes) to {args.dest}")
+        print(f"[*] Map: {imager.map_path}")
+        try:
+            result = imager.run()
+        except KeyboardInterrupt:
+            print("[!] Interrupted; rerun the same command to resume from the map.")
+            return
+
+    print(
+        f"[*] Rescued: {result['rescued']} bytes | Bad: {result['bad']} bytes | "
+        f"Pending: {result['pending']} bytes | Read errors: {result['read_errors']}"
+    )
+    print(f"[*] Scan it with: python main.py --image {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
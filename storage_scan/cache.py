@@ -0,0 +1,132 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache holding up to `capacity` entries.
+    Hit and miss counts are kept for tuning.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value (marking it recently used) or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Stores a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class BlockCache:
+    """
+    Bounded cache of image data for random-access work after a scan
+    (grouping neighbours, hex viewer, repair context). Data is cached in
+    chunks of `chunk_blocks` blocks so nearby lookups share one read;
+    read_many() coalesces the chunks missing for a batch of offsets into
+    as few source reads as possible. Memory use is capped at
+    capacity * chunk_blocks * block_size bytes.
+    """
+
+    def __init__(self, source, block_size: int = 512, capacity: int = 1024,
+                 chunk_blocks: int = 8):
+        self.source = source
+        self.block_size = block_size
+        self.chunk_size = block_size * max(1, chunk_blocks)
+        self._chunks = LRUCache(capacity)
+
+    @property
+    def hits(self) -> int:
+        return self._chunks.hits
+
+    @property
+    def misses(self) -> int:
+        return self._chunks.misses
+
+    def stats(self) -> Dict[str, int]:
+        """Returns { "hits", "misses", "cached_bytes" }."""
+        return {"hits": self.hits, "misses": self.misses,
+                "cached_bytes": len(self._chunks) * self.chunk_size}
+
+    def _load(self, chunk_indices: Iterable[int]) -> Dict[int, bytes]:
+        """Returns the given chunks, reading contiguous missing runs at once."""
+        chunks: Dict[int, bytes] = {}
+        missing: List[int] = []
+        for index in sorted(set(chunk_indices)):
+            data = self._chunks.get(index)
+            if data is None:
+                missing.append(index)
+            else:
+                chunks[index] = data
+        runs: List[List[int]] = []
+        for index in missing:
+            if runs and index == runs[-1][-1] + 1:
+                runs[-1].append(index)
+            else:
+                runs.append([index])
+        for run in runs:
+            data = self.source.read(run[0] * self.chunk_size, len(run) * self.chunk_size)
+            for i, index in enumerate(run):
+                chunk = data[i * self.chunk_size:(i + 1) * self.chunk_size]
+                self._chunks.put(index, chunk)
+                chunks[index] = chunk
+        return chunks
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """Reads `length` bytes at `offset` (truncated at the end of the image)."""
+        return self.read_many([offset], length)[0]
+
+    def read_many(self, offsets: Sequence[int], length: Optional[int] = None) -> List[bytes]:
+        """
+        Reads `length` bytes (default: one block) at each offset in one
+        batch. Results are in the order of `offsets`; negative offsets read
+        as empty.
+        """
+        length = self.block_size if length is None else length
+        if length <= 0:
+            return [b"" for _ in offsets]
+        needed = [i for offset in offsets if offset >= 0
+                  for i in range(offset // self.chunk_size, (offset + length - 1) // self.chunk_size + 1)]
+        chunks = self._load(needed)
+        results = []
+        for offset in offsets:
+            if offset < 0:
+                results.append(b"")
+                continue
+            first, last = offset // self.chunk_size, (offset + length - 1) // self.chunk_size
+            data = b"".join(chunks[i] for i in range(first, last + 1))
+            start = offset - first * self.chunk_size
+            results.append(data[start:start + length])
+        return results
+
+    def clear(self) -> None:
+        self._chunks.clear()
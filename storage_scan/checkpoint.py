@@ -0,0 +1,174 @@
+import base64
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from storage_scan.sources import image_size, sidecar_path
+
+
+def _encode(obj: Any) -> Any:
+    """Recursively converts bytes into JSON-safe {"__bytes__": base64} objects."""
+    if isinstance(obj, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(bytes(obj)).decode("ascii")}
+    if isinstance(obj, dict):
+        return {key: _encode(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_encode(value) for value in obj]
+    return obj
+
+
+def _decode_hook(obj: Dict) -> Any:
+    """json object_hook reversing _encode."""
+    if len(obj) == 1 and "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+class ScanCheckpoint:
+    """
+    Durable journal of a long-running scan.
+    Records the last fully processed offset, the carver state and the
+    results gathered so far, so an interrupted scan can continue without
+    re-reading or re-classifying anything before that offset.
+
+    Carved files and results only grow during a scan, so they are appended
+    to a JSON-lines log next to the journal instead of being rewritten on
+    every save; the journal itself stays small and records how much of the
+    log is valid. Writes are atomic (temp file + fsync + rename).
+    """
+
+    SUFFIX = ".checkpoint.json"
+    LOG_SUFFIX = ".log"
+
+    def __init__(self, image_path: str, journal_path: Optional[str] = None,
+                 block_size: int = 512, interval: float = 30.0):
+        """
+        Args:
+            image_path: Image the journal belongs to.
+            journal_path: Where to keep the journal (default: next to the image).
+            block_size: Block size of the scan; a journal for another size is ignored.
+            interval: Minimum seconds between writes made through maybe_save().
+        """
+        self.image_path = image_path
+        self.journal_path = journal_path or self.default_path(image_path)
+        self.log_path = self.journal_path + self.LOG_SUFFIX
+        self.block_size = block_size
+        self.interval = interval
+        self._last_save = time.monotonic()
+        # Valid log bytes and entries per list; a journal not loaded starts a fresh log
+        self._log_size = 0
+        self._logged = {"carved": 0, "results": 0}
+
+    @classmethod
+    def default_path(cls, image_path: str) -> str:
+        """Returns the default journal path for an image."""
+        return sidecar_path(image_path, cls.SUFFIX)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the journal state, or None if there is no usable journal
+        for this image (missing, corrupt, or written for a different
+        image size or block size).
+        """
+        if not os.path.exists(self.journal_path):
+            return None
+        try:
+            with open(self.journal_path, "r") as f:
+                state = json.load(f, object_hook=_decode_hook)
+            lists = self._read_log(state["log_size"])
+        except (json.JSONDecodeError, IOError, ValueError, KeyError):
+            return None
+
+        if (state.get("image_size") != image_size(self.image_path)
+                or state.get("block_size") != self.block_size):
+            return None
+        counts = state.pop("logged")
+        if any(len(lists[name]) != count for name, count in counts.items()):
+            return None
+        if state.pop("carver_logged"):
+            state["carver"]["carved_files"] = lists["carved"]
+        state["results"] = lists["results"]
+        # Later saves continue the log after its valid part
+        self._log_size = state.pop("log_size")
+        self._logged = counts
+        return state
+
+    def _read_log(self, size: int) -> Dict[str, List]:
+        """Entries of the first `size` log bytes (anything after them is an unfinished save)."""
+        lists: Dict[str, List] = {"carved": [], "results": []}
+        if size == 0:
+            return lists
+        with open(self.log_path, "rb") as f:
+            data = f.read(size)
+        if len(data) != size:
+            raise ValueError("Checkpoint log is shorter than recorded")
+        for line in data.splitlines():
+            entry = json.loads(line, object_hook=_decode_hook)
+            lists[entry["list"]].append(entry["item"])
+        return lists
+
+    def _append_log(self, lists: Dict[str, List]) -> None:
+        """Appends list entries not logged yet; a list that shrank restarts the log."""
+        if any(len(items) < self._logged[name] for name, items in lists.items()):
+            self._log_size = 0
+            self._logged = {name: 0 for name in self._logged}
+        mode = "r+b" if self._log_size and os.path.exists(self.log_path) else "wb"
+        with open(self.log_path, mode) as f:
+            f.seek(self._log_size)
+            f.truncate()
+            for name, items in lists.items():
+                for item in items[self._logged[name]:]:
+                    f.write(json.dumps({"list": name, "item": _encode(item)}).encode("ascii") + b"\n")
+                self._logged[name] = len(items)
+            f.flush()
+            os.fsync(f.fileno())
+            self._log_size = f.tell()
+
+    def save(self, offset: int, carver_state: Dict[str, Any], results: List[Dict]) -> None:
+        """Appends new carved files and results to the log, then atomically writes the journal."""
+        journal_dir = os.path.dirname(self.journal_path)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+
+        carver_state = dict(carver_state)
+        carved_files = carver_state.pop("carved_files", None)
+        self._append_log({"carved": carved_files or [], "results": results})
+        state = {
+            "image_path": self.image_path,
+            "image_size": image_size(self.image_path),
+            "block_size": self.block_size,
+            "offset": offset,
+            "carver": carver_state,
+            "carver_logged": carved_files is not None,
+            "log_size": self._log_size,
+            "logged": dict(self._logged),
+        }
+
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(_encode(state), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        self._last_save = time.monotonic()
+
+    def maybe_save(self, offset: int, carver_state: Union[Dict[str, Any], Callable[[], Dict[str, Any]]],
+                   results: List[Dict]) -> bool:
+        """
+        Saves only if `interval` seconds have passed since the last save.
+        carver_state may be a callable (e.g. carver.get_state), so the state
+        of an open file is only copied when a save actually happens.
+        """
+        if time.monotonic() - self._last_save < self.interval:
+            return False
+        self.save(offset, carver_state() if callable(carver_state) else carver_state, results)
+        return True
+
+    def clear(self) -> None:
+        """Removes the journal and its log once a scan has completed."""
+        for path in (self.journal_path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._log_size = 0
+        self._logged = {name: 0 for name in self._logged}
@@ -0,0 +1,192 @@
+import gzip
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Optional, Tuple
+
+import numpy as np
+
+from storage_scan.cache import LRUCache
+from storage_scan.sources import ImageSource
+
+# Seekable compressed image (.szi) layout:
+#   header  MAGIC | u32 frame_size
+#   frames  independently zlib-compressed frame_size pieces of the image
+#   index   per frame: u64 file offset, u32 compressed length (0 = all-zero frame)
+#   footer  u64 index offset | u64 image size | u32 frame count | MAGIC
+MAGIC = b"SZIMG\x00\x01\x00"
+HEADER = struct.Struct("<8sI")
+INDEX_ENTRY = struct.Struct("<QI")
+FOOTER = struct.Struct("<QQI8s")
+
+DEFAULT_FRAME_SIZE = 1024 * 1024
+# Decoded frames kept in memory per open image
+DEFAULT_CACHED_FRAMES = 64
+SUFFIX = ".szi"
+
+
+def is_compressed_image(path: str) -> bool:
+    """Whether path starts with the seekable compressed image magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _read_footer(f: BinaryIO) -> Tuple[int, int, int]:
+    """Returns (index_offset, image_size, frame_count) of an open container."""
+    f.seek(-FOOTER.size, os.SEEK_END)
+    index_offset, size, count, magic = FOOTER.unpack(f.read(FOOTER.size))
+    if magic != MAGIC:
+        raise ValueError("Truncated or corrupt compressed image (bad footer)")
+    return index_offset, size, count
+
+
+def compressed_image_size(path: str) -> int:
+    """Uncompressed size of a seekable compressed image."""
+    with open(path, "rb") as f:
+        return _read_footer(f)[1]
+
+
+def _read_full(f: BinaryIO, size: int) -> bytes:
+    """Reads `size` bytes, or fewer only at EOF (raw and pipe objects may return short reads)."""
+    parts = []
+    remaining = size
+    while remaining > 0:
+        piece = f.read(remaining)
+        if not piece:
+            break
+        parts.append(piece)
+        remaining -= len(piece)
+    return b"".join(parts)
+
+
+def write_compressed_image(src, dst_path: str, frame_size: int = DEFAULT_FRAME_SIZE,
+                           level: int = 6) -> int:
+    """
+    Converts a raw image into the seekable compressed format, streaming
+    frame by frame so neither image is ever held in memory or on disk
+    uncompressed. `src` is a path (".gz" inputs are decompressed on the
+    fly) or a binary file object. Returns the uncompressed size.
+    """
+    if isinstance(src, str):
+        opener = gzip.open if src.endswith(".gz") else open
+        with opener(src, "rb") as f:
+            return write_compressed_image(f, dst_path, frame_size, level)
+
+    index: List[Tuple[int, int]] = []
+    size = 0
+    tmp_path = dst_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, frame_size))
+        while True:
+            # Frames are fixed size: a short read would shift all later ones
+            frame = _read_full(src, frame_size)
+            if not frame:
+                break
+            size += len(frame)
+            if frame.count(0) == len(frame):
+                index.append((out.tell(), 0))
+                continue
+            packed = zlib.compress(frame, level)
+            index.append((out.tell(), len(packed)))
+            out.write(packed)
+        index_offset = out.tell()
+        for entry in index:
+            out.write(INDEX_ENTRY.pack(*entry))
+        out.write(FOOTER.pack(index_offset, size, len(index), MAGIC))
+    os.replace(tmp_path, dst_path)
+    return size
+
+
+class CompressedImageSource(ImageSource):
+    """
+    Random-access reader for seekable compressed images. Frames needed by a
+    read are decompressed in parallel (zlib releases the GIL) and decoded
+    frames are kept in an LRU cache, so sequential chunked scans and
+    repeated random reads touch each frame once.
+    """
+
+    def __init__(self, path: str, cached_frames: int = DEFAULT_CACHED_FRAMES,
+                 workers: Optional[int] = None):
+        self.path = path
+        self._file_obj = open(path, "rb")
+        magic, self.frame_size = HEADER.unpack(self._file_obj.read(HEADER.size))
+        if magic != MAGIC:
+            self._file_obj.close()
+            raise ValueError(f"Not a seekable compressed image: {path}")
+        index_offset, self.size, count = _read_footer(self._file_obj)
+        self._file_obj.seek(index_offset)
+        raw = self._file_obj.read(count * INDEX_ENTRY.size)
+        index = np.frombuffer(raw, dtype=np.dtype([("offset", "<u8"), ("length", "<u4")]), count=count)
+        self._offsets = index["offset"].astype(np.int64)
+        self._lengths = index["length"].astype(np.int64)
+        self.cache = LRUCache(cached_frames)
+        self._executor = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1))
+
+    def _frame_length(self, frame: int) -> int:
+        return min(self.frame_size, self.size - frame * self.frame_size)
+
+    def _decode(self, frame: int) -> bytes:
+        """Decompresses one frame (reading with pread, safe across threads)."""
+        length = int(self._lengths[frame])
+        if length == 0:
+            return bytes(self._frame_length(frame))
+        packed = os.pread(self._file_obj.fileno(), length, int(self._offsets[frame]))
+        return zlib.decompress(packed)
+
+    def frames(self, first: int, last: int) -> List[bytes]:
+        """Decoded frames first..last (inclusive), decompressing misses in parallel."""
+        decoded = {i: self.cache.get(i) for i in range(first, last + 1)}
+        missing = [i for i, data in decoded.items() if data is None]
+        for i, data in zip(missing, self._executor.map(self._decode, missing)):
+            self.cache.put(i, data)
+            decoded[i] = data
+        return [decoded[i] for i in range(first, last + 1)]
+
+    def view(self, offset: int, length: int) -> np.ndarray:
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return np.empty(0, dtype=np.uint8)
+        first, last = offset // self.frame_size, (end - 1) // self.frame_size
+        frames = self.frames(first, last)
+        start = offset - first * self.frame_size
+        if first == last:
+            # Zero-copy slice of the cached frame
+            return np.frombuffer(frames[0], dtype=np.uint8, count=end - offset, offset=start)
+        data = np.frombuffer(b"".join(frames), dtype=np.uint8)
+        return data[start:start + end - offset]
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset >= self.size or length <= 0:
+            return b""
+        return self.view(offset, length).tobytes()
+
+    def prefetch(self, offset: int, length: int) -> None:
+        """Decodes the frames of a range into the cache ahead of the scan."""
+        end = min(offset + length, self.size)
+        if offset < end:
+            self.frames(offset // self.frame_size, (end - 1) // self.frame_size)
+
+    def data_extents(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Skips frames that were stored as all-zero."""
+        end = min(end, self.size)
+        extents: List[Tuple[int, int]] = []
+        if start >= end:
+            return extents
+        first, last = start // self.frame_size, (end - 1) // self.frame_size
+        for frame in np.flatnonzero(self._lengths[first:last + 1]) + first:
+            s = max(start, int(frame) * self.frame_size)
+            e = min(end, (int(frame) + 1) * self.frame_size)
+            if extents and s <= extents[-1][1]:
+                extents[-1] = (extents[-1][0], e)
+            else:
+                extents.append((s, e))
+        return extents
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.cache.clear()
+        self._file_obj.close()
@@ -0,0 +1,156 @@
+import mmap
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from storage_scan.sources import ImageSource, seek_data_extents
+
+# O_DIRECT needs file offsets, lengths and buffer addresses aligned to the
+# device's logical block size; 4 KiB covers 512e and 4Kn devices.
+ALIGNMENT = 4096
+# current view, previous view (still referenced by the caller), prefetch
+NUM_BUFFERS = 3
+
+
+class _Prefetch(NamedTuple):
+    start: int
+    end: int
+    buffer: int
+    future: Future
+
+
+def _align_down(value: int) -> int:
+    return value // ALIGNMENT * ALIGNMENT
+
+
+def _align_up(value: int) -> int:
+    return -(-value // ALIGNMENT) * ALIGNMENT
+
+
+class DirectFileSource(ImageSource):
+    """
+    Raw image reader that bypasses the page cache with O_DIRECT.
+
+    Reads land in page-aligned anonymous buffers. While the caller works on
+    one chunk, a helper thread already reads the following range of the
+    same size into the next buffer, so a sequential scan streams at device
+    speed. Views returned by view() share those buffers and stay valid
+    until the chunk after the next one is requested, which matches how
+    DiskScanner.scan_chunks/scan_segments consume them.
+
+    Where O_DIRECT is unavailable (other OSes, tmpfs, some network file
+    systems) plain reads are used and the consumed range is dropped from
+    the page cache with posix_fadvise(DONTNEED).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.direct = False
+        self._fd = -1
+        if hasattr(os, "O_DIRECT"):
+            try:
+                self._fd = os.open(path, os.O_RDONLY | os.O_DIRECT)
+                self.direct = True
+            except OSError:
+                self._fd = -1
+        if self._fd < 0:
+            self._fd = os.open(path, os.O_RDONLY)
+        self._buffers: List[Optional[mmap.mmap]] = [None] * NUM_BUFFERS
+        self._current = -1
+        self._prefetch: Optional[_Prefetch] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def _buffer(self, index: int, length: int) -> mmap.mmap:
+        """Returns buffer `index`, replacing it with a larger one if needed."""
+        buffer = self._buffers[index]
+        if buffer is None or len(buffer) < length:
+            # Anonymous maps are page aligned, as O_DIRECT requires. A
+            # replaced buffer is freed once views into it are gone.
+            buffer = mmap.mmap(-1, _align_up(length))
+            self._buffers[index] = buffer
+        return buffer
+
+    def _fill(self, index: int, start: int, end: int) -> int:
+        """Reads the aligned range [start, end) into buffer `index`; returns bytes read."""
+        buffer = self._buffer(index, end - start)
+        with memoryview(buffer) as mv:
+            total = 0
+            while start + total < min(end, self.size):
+                n = os.preadv(self._fd, [mv[total:end - start]], start + total)
+                if n <= 0:
+                    break
+                total += n
+        if not self.direct and total and hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(self._fd, start, total, os.POSIX_FADV_DONTNEED)
+        return total
+
+    def _wait_prefetch(self) -> Optional[Tuple[int, int, int, int]]:
+        """Waits for the pending prefetch; returns (start, end, buffer, bytes read)."""
+        prefetch, self._prefetch = self._prefetch, None
+        if prefetch is None:
+            return None
+        try:
+            return prefetch.start, prefetch.end, prefetch.buffer, prefetch.future.result()
+        except OSError:
+            return None
+
+    def view(self, offset: int, length: int) -> np.ndarray:
+        length = max(0, min(length, self.size - offset))
+        if length == 0:
+            return np.empty(0, dtype=np.uint8)
+        start, end = _align_down(offset), _align_up(offset + length)
+
+        done = self._wait_prefetch()
+        if done is not None and done[0] <= start and end <= done[1]:
+            p_start, _, index, _ = done
+        else:
+            # Reuse the prefetch buffer: the previous view must stay valid
+            index = done[2] if done is not None else (self._current + 1) % NUM_BUFFERS
+            p_start = start
+            self._fill(index, start, end)
+        previous, self._current = self._current, index
+
+        # Read the next range of the same size ahead on the helper thread
+        next_start = _align_down(offset + length)
+        if next_start < self.size:
+            next_end = min(next_start + (end - start), _align_up(self.size))
+            spare = next(i for i in range(NUM_BUFFERS) if i not in (index, previous))
+            self._buffer(spare, next_end - next_start)
+            future = self._executor.submit(self._fill, spare, next_start, next_end)
+            self._prefetch = _Prefetch(next_start, next_end, spare, future)
+
+        data = np.frombuffer(self._buffers[index], dtype=np.uint8, count=length, offset=offset - p_start)
+        data.flags.writeable = False
+        return data
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Random read through a private aligned buffer; the read-ahead is left untouched."""
+        length = min(length, self.size - offset)
+        if offset >= self.size or length <= 0:
+            return b""
+        start, end = _align_down(offset), _align_up(offset + length)
+        buffer = mmap.mmap(-1, end - start)
+        try:
+            with memoryview(buffer) as mv:
+                n = os.preadv(self._fd, [mv], start)
+                return bytes(mv[offset - start:min(offset - start + length, n)])
+        finally:
+            buffer.close()
+
+    def data_extents(self, start: int, end: int) -> List[Tuple[int, int]]:
+        return seek_data_extents(self._fd, start, min(end, self.size))
+
+    def close(self) -> None:
+        self._wait_prefetch()
+        self._executor.shutdown(wait=True)
+        for buffer in self._buffers:
+            if buffer is not None:
+                try:
+                    buffer.close()
+                except BufferError:
+                    # Views handed out by view() are still alive
+                    pass
+        os.close(self._fd)
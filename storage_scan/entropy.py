@@ -0,0 +1,168 @@
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+from storage_scan.scanner import DiskScanner, DEFAULT_CHUNK_SIZE
+from storage_scan.sources import image_mtime, sidecar_path
+
+# Bit flags stored per block in EntropyMap.flags
+FLAG_ZERO_FILL = 0x01
+FLAG_FF_FILL = 0x02
+
+# Printable ASCII (0x20-0x7E) plus tab, LF and CR
+_PRINTABLE = np.zeros(256, dtype=bool)
+_PRINTABLE[0x20:0x7F] = True
+_PRINTABLE[[0x09, 0x0A, 0x0D]] = True
+
+
+def block_histograms(blocks: np.ndarray) -> np.ndarray:
+    """
+    Computes a 256-bin byte histogram for every row of a (n_blocks, block_size)
+    uint8 array with a single bincount. Returns an (n_blocks, 256) int64 array.
+    """
+    n_blocks = blocks.shape[0]
+    row_base = (np.arange(n_blocks, dtype=np.int32) * 256)[:, None]
+    bins = (blocks + row_base).ravel()
+    return np.bincount(bins, minlength=n_blocks * 256).reshape(n_blocks, 256)
+
+
+def histogram_entropy(histograms: np.ndarray, block_size: int) -> np.ndarray:
+    """Shannon entropy (0-8 bits) for each row of a histogram array."""
+    p = histograms / block_size
+    log_p = np.log2(p, out=np.zeros_like(p), where=p > 0)
+    return -(p * log_p).sum(axis=-1)
+
+
+def block_statistics(blocks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Computes per-block statistics for a whole chunk in one batched pass.
+    Returns a dict with 'histograms', 'entropy', 'zero_fill', 'ff_fill'
+    and 'printable_ratio' arrays, one entry per block.
+    """
+    block_size = blocks.shape[1]
+    histograms = block_histograms(blocks)
+    return {
+        "histograms": histograms,
+        "entropy": histogram_entropy(histograms, block_size),
+        "zero_fill": histograms[:, 0x00] == block_size,
+        "ff_fill": histograms[:, 0xFF] == block_size,
+        "printable_ratio": histograms[:, _PRINTABLE].sum(axis=1) / block_size,
+    }
+
+
+class EntropyMap:
+    """
+    Compact per-block statistics map of a whole disk image.
+    Entropy is stored as float16, the printable-ASCII ratio as uint8 (0-255)
+    and the fill flags as a uint8 bitfield, so the map costs 4 bytes per block.
+    The map is saved next to the image and reused by later stages until
+    the image's size or modification time changes.
+    """
+
+    SUFFIX = ".stats.npz"
+
+    def __init__(self, block_size: int, image_size: int,
+                 entropy: np.ndarray, flags: np.ndarray,
+                 printable: np.ndarray, histogram: np.ndarray,
+                 image_mtime: Optional[int] = None):
+        self.block_size = block_size
+        self.image_size = image_size
+        self.image_mtime = image_mtime
+        self.entropy = entropy
+        self.flags = flags
+        self.printable = printable
+        self.histogram = histogram
+
+    @classmethod
+    def default_path(cls, image_path: str) -> str:
+        """Returns the path the map is stored at for a given image."""
+        return sidecar_path(image_path, cls.SUFFIX)
+
+    @classmethod
+    def build(cls, scanner: DiskScanner, chunk_size: int = DEFAULT_CHUNK_SIZE) -> "EntropyMap":
+        """Builds the map with one chunked pass over the scanner's image."""
+        num_blocks = scanner.file_size // scanner.block_size
+        entropy = np.zeros(num_blocks, dtype=np.float16)
+        flags = np.zeros(num_blocks, dtype=np.uint8)
+        printable = np.zeros(num_blocks, dtype=np.uint8)
+        histogram = np.zeros(256, dtype=np.uint64)
+
+        for offset, blocks in scanner.scan_chunks(chunk_size=chunk_size):
+            first = offset // scanner.block_size
+            last = first + len(blocks)
+            stats = block_statistics(blocks)
+            entropy[first:last] = stats["entropy"]
+            flags[first:last] = (stats["zero_fill"] * FLAG_ZERO_FILL) | (stats["ff_fill"] * FLAG_FF_FILL)
+            printable[first:last] = np.round(stats["printable_ratio"] * 255)
+            histogram += stats["histograms"].sum(axis=0, dtype=np.uint64)
+
+        return cls(scanner.block_size, scanner.file_size, entropy, flags, printable, histogram,
+                   image_mtime(scanner.disk_image_path))
+
+    def save(self, path: str) -> None:
+        """Saves the map as an uncompressed .npz archive."""
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                block_size=np.int64(self.block_size),
+                image_size=np.int64(self.image_size),
+                # -1: modification time unknown (e.g. a remote image)
+                image_mtime=np.int64(-1 if self.image_mtime is None else self.image_mtime),
+                entropy=self.entropy,
+                flags=self.flags,
+                printable=self.printable,
+                histogram=self.histogram,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "EntropyMap":
+        """Loads a map previously written by save()."""
+        with np.load(path) as archive:
+            mtime = int(archive["image_mtime"])
+            return cls(
+                int(archive["block_size"]),
+                int(archive["image_size"]),
+                archive["entropy"],
+                archive["flags"],
+                archive["printable"],
+                archive["histogram"],
+                None if mtime < 0 else mtime,
+            )
+
+    @classmethod
+    def load_or_build(cls, scanner: DiskScanner, path: Optional[str] = None) -> "EntropyMap":
+        """
+        Reuses the stored map for the scanner's image if it matches the image
+        size, modification time and block size, otherwise builds and saves a
+        fresh one (an image edited in place keeps its size but not its mtime).
+        """
+        path = path or cls.default_path(scanner.disk_image_path)
+        if os.path.exists(path):
+            try:
+                stored = cls.load(path)
+                if (stored.block_size == scanner.block_size and stored.image_size == scanner.file_size
+                        and stored.image_mtime == image_mtime(scanner.disk_image_path)):
+                    return stored
+            except (OSError, ValueError, KeyError):
+                pass
+
+        entropy_map = cls.build(scanner)
+        entropy_map.save(path)
+        return entropy_map
+
+    def block_index(self, offset: int) -> int:
+        """Maps a byte offset to its block index in the map."""
+        return offset // self.block_size
+
+    def is_fill(self, offset: int) -> bool:
+        """True if the block at offset is all 0x00 or all 0xFF."""
+        return bool(self.flags[self.block_index(offset)] & (FLAG_ZERO_FILL | FLAG_FF_FILL))
+
+    def entropy_at(self, offset: int) -> float:
+        """Entropy of the block containing offset."""
+        return float(self.entropy[self.block_index(offset)])
+
+    def printable_ratio_at(self, offset: int) -> float:
+        """Printable-ASCII ratio (0-1) of the block containing offset."""
+        return float(self.printable[self.block_index(offset)]) / 255.0
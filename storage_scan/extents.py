@@ -0,0 +1,51 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def mask_to_extents(mask: np.ndarray, unit_size: int, base_offset: int = 0) -> List[Tuple[int, int]]:
+    """
+    Converts a boolean allocation-unit mask (True = selected, e.g. free)
+    into coalesced (start, end) byte ranges. Unit i covers
+    [base_offset + i * unit_size, base_offset + (i + 1) * unit_size).
+    """
+    if len(mask) == 0:
+        return []
+    padded = np.concatenate(([False], np.asarray(mask, dtype=bool), [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    return [(base_offset + int(s) * unit_size, base_offset + int(e) * unit_size) for s, e in zip(starts, ends)]
+
+
+def coalesce_extents(extents: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorts (start, end) ranges and merges overlapping or touching ones."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(extents):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def clip_extents(extents: List[Tuple[int, int]], start: int, end: int) -> List[Tuple[int, int]]:
+    """Restricts (start, end) ranges to the window [start, end)."""
+    return [(max(s, start), min(e, end)) for s, e in extents if e > start and s < end]
+
+
+def subtract_extents(extents: List[Tuple[int, int]], exclude: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Removes the exclude ranges from (start, end) ranges."""
+    result: List[Tuple[int, int]] = []
+    exclude = coalesce_extents(exclude)
+    for start, end in coalesce_extents(extents):
+        for ex_start, ex_end in exclude:
+            if ex_end <= start or ex_start >= end:
+                continue
+            if ex_start > start:
+                result.append((start, ex_start))
+            start = max(start, ex_end)
+        if end > start:
+            result.append((start, end))
+    return result
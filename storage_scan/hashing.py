@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from storage_scan.sources import sidecar_path
+
+# Bytes covered by one leaf of the region tree
+DEFAULT_REGION_SIZE = 64 * 1024 * 1024
+# Piece size for hashing constant fill runs and for re-reading regions
+HASH_PIECE_SIZE = 1024 * 1024
+
+
+def _leaf_hash(digest: bytes) -> bytes:
+    # Domain-separated as in RFC 6962, so a node can never pass as a leaf
+    return hashlib.sha256(b"\x00" + digest).digest()
+
+
+def merkle_root(leaves: List[str]) -> str:
+    """Root of the binary hash tree over hex region digests (odd nodes are promoted)."""
+    if not leaves:
+        return hashlib.sha256(b"").hexdigest()
+    level = [_leaf_hash(bytes.fromhex(leaf)) for leaf in leaves]
+    while len(level) > 1:
+        paired = [hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest()
+                  for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+class ImageHasher:
+    """
+    Hashes an image incrementally from the data a scan reads anyway: MD5
+    and SHA-256 of the whole image plus a SHA-256 per fixed-size region.
+    Data must arrive in order from offset 0; a gap (e.g. a scan restricted
+    to some ranges) marks the hash as incomplete instead of wrong.
+    """
+
+    def __init__(self, region_size: int = DEFAULT_REGION_SIZE):
+        self.region_size = region_size
+        self.position = 0
+        self.complete = True
+        self._md5 = hashlib.md5()
+        self._sha256 = hashlib.sha256()
+        self._region = hashlib.sha256()
+        self._region_fill = 0
+        self._leaves: List[str] = []
+        self._fill_pieces: Dict[int, bytes] = {}
+
+    def update(self, offset: int, data) -> None:
+        """Feeds the bytes at `offset` (bytes or a contiguous uint8 array)."""
+        if offset != self.position:
+            self.complete = False
+        if not self.complete:
+            return
+        view = memoryview(np.ascontiguousarray(data) if isinstance(data, np.ndarray) else data).cast("B")
+        pos = 0
+        while pos < len(view):
+            take = min(len(view) - pos, self.region_size - self._region_fill)
+            piece = view[pos:pos + take]
+            self._md5.update(piece)
+            self._sha256.update(piece)
+            self._region.update(piece)
+            self._region_fill += take
+            pos += take
+            if self._region_fill == self.region_size:
+                self._leaves.append(self._region.hexdigest())
+                self._region = hashlib.sha256()
+                self._region_fill = 0
+        self.position += len(view)
+
+    def update_fill(self, offset: int, length: int, fill: int) -> None:
+        """Feeds a run of `length` bytes equal to `fill` (sparse holes, 0x00/0xFF runs)."""
+        piece = self._fill_pieces.get(fill)
+        if piece is None:
+            piece = self._fill_pieces[fill] = bytes([fill]) * HASH_PIECE_SIZE
+        end = offset + length
+        while offset < end:
+            n = min(len(piece), end - offset)
+            self.update(offset, memoryview(piece)[:n])
+            offset += n
+
+    def update_segment(self, segment) -> None:
+        """Feeds a ScanSegment from DiskScanner.scan_segments."""
+        if segment.fill is not None:
+            self.update_fill(segment.offset, segment.length, segment.fill)
+        else:
+            self.update(segment.offset, segment.blocks)
+
+    def finalize(self) -> Optional["ImageHashTree"]:
+        """Returns the hashes of the data fed so far, or None if it had gaps."""
+        if not self.complete:
+            return None
+        leaves = list(self._leaves)
+        if self._region_fill or not leaves:
+            leaves.append(self._region.hexdigest())
+        return ImageHashTree(self.position, self.region_size, self._md5.hexdigest(),
+                             self._sha256.hexdigest(), leaves)
+
+
+def hash_regions(scanner, region_size: int = DEFAULT_REGION_SIZE) -> List[str]:
+    """
+    Returns the SHA-256 digest of every region_size region of the image's
+    whole blocks (the bytes scans cover): the leaves ImageHasher records
+    during a hashed scan, here from a pass of their own in which empty runs
+    are hashed without being copied. For a block-aligned image they equal
+    the leaves of its ImageHashTree.
+    """
+    hasher = ImageHasher(region_size)
+    for segment in scanner.scan_segments():
+        hasher.update_segment(segment)
+    return hasher.finalize().leaves
+
+
+class ImageHashTree:
+    """
+    Acquisition hashes of an image: MD5/SHA-256 of the whole image and a
+    Merkle tree over per-region SHA-256 digests. Stored as JSON next to the
+    image, it lets a later session re-verify only the regions it reads.
+    """
+
+    SUFFIX = ".hashes.json"
+
+    def __init__(self, size: int, region_size: int, md5: str, sha256: str,
+                 leaves: List[str], root: Optional[str] = None):
+        self.size = size
+        self.region_size = region_size
+        self.md5 = md5
+        self.sha256 = sha256
+        self.leaves = leaves
+        self.root = root or merkle_root(leaves)
+
+    @classmethod
+    def default_path(cls, image_path: str) -> str:
+        """Returns the path the hashes are stored at for a given image."""
+        return sidecar_path(image_path, cls.SUFFIX)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "region_size": self.region_size,
+            "md5": self.md5,
+            "sha256": self.sha256,
+            "root": self.root,
+            "leaves": self.leaves,
+        }
+
+    def save(self, path: str) -> None:
+        """Writes the hashes atomically as JSON."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ImageHashTree"]:
+        """Loads stored hashes; None if missing, corrupt or not matching its own root."""
+        try:
+            with open(path, "r") as f:
+                d = json.load(f)
+            tree = cls(d["size"], d["region_size"], d["md5"], d["sha256"], d["leaves"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        # Leaves edited after the fact no longer produce the recorded root
+        return tree if tree.root == d.get("root") else None
+
+    def regions(self, start: int, end: int) -> range:
+        """Indices of the regions overlapping [start, end)."""
+        end = min(end, self.size)
+        if start >= end:
+            return range(0)
+        return range(start // self.region_size, (end - 1) // self.region_size + 1)
+
+    def verify_ranges(self, scanner, ranges: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[int, int]]:
+        """
+        Re-hashes only the regions overlapping `ranges` (default: the whole
+        image) and returns the (start, end) byte ranges of regions whose
+        digest changed. An image of a different size fails as a whole.
+        """
+        if scanner.file_size != self.size:
+            return [(0, max(scanner.file_size, self.size))]
+        ranges = [(0, self.size)] if ranges is None else ranges
+        indices = sorted({i for start, end in ranges for i in self.regions(start, end)})
+        mismatched: List[Tuple[int, int]] = []
+        for index in indices:
+            start = index * self.region_size
+            end = min(start + self.region_size, self.size)
+            digest = hashlib.sha256()
+            for offset in range(start, end, HASH_PIECE_SIZE):
+                digest.update(scanner.source.view(offset, min(HASH_PIECE_SIZE, end - offset)))
+            if digest.hexdigest() != self.leaves[index]:
+                mismatched.append((start, end))
+        return mismatched
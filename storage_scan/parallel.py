@@ -0,0 +1,181 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import torch
+
+from storage_scan.scanner import DiskScanner, DEFAULT_CHUNK_SIZE
+from storage_scan.sources import image_size
+from carving.signature import SignatureCarver
+
+# How far a shard may read past its end to finish a file that started inside it
+DEFAULT_OVERLAP = 64 * 1024 * 1024
+# Read size used while following a file into the next shard
+OVERLAP_CHUNK_SIZE = 256 * 1024
+# Shards per worker, so a slow shard does not leave other cores idle
+SHARDS_PER_WORKER = 4
+
+# Per-process HybridCarver, created once by _init_worker
+_worker_carver = None
+
+
+def plan_shards(file_size: int, num_shards: int, block_size: int = 512) -> List[Tuple[int, int]]:
+    """
+    Splits an image into at most num_shards contiguous, block-aligned
+    (start, end) byte ranges covering every whole block.
+    """
+    num_blocks = file_size // block_size
+    num_shards = max(1, min(num_shards, num_blocks))
+    shards = []
+    for i in range(num_shards):
+        first = (num_blocks * i) // num_shards
+        last = (num_blocks * (i + 1)) // num_shards
+        if last > first:
+            shards.append((first * block_size, last * block_size))
+    return shards
+
+
+def plan_range_shards(ranges: List[Tuple[int, int]], num_shards: int,
+                      block_size: int = 512) -> List[Tuple[int, int]]:
+    """
+    Splits block-aligned (start, end) ranges, such as partition scan units,
+    into shards. Each range gets a share of num_shards proportional to its
+    length, and no shard spans two ranges.
+    """
+    total = sum(end - start for start, end in ranges)
+    shards = []
+    for start, end in ranges:
+        if end <= start:
+            continue
+        share = max(1, round(num_shards * (end - start) / total))
+        shards.extend((start + s, start + e) for s, e in plan_shards(end - start, share, block_size))
+    return shards
+
+
+def _init_worker(checkpoint_path: Optional[str]) -> None:
+    """Loads the classifier once per worker process."""
+    global _worker_carver
+    # One intra-op thread per process; parallelism comes from the processes
+    torch.set_num_threads(1)
+    if checkpoint_path is not None:
+        from carving.hybrid import HybridCarver
+        _worker_carver = HybridCarver(checkpoint_path=checkpoint_path)
+
+
+def scan_shard(image_path: str, start: int, end: int,
+               block_size: int = 512,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               overlap: int = DEFAULT_OVERLAP,
+               direct_io: bool = False,
+               prefetch_window: int = 0,
+               max_read_rate: float = 0.0) -> Dict:
+    """
+    Scans the byte range [start, end) of an image with its own DiskScanner
+    (mmap-backed, or O_DIRECT reads with direct_io), reading
+    `prefetch_window` chunks ahead on a background thread and at most
+    `max_read_rate` MB/s (0: unthrottled). A file whose header lies inside the range is followed up to
+    `overlap` bytes past its end; files starting at or after `end` belong to
+    the next shard and are dropped.
+    Returns { "carved_files": list, "fragments": list, "bytes_scanned": int }.
+    """
+    carver = SignatureCarver(block_size=block_size)
+    fragments = []
+    bytes_scanned = 0
+
+    with DiskScanner(image_path, block_size=block_size, direct_io=direct_io,
+                     prefetch_window=prefetch_window, max_read_rate=max_read_rate) as scanner:
+        for segment in scanner.scan_segments(chunk_size, start, end):
+            bytes_scanned += segment.length
+            if segment.fill is not None:
+                carver.process_fill(segment.offset, segment.length, segment.fill)
+                continue
+            carver.process_chunk(segment.offset, segment.blocks)
+            if _worker_carver is not None:
+                for i, identification in enumerate(_worker_carver.identify_chunk(segment.blocks)):
+                    if identification["type"] != "other":
+                        fragments.append({
+                            "offset": segment.offset + i * block_size,
+                            "identification": identification
+                        })
+
+        # Follow an open file (or a header straddling the boundary) into the next shard
+        for offset, blocks in scanner.scan_chunks(OVERLAP_CHUNK_SIZE, end, end + overlap):
+            carver.process_chunk(offset, blocks)
+            bytes_scanned += blocks.size
+            if not carver.in_file or carver.start_offset >= end:
+                break
+
+    carved_files = [f for f in carver.get_carved_files() if start <= f["start_offset"] < end]
+    return {"carved_files": carved_files, "fragments": fragments, "bytes_scanned": bytes_scanned}
+
+
+def _scan_shard_task(args: Tuple) -> Dict:
+    return scan_shard(*args)
+
+
+def merge_shard_results(shard_results: List[Dict]) -> Dict:
+    """
+    Merges per-shard results in offset order. A file carved by one shard may
+    extend into the next; any carve starting inside it is dropped, as the
+    sequential carver ignores headers while a file is open.
+    """
+    carved_files = sorted(
+        (f for r in shard_results for f in r["carved_files"]),
+        key=lambda f: f["start_offset"],
+    )
+    merged = []
+    covered_until = -1
+    for f in carved_files:
+        if f["start_offset"] < covered_until:
+            continue
+        merged.append(f)
+        covered_until = f["start_offset"] + len(f["data"])
+
+    fragments = sorted(
+        (frag for r in shard_results for frag in r["fragments"]),
+        key=lambda frag: frag["offset"],
+    )
+    return {
+        "carved_files": merged,
+        "fragments": fragments,
+        "bytes_scanned": sum(r["bytes_scanned"] for r in shard_results),
+    }
+
+
+def parallel_scan(image_path: str,
+                  workers: Optional[int] = None,
+                  block_size: int = 512,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  overlap: int = DEFAULT_OVERLAP,
+                  checkpoint_path: Optional[str] = None,
+                  ranges: Optional[List[Tuple[int, int]]] = None,
+                  direct_io: bool = False,
+                  prefetch_window: int = 0,
+                  max_read_rate: float = 0.0) -> Dict:
+    """
+    Scans an image with a pool of worker processes, each owning a set of
+    byte-range shards and its own DiskScanner. Signature carving always runs;
+    when checkpoint_path is given each worker also runs HybridCarver and
+    reports non-"other" fragments. `ranges` restricts the scan to
+    block-aligned (start, end) byte ranges, e.g. selected partition units.
+    direct_io makes every worker read raw images with O_DIRECT, and
+    prefetch_window sets how many chunks each worker reads ahead, and
+    max_read_rate (MB/s, 0: unthrottled) is shared evenly between workers.
+    Returns merged results as { "carved_files", "fragments", "bytes_scanned" }.
+    """
+    workers = workers or os.cpu_count() or 1
+    file_size = image_size(image_path)
+    if ranges is None:
+        shards = plan_shards(file_size, workers * SHARDS_PER_WORKER, block_size)
+    else:
+        shards = plan_range_shards(ranges, workers * SHARDS_PER_WORKER, block_size)
+    worker_rate = max_read_rate / workers if max_read_rate else 0.0
+    tasks = [(image_path, start, end, block_size, chunk_size, overlap, direct_io, prefetch_window, worker_rate)
+             for start, end in shards]
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(checkpoint_path,)) as executor:
+        shard_results = list(executor.map(_scan_shard_task, tasks))
+
+    return merge_shard_results(shard_results)
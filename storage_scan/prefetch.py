@@ -0,0 +1,69 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Iterable, Iterator, Tuple, TypeVar
+
+from storage_scan.sources import ImageSource
+
+T = TypeVar("T", bound=Tuple[int, int])
+
+
+class Prefetcher:
+    """
+    Loads upcoming ranges of an image source on a background thread while
+    the caller analyses the current one, so disk or network latency overlaps
+    with classification instead of adding to it. At most `window` ranges
+    are queued ahead of the consumer.
+    """
+
+    def __init__(self, source: ImageSource, window: int = 2):
+        self.source = source
+        self.window = max(0, window)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: Deque[Future] = deque()
+
+    def schedule(self, offset: int, length: int) -> None:
+        """Queues a range for background loading."""
+        while self._pending and self._pending[0].done():
+            self._pending.popleft()
+        self._pending.append(self._executor.submit(self._load, offset, length))
+
+    def _load(self, offset: int, length: int) -> None:
+        try:
+            self.source.prefetch(offset, length)
+        except (OSError, ValueError):
+            # Read-ahead is best effort; the real read reports errors
+            pass
+
+    def iterate(self, ranges: Iterable[T]) -> Iterator[T]:
+        """
+        Yields (offset, length, ...) tuples unchanged, keeping the next
+        `window` of them prefetched.
+        """
+        ahead: Deque[T] = deque()
+        ranges = iter(ranges)
+        exhausted = False
+        while True:
+            while not exhausted and len(ahead) <= self.window:
+                item = next(ranges, None)
+                if item is None:
+                    exhausted = True
+                    break
+                ahead.append(item)
+                if len(ahead) > 1:
+                    self.schedule(item[0], item[1])
+            if not ahead:
+                return
+            yield ahead.popleft()
+
+    def close(self) -> None:
+        """Drops queued work and waits for the range being loaded."""
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        self._pending.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
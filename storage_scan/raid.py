@@ -0,0 +1,273 @@
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from storage_scan.cache import LRUCache
+from storage_scan.sources import ImageSource, open_source
+from storage_scan.entropy import block_histograms, histogram_entropy
+
+SUFFIX = ".raid.json"
+RAID5_LAYOUTS = ("left-symmetric", "left-asymmetric", "right-symmetric", "right-asymmetric")
+DEFAULT_STRIPE_SIZE = 64 * 1024
+# Reassembled stripe rows kept in memory per open device
+DEFAULT_CACHED_ROWS = 64
+# Stripe sizes tried by guess_raid_geometry
+CANDIDATE_STRIPE_SIZES = tuple(4096 << i for i in range(9))  # 4 KiB .. 1 MiB
+# Stripe rows compared per candidate order
+MAX_ORDER_ROWS = 32
+# Up to this many members every order is tried; larger sets use a greedy
+# adjacency chain refined by pairwise swaps
+MAX_EXHAUSTIVE_MEMBERS = 6
+
+
+def raid5_map(row: int, chunk: int, num_disks: int, layout: str) -> Tuple[int, int]:
+    """
+    Returns (data_disk, parity_disk) of data chunk `chunk` in stripe row
+    `row` for the md/mdadm RAID-5 layouts.
+    """
+    if layout.startswith("left"):
+        parity = (num_disks - 1) - (row % num_disks)
+    else:
+        parity = row % num_disks
+    if layout.endswith("symmetric") and not layout.endswith("asymmetric"):
+        disk = (parity + 1 + chunk) % num_disks
+    else:
+        disk = chunk if chunk < parity else chunk + 1
+    return disk, parity
+
+
+class RaidSource(ImageSource):
+    """
+    Presents the logical volume of a RAID-0 or RAID-5 set built from member
+    images (any format open_source() understands). Member chunks of a stripe
+    row are read in parallel and whole rows are cached. On RAID-5 a missing
+    member (None) or a short read is rebuilt from the XOR of the others.
+    """
+
+    def __init__(self, members: Sequence[Optional[str]], level: int = 0,
+                 stripe_size: int = DEFAULT_STRIPE_SIZE, layout: str = "left-symmetric",
+                 cached_rows: int = DEFAULT_CACHED_ROWS, path: str = ""):
+        if level not in (0, 5):
+            raise ValueError(f"Unsupported RAID level: {level}")
+        if level == 5 and layout not in RAID5_LAYOUTS:
+            raise ValueError(f"Unknown RAID-5 layout: {layout}")
+        missing = sum(m is None for m in members)
+        if missing > (1 if level == 5 else 0):
+            raise ValueError(f"RAID-{level} cannot be assembled with {missing} missing members")
+
+        self.path = path
+        self.level = level
+        self.stripe_size = stripe_size
+        self.layout = layout
+        self.members: List[Optional[ImageSource]] = [open_source(m) if m else None for m in members]
+        self.num_disks = len(self.members)
+        self.data_disks = self.num_disks - 1 if level == 5 else self.num_disks
+        member_size = min(m.size for m in self.members if m is not None)
+        self.rows = member_size // stripe_size
+        self.row_size = self.data_disks * stripe_size
+        self.size = self.rows * self.row_size
+        self.cache = LRUCache(cached_rows)
+        self._executor = ThreadPoolExecutor(max_workers=self.num_disks)
+
+    @classmethod
+    def from_descriptor(cls, path: str) -> "RaidSource":
+        """
+        Opens a RAID descriptor: JSON with "level", "stripe_size", "layout"
+        and "members" (paths relative to the descriptor, null for missing).
+        """
+        with open(path, "r") as f:
+            desc = json.load(f)
+        base = os.path.dirname(os.path.abspath(path))
+        members = [os.path.join(base, m) if m else None for m in desc["members"]]
+        return cls(members, level=desc.get("level", 0), stripe_size=desc.get("stripe_size", DEFAULT_STRIPE_SIZE),
+                   layout=desc.get("layout", "left-symmetric"), path=path)
+
+    @staticmethod
+    def write_descriptor(path: str, members: Sequence[Optional[str]], level: int,
+                         stripe_size: int, layout: str = "left-symmetric") -> None:
+        """Writes a descriptor that open_source() reassembles."""
+        with open(path, "w") as f:
+            json.dump({"level": level, "stripe_size": stripe_size, "layout": layout,
+                       "members": list(members)}, f, indent=2)
+
+    def _read_member(self, disk: int, row: int) -> Optional[bytes]:
+        member = self.members[disk]
+        if member is None:
+            return None
+        try:
+            data = member.read(row * self.stripe_size, self.stripe_size)
+        except OSError:
+            return None
+        return data if len(data) == self.stripe_size else None
+
+    def _row(self, row: int) -> bytes:
+        """Logical bytes of one stripe row, rebuilt from parity where needed."""
+        cached = self.cache.get(row)
+        if cached is not None:
+            return cached
+        chunks = list(self._executor.map(lambda d: self._read_member(d, row), range(self.num_disks)))
+        failed = [d for d, c in enumerate(chunks) if c is None]
+
+        if self.level == 0:
+            if failed:
+                raise IOError(f"RAID-0 member {failed[0]} unreadable at stripe row {row}")
+            data = b"".join(chunks)
+        else:
+            if len(failed) > 1:
+                raise IOError(f"RAID-5 stripe row {row} has {len(failed)} unreadable members")
+            if failed:
+                present = np.stack([np.frombuffer(c, dtype=np.uint8) for c in chunks if c is not None])
+                chunks[failed[0]] = np.bitwise_xor.reduce(present, axis=0).tobytes()
+            data = b"".join(chunks[raid5_map(row, i, self.num_disks, self.layout)[0]]
+                            for i in range(self.data_disks))
+        self.cache.put(row, data)
+        return data
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset >= self.size or length <= 0:
+            return b""
+        end = min(offset + length, self.size)
+        first, last = offset // self.row_size, (end - 1) // self.row_size
+        data = b"".join(self._row(r) for r in range(first, last + 1))
+        start = offset - first * self.row_size
+        return data[start:start + end - offset]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.cache.clear()
+        for member in self.members:
+            if member is not None:
+                member.close()
+
+
+def _block_entropy(data: bytes, block_size: int) -> np.ndarray:
+    blocks = np.frombuffer(data[:len(data) // block_size * block_size], dtype=np.uint8).reshape(-1, block_size)
+    return histogram_entropy(block_histograms(blocks), block_size)
+
+
+def guess_raid_geometry(member_paths: Sequence[str], sample_bytes: int = 8 * 1024 * 1024,
+                        block_size: int = 512,
+                        stripe_sizes: Sequence[int] = CANDIDATE_STRIPE_SIZES) -> Dict[str, Any]:
+    """
+    Guesses RAID level, stripe size, member order and RAID-5 layout from a
+    sample at the start of every member.
+
+    - Level: if the XOR of all members is zero almost everywhere, the set
+      carries parity (RAID-5), otherwise it is treated as RAID-0.
+    - Stripe size: abrupt per-block entropy changes inside a member mostly
+      happen where one file's chunk ends and another's begins, so the
+      largest candidate at whose multiples the changes cluster wins.
+    - Order/layout: adjacent logical chunks usually continue the same file,
+      so the order (and layout) whose chunk boundaries join blocks of the
+      most similar entropy wins; a member holding a partition table or boot
+      sector (0x55AA at 510) must hold logical chunk 0. Up to
+      MAX_EXHAUSTIVE_MEMBERS members every order is scored; larger sets
+      start from a greedy chain of best-fitting neighbours and improve it
+      by pairwise swaps, so the result may be a local optimum.
+    Returns { "level", "stripe_size", "order", "layout", "confidence",
+    "order_search" ("exhaustive" or "greedy") }.
+    """
+    samples = []
+    for path in member_paths:
+        with open_source(path) as source:
+            samples.append(source.read(0, sample_bytes))
+    length = min(len(s) for s in samples) // block_size * block_size
+    samples = [s[:length] for s in samples]
+    arrays = np.stack([np.frombuffer(s, dtype=np.uint8) for s in samples])
+    num_disks = len(samples)
+
+    xor = np.bitwise_xor.reduce(arrays, axis=0).reshape(-1, block_size)
+    informative = arrays.reshape(num_disks, -1, block_size).any(axis=(0, 2))
+    parity_ratio = float((~xor.any(axis=1))[informative].mean()) if informative.any() else 0.0
+    level = 5 if num_disks >= 3 and parity_ratio > 0.95 else 0
+
+    # Stripe size: where do entropy jumps fall?
+    entropy = np.stack([_block_entropy(s, block_size) for s in samples])
+    jumps = np.flatnonzero((np.abs(np.diff(entropy, axis=1)) > 1.0).any(axis=0)) + 1
+    scores = {
+        candidate: float((jumps % (candidate // block_size) == 0).mean())
+        for candidate in stripe_sizes
+        if len(jumps) and candidate // block_size * 2 <= entropy.shape[1]
+    }
+    # Multiples of the true stripe size are hit as often as it is; twice the
+    # stripe size only catches about half of the jumps
+    stripe_size, stripe_score = stripe_sizes[0], 0.0
+    if scores:
+        top = max(scores.values())
+        stripe_size = max(c for c, score in scores.items() if score >= 0.8 * top)
+        stripe_score = scores[stripe_size]
+
+    per_stripe = stripe_size // block_size
+    rows = min(entropy.shape[1] // per_stripe, MAX_ORDER_ROWS)
+    first = entropy[:, 0:rows * per_stripe:per_stripe]
+    last = entropy[:, per_stripe - 1:rows * per_stripe:per_stripe]
+    boot_disks = [d for d, s in enumerate(samples) if s[510:512] == b"\x55\xaa"]
+
+    layouts = RAID5_LAYOUTS if level == 5 else (None,)
+    data_disks = num_disks - 1 if level == 5 else num_disks
+    exhaustive = num_disks <= MAX_EXHAUSTIVE_MEMBERS
+    best: Tuple[float, List[int], Optional[str]] = (float("inf"), list(range(num_disks)), layouts[0])
+    for layout in layouts:
+        # Logical chunk sequence as (member slot, row); an order maps slots to disks
+        slots = np.array([raid5_map(row, chunk, num_disks, layout)[0] if layout else chunk
+                          for row in range(rows) for chunk in range(data_disks)])
+        seq_rows = np.repeat(np.arange(rows), data_disks)
+
+        def cost(order: Sequence[int]) -> float:
+            disks = np.asarray(order)[slots]
+            if boot_disks and disks[0] not in boot_disks:
+                return float("inf")
+            return float(np.abs(last[disks[:-1], seq_rows[:-1]] - first[disks[1:], seq_rows[1:]]).sum())
+
+        if exhaustive:
+            candidates = itertools.permutations(range(num_disks))
+        else:
+            candidates = [_refine_order(_greedy_order(first, last, start), cost)
+                          for start in (boot_disks or range(num_disks))]
+        for order in candidates:
+            order_cost = cost(order)
+            if order_cost < best[0]:
+                best = (order_cost, list(order), layout)
+
+    return {
+        "level": level,
+        "stripe_size": stripe_size,
+        "order": best[1],
+        "layout": best[2] if level == 5 else None,
+        "confidence": stripe_score if level == 0 else min(stripe_score, parity_ratio),
+        "order_search": "exhaustive" if exhaustive else "greedy",
+    }
+
+
+def _greedy_order(first: np.ndarray, last: np.ndarray, start: int) -> List[int]:
+    """Chains members from `start`, each followed by the one whose chunks continue it best."""
+    # Mean entropy step from the end of a's chunk to the start of b's chunk in the same row
+    adjacency = np.abs(last[:, None, :] - first[None, :, :]).mean(axis=2)
+    order = [start]
+    remaining = set(range(len(first))) - {start}
+    while remaining:
+        following = min(remaining, key=lambda disk: adjacency[order[-1], disk])
+        order.append(following)
+        remaining.remove(following)
+    return order
+
+
+def _refine_order(order: List[int], cost) -> List[int]:
+    """Swaps pairs of positions while that lowers cost(order) (local search)."""
+    order = list(order)
+    current = cost(order)
+    improved = True
+    while improved:
+        improved = False
+        for i, j in itertools.combinations(range(len(order)), 2):
+            order[i], order[j] = order[j], order[i]
+            candidate = cost(order)
+            if candidate < current:
+                current, improved = candidate, True
+            else:
+                order[i], order[j] = order[j], order[i]
+    return order
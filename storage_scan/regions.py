@@ -0,0 +1,176 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from storage_scan.scanner import DiskScanner, DEFAULT_CHUNK_SIZE
+from storage_scan.hashing import DEFAULT_REGION_SIZE, hash_regions
+from storage_scan.sources import sidecar_path
+from carving.signature import SignatureCarver
+
+
+class IncrementalScanner:
+    """
+    Rescans an image using a per-region hash index stored with the results.
+    Only regions whose hash changed are re-carved and re-classified; cached
+    results are reused for the rest. The carver state at every region
+    boundary is kept, so carving resumes mid-file when a dirty region falls
+    inside a file and stops as soon as its state matches the cached one.
+    """
+
+    SUFFIX = ".regions.json"
+
+    def __init__(self, scanner: DiskScanner,
+                 index_path: Optional[str] = None,
+                 region_size: int = DEFAULT_REGION_SIZE,
+                 hybrid=None,
+                 classifier_key: str = ""):
+        """
+        Args:
+            scanner: Open DiskScanner for the image.
+            index_path: Where the region index lives (default: next to the image).
+            region_size: Bytes per hashed region (rounded to whole blocks).
+            hybrid: Optional HybridCarver; when given, blocks are classified too.
+            classifier_key: Identifies the classifier. Cached classifications
+                made under a different key are discarded, carving results are kept.
+        """
+        self.scanner = scanner
+        self.index_path = index_path or self.default_path(scanner.disk_image_path)
+        self.region_size = max(1, region_size // scanner.block_size) * scanner.block_size
+        self.hybrid = hybrid
+        self.classifier_key = classifier_key
+
+    @classmethod
+    def default_path(cls, image_path: str) -> str:
+        """Returns the default index path for an image."""
+        return sidecar_path(image_path, cls.SUFFIX)
+
+    def load_index(self) -> Optional[Dict[str, Any]]:
+        """Returns the stored index, or None if missing or built with other settings."""
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+        if index.get("region_size") != self.region_size or index.get("block_size") != self.scanner.block_size:
+            return None
+        return index
+
+    def save_index(self, index: Dict[str, Any]) -> None:
+        """Writes the index atomically."""
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def scan(self) -> Dict[str, Any]:
+        """
+        Runs the incremental scan and updates the stored index.
+        Returns { "carved_files", "fragments", "dirty_regions", "reused_regions" }.
+        """
+        hashes = hash_regions(self.scanner, self.region_size)
+        num_regions = len(hashes)
+        old = self.load_index()
+        old_hashes = old["hashes"] if old else []
+        dirty = {i for i in range(num_regions) if i >= len(old_hashes) or old_hashes[i] != hashes[i]}
+        classifications_valid = bool(old) and old.get("classifier_key") == self.classifier_key
+
+        boundaries: List[int] = []
+        carved: List[List[List[int]]] = [[] for _ in range(num_regions)]
+        fragments: List[List[Dict]] = [[] for _ in range(num_regions)]
+        carver: Optional[SignatureCarver] = None
+        limit = (self.scanner.file_size // self.scanner.block_size) * self.scanner.block_size
+
+        for i in range(num_regions):
+            region_start = i * self.region_size
+            region_end = min(region_start + self.region_size, limit)
+
+            if carver is None and i in dirty:
+                open_start = old["boundaries"][i] if old and i < len(old_hashes) else -1
+                carver = self._resume_carver(open_start, region_start)
+                if carver.in_file:
+                    # The open file is re-carved; drop its reused cached copy
+                    for cached in carved:
+                        cached[:] = [c for c in cached if c[0] < open_start]
+
+            boundaries.append(self._open_start(carver) if carver else old["boundaries"][i])
+            classify = self.hybrid is not None and (i in dirty or not classifications_valid)
+
+            if carver is not None or classify:
+                for segment in self.scanner.scan_segments(DEFAULT_CHUNK_SIZE, region_start, region_end):
+                    if carver is not None:
+                        if segment.fill is not None:
+                            carver.process_fill(segment.offset, segment.length, segment.fill)
+                        else:
+                            carver.process_chunk(segment.offset, segment.blocks)
+                    if classify and segment.fill is None:
+                        fragments[i].extend(self._classify(segment))
+            if not classify and i not in dirty and classifications_valid:
+                fragments[i] = old["fragments"][i]
+
+            if carver is None:
+                carved[i].extend(list(c) for c in old["carved"][i])
+                continue
+
+            for f in carver.get_carved_files():
+                carved[f["start_offset"] // self.region_size].append([f["start_offset"], len(f["data"])])
+            carver.carved_files = []
+
+            # Stop re-carving once the state matches the cached one at a clean boundary
+            nxt = i + 1
+            if nxt < num_regions and nxt not in dirty and old and self._open_start(carver) == old["boundaries"][nxt]:
+                if carver.in_file:
+                    # Still inside a file (reopened, or opened in a dirty region): its end lies in
+                    # clean regions, so the cached carve starting at the same offset is still valid
+                    start = carver.start_offset
+                    carved[start // self.region_size].extend(
+                        list(c) for c in old["carved"][start // self.region_size] if c[0] == start)
+                carver = None
+
+        self.save_index({
+            "image_size": self.scanner.file_size,
+            "block_size": self.scanner.block_size,
+            "region_size": self.region_size,
+            "classifier_key": self.classifier_key,
+            "hashes": hashes,
+            "boundaries": boundaries,
+            "carved": carved,
+            "fragments": fragments,
+        })
+
+        return {
+            "carved_files": [
+                {"start_offset": start, "data": self.scanner.read_range(start, length)}
+                for region in carved for start, length in region
+            ],
+            "fragments": [frag for region in fragments for frag in region],
+            "dirty_regions": len(dirty),
+            "reused_regions": num_regions - len(dirty),
+        }
+
+    def _resume_carver(self, open_start: int, region_start: int) -> SignatureCarver:
+        """Creates a carver positioned at region_start, reopening a file that started at open_start."""
+        carver = SignatureCarver(block_size=self.scanner.block_size)
+        if open_start >= 0:
+            carver.load_state({
+                "in_file": True,
+                "start_offset": open_start,
+                "current_file_data": self.scanner.read_range(open_start, region_start - open_start),
+                "carved_files": [],
+            })
+        return carver
+
+    @staticmethod
+    def _open_start(carver: SignatureCarver) -> int:
+        """Start offset of the carver's open file, or -1 if none is open."""
+        return carver.start_offset if carver.in_file else -1
+
+    def _classify(self, segment) -> List[Dict]:
+        """Classifies a data segment, keeping non-"other" blocks."""
+        block_size = self.scanner.block_size
+        return [
+            {"offset": segment.offset + i * block_size, "identification": identification}
+            for i, identification in enumerate(self.hybrid.identify_chunk(segment.blocks))
+            if identification["type"] != "other"
+        ]
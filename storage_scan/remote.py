@@ -0,0 +1,303 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from storage_scan.cache import LRUCache
+from storage_scan.sources import ImageSource
+
+# Unit of caching and of range requests
+DEFAULT_BLOCK_SIZE = 256 * 1024
+# Blocks kept in memory per open image (64 MiB)
+DEFAULT_CACHED_BLOCKS = 256
+# Largest single range request; longer runs are split and fetched in parallel
+DEFAULT_MAX_REQUEST = 8 * 1024 * 1024
+# Upper bound of the adaptive sequential readahead, in blocks (8 MiB)
+DEFAULT_MAX_READAHEAD = 32
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 3
+# Local files for remote images: sidecars (entropy maps, journals) and opt-in block caches
+DEFAULT_CACHE_ROOT = os.environ.get(
+    "STORAGE_SCAN_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "storage_scan"))
+# Bytes of downloaded blocks open_source() keeps on disk per image (0: no disk cache)
+DISK_CACHE_BYTES = int(os.environ.get("STORAGE_SCAN_DISK_CACHE_MB", "0")) * 1024 * 1024
+# Disk cache cap of an HTTPRangeSource given a cache_dir directly
+DEFAULT_MAX_DISK_CACHE = 1024 * 1024 * 1024
+
+CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+def remote_cache_dir(url: str, root: Optional[str] = None) -> str:
+    """Local directory holding cached data of one remote image."""
+    return os.path.join(root or DEFAULT_CACHE_ROOT, hashlib.sha1(url.encode("utf-8")).hexdigest()[:16])
+
+
+def remote_sidecar_base(url: str) -> str:
+    """Local stand-in for a remote image path that sidecar file suffixes are appended to."""
+    name = os.path.basename(urllib.parse.urlparse(url).path) or "image"
+    return os.path.join(remote_cache_dir(url), name)
+
+
+class HTTPRangeSource(ImageSource):
+    """
+    Reads an image served over HTTP(S) with range requests, so evidence on
+    a central server can be scanned without copying it first.
+
+    Data is fetched and cached in fixed blocks. Blocks missing for a read
+    are coalesced into as few range requests as possible, and long runs are
+    split into requests issued in parallel. While reads continue where the
+    previous one ended, the readahead grows (doubling up to max_readahead
+    blocks) and rides along in the same requests; a random read resets it.
+    Blocks are kept in an in-memory LRU and, with a cache_dir, on local
+    disk so later sessions do not download them again; the disk cache is
+    capped at max_disk_cache bytes, evicting least recently used blocks.
+    """
+
+    def __init__(self, url: str, block_size: int = DEFAULT_BLOCK_SIZE,
+                 cached_blocks: int = DEFAULT_CACHED_BLOCKS, cache_dir: Optional[str] = None,
+                 workers: int = DEFAULT_WORKERS, max_request: int = DEFAULT_MAX_REQUEST,
+                 max_readahead: int = DEFAULT_MAX_READAHEAD, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, max_disk_cache: int = DEFAULT_MAX_DISK_CACHE):
+        self.path = url
+        self.block_size = block_size
+        self.max_request_blocks = max(1, max_request // block_size)
+        self.max_readahead = max_readahead
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = LRUCache(cached_blocks)
+        self.requests = 0
+        self.bytes_downloaded = 0
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._readahead = 0
+        self._last_block: Optional[int] = None
+        # Block sizes on disk, least recently used first
+        self.max_disk_cache = max_disk_cache
+        self._disk_blocks: "OrderedDict[int, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+
+        self.size, validator = self._probe()
+        self.num_blocks = -(-self.size // block_size)
+        self.cache_dir = cache_dir and os.path.join(cache_dir, f"blocks-{block_size}")
+        if self.cache_dir:
+            self._open_disk_cache(validator)
+
+    def _open(self, method: str = "GET", headers: Optional[Dict[str, str]] = None):
+        request = urllib.request.Request(self.path, method=method, headers=headers or {})
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _probe(self) -> Tuple[int, str]:
+        """Returns (size, validator) from a HEAD request (or a 1-byte range GET)."""
+        try:
+            with self._open("HEAD") as response:
+                length = response.headers.get("Content-Length")
+                validator = response.headers.get("ETag") or response.headers.get("Last-Modified") or ""
+                if length is not None:
+                    return int(length), validator
+        except urllib.error.HTTPError as e:
+            if e.code not in (405, 501):
+                raise IOError(f"Cannot open remote image {self.path}: HTTP {e.code}") from e
+        with self._open(headers={"Range": "bytes=0-0"}) as response:
+            match = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if response.status != 206 or not match or match.group(3) == "*":
+                raise IOError(f"Server does not support range requests: {self.path}")
+            validator = response.headers.get("ETag") or response.headers.get("Last-Modified") or ""
+            return int(match.group(3)), validator
+
+    def _open_disk_cache(self, validator: str) -> None:
+        """
+        Creates the block directory, discarding blocks of a changed image,
+        and indexes the remaining blocks by modification (last use) time.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path = os.path.join(self.cache_dir, "meta.json")
+        meta = {"url": self.path, "size": self.size, "validator": validator}
+        try:
+            with open(meta_path, "r") as f:
+                stale = json.load(f) != meta
+        except (OSError, ValueError):
+            stale = True
+        if stale:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".blk"):
+                    os.remove(os.path.join(self.cache_dir, name))
+            tmp_path = meta_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+
+        cached = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".blk"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                cached.append((stat.st_mtime_ns, int(name[:-4]), stat.st_size))
+        for _, index, size in sorted(cached):
+            self._disk_blocks[index] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _store_block(self, index: int, block: bytes) -> None:
+        """Writes a block to the disk cache, then evicts blocks over the size cap."""
+        tmp_path = self._block_path(index) + f".{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(block)
+        os.replace(tmp_path, self._block_path(index))
+        with self._disk_lock:
+            self._disk_bytes += len(block) - self._disk_blocks.pop(index, 0)
+            self._disk_blocks[index] = len(block)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        with self._disk_lock:
+            while self._disk_bytes > self.max_disk_cache and self._disk_blocks:
+                index, size = self._disk_blocks.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    os.remove(self._block_path(index))
+                except OSError:
+                    pass
+
+    def _block_path(self, index: int) -> str:
+        return os.path.join(self.cache_dir, f"{index:012d}.blk")
+
+    def _block_length(self, index: int) -> int:
+        return min(self.block_size, self.size - index * self.block_size)
+
+    def _request(self, start: int, end: int) -> bytes:
+        """GETs bytes [start, end) with a range request, retrying transient failures."""
+        error: Optional[Exception] = None
+        for _ in range(self.retries):
+            try:
+                with self._open(headers={"Range": f"bytes={start}-{end - 1}"}) as response:
+                    match = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+                    if response.status != 206 or not match or int(match.group(1)) != start:
+                        raise IOError(f"Server ignored range request for {self.path}")
+                    data = response.read()
+                with self._stats_lock:
+                    self.requests += 1
+                    self.bytes_downloaded += len(data)
+                if len(data) != end - start:
+                    raise IOError(f"Short range response ({len(data)} of {end - start} bytes) from {self.path}")
+                return data
+            except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+                error = e
+        raise IOError(f"Range request {start}-{end} to {self.path} failed: {error}")
+
+    def _fetch_run(self, first: int, last: int) -> Dict[int, bytes]:
+        """Downloads blocks first..last (inclusive) in one request and caches them."""
+        start = first * self.block_size
+        data = self._request(start, min((last + 1) * self.block_size, self.size))
+        blocks = {}
+        for index in range(first, last + 1):
+            block = data[(index - first) * self.block_size:(index - first + 1) * self.block_size]
+            self.cache.put(index, block)
+            if self.cache_dir:
+                self._store_block(index, block)
+            blocks[index] = block
+        return blocks
+
+    def _from_disk(self, index: int) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._block_path(index), "rb") as f:
+                block = f.read()
+        except OSError:
+            return None
+        if len(block) != self._block_length(index):
+            return None
+        self._touch_disk(index)
+        try:
+            # Recency survives into later sessions through the mtime
+            os.utime(self._block_path(index))
+        except OSError:
+            pass
+        self.cache.put(index, block)
+        return block
+
+    def _runs(self, indices: Iterable[int]) -> List[Tuple[int, int]]:
+        """Coalesces sorted block indices into (first, last) runs of at most max_request_blocks."""
+        runs: List[Tuple[int, int]] = []
+        for index in indices:
+            if runs and index == runs[-1][1] + 1 and index - runs[-1][0] < self.max_request_blocks:
+                runs[-1] = (runs[-1][0], index)
+            else:
+                runs.append((index, index))
+        return runs
+
+    def _cached(self, index: int) -> Optional[bytes]:
+        block = self.cache.get(index)
+        if block is None:
+            return self._from_disk(index)
+        if self.cache_dir:
+            self._touch_disk(index)
+        return block
+
+    def _touch_disk(self, index: int) -> None:
+        """Marks a block recently used in the disk cache index."""
+        with self._disk_lock:
+            if index in self._disk_blocks:
+                self._disk_blocks.move_to_end(index)
+
+    def blocks(self, first: int, last: int, ahead: int = 0) -> Dict[int, bytes]:
+        """
+        Blocks first..last (inclusive), downloading the missing ones. When
+        something has to be downloaded anyway, up to `ahead` following
+        blocks are fetched along in the same requests.
+        """
+        last = min(last, self.num_blocks - 1)
+        found: Dict[int, bytes] = {}
+        missing = []
+        for index in range(max(0, first), last + 1):
+            block = self._cached(index)
+            if block is None:
+                missing.append(index)
+            else:
+                found[index] = block
+        if not missing:
+            return found
+        missing.extend(i for i in range(last + 1, min(last + ahead, self.num_blocks - 1) + 1)
+                       if self._cached(i) is None)
+        runs = self._runs(missing)
+        if len(runs) == 1:
+            found.update(self._fetch_run(*runs[0]))
+        else:
+            for fetched in self._executor.map(lambda run: self._fetch_run(*run), runs):
+                found.update(fetched)
+        return found
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset >= self.size or length <= 0:
+            return b""
+        end = min(offset + length, self.size)
+        first, last = offset // self.block_size, (end - 1) // self.block_size
+
+        # Sequential access grows the readahead, anything else resets it
+        if self._last_block is not None and first in (self._last_block, self._last_block + 1):
+            self._readahead = min(max(1, self._readahead * 2), self.max_readahead)
+        else:
+            self._readahead = 0
+        self._last_block = last
+
+        blocks = self.blocks(first, last, ahead=self._readahead)
+        data = b"".join(blocks[i] for i in range(first, last + 1))
+        start = offset - first * self.block_size
+        return data[start:start + end - offset]
+
+    def prefetch(self, offset: int, length: int) -> None:
+        end = min(offset + length, self.size)
+        if offset < end:
+            self.blocks(offset // self.block_size, (end - 1) // self.block_size)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.cache.clear()
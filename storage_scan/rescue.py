@@ -0,0 +1,250 @@
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from storage_scan.sources import sidecar_path
+
+# ddrescue mapfile block states
+NON_TRIED = "?"
+NON_TRIMMED = "*"   # Failed a large read; retried with smaller reads
+BAD_SECTOR = "-"    # Failed at sector size after all retries
+FINISHED = "+"
+STATUSES = (NON_TRIED, NON_TRIMMED, "/", BAD_SECTOR, FINISHED)
+
+DEFAULT_READ_SIZE = 1024 * 1024
+DEFAULT_SECTOR_SIZE = 512
+# Each retry pass divides the read size by this until it reaches one sector
+SHRINK_FACTOR = 8
+
+
+class RescueMap:
+    """
+    Per-range rescue state of an image, stored in the GNU ddrescue mapfile
+    format so maps can be exchanged with ddrescue/ddrescueview. Entries are
+    contiguous (pos, size, status) runs covering the whole device.
+    """
+
+    SUFFIX = ".rescue.map"
+
+    def __init__(self, size: int, entries: Optional[List[Tuple[int, int, str]]] = None):
+        self.size = size
+        self.entries: List[Tuple[int, int, str]] = entries or ([(0, size, NON_TRIED)] if size else [])
+        self.current_pos = 0
+        self.current_status = NON_TRIED
+
+    @classmethod
+    def default_path(cls, image_path: str) -> str:
+        """Returns the map path kept alongside a rescued image."""
+        return sidecar_path(image_path, cls.SUFFIX)
+
+    def set_status(self, start: int, end: int, status: str) -> None:
+        """Marks [start, end) with a status, merging neighbours of equal status."""
+        start, end = max(0, start), min(end, self.size)
+        if start >= end:
+            return
+        updated: List[Tuple[int, int, str]] = []
+        for pos, size, old in self.entries:
+            if pos + size <= start or pos >= end:
+                updated.append((pos, size, old))
+                continue
+            if pos < start:
+                updated.append((pos, start - pos, old))
+            if pos <= start:
+                updated.append((start, end - start, status))
+            if pos + size > end:
+                updated.append((end, pos + size - end, old))
+        merged: List[Tuple[int, int, str]] = []
+        for pos, size, st in updated:
+            if merged and merged[-1][2] == st and merged[-1][0] + merged[-1][1] == pos:
+                merged[-1] = (merged[-1][0], merged[-1][1] + size, st)
+            else:
+                merged.append((pos, size, st))
+        self.entries = merged
+
+    def ranges(self, statuses: Iterable[str]) -> List[Tuple[int, int]]:
+        """(start, end) ranges whose status is one of `statuses`."""
+        statuses = set(statuses)
+        return [(pos, pos + size) for pos, size, st in self.entries if st in statuses]
+
+    def unreadable(self) -> List[Tuple[int, int]]:
+        """Ranges without rescued data (bad, or not read successfully yet)."""
+        return self.ranges(s for s in STATUSES if s != FINISHED)
+
+    def totals(self) -> Dict[str, int]:
+        """Bytes per status character."""
+        totals = {st: 0 for st in STATUSES}
+        for _, size, st in self.entries:
+            totals[st] += size
+        return totals
+
+    def save(self, path: str) -> None:
+        """Writes the map atomically in ddrescue mapfile format."""
+        lines = [
+            "# Rescue mapfile (GNU ddrescue format)",
+            "# current_pos  current_status",
+            f"0x{self.current_pos:08X}     {self.current_status}",
+            "#      pos        size  status",
+        ]
+        lines += [f"0x{pos:08X}  0x{size:08X}  {st}" for pos, size, st in self.entries]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RescueMap"]:
+        """Reads a ddrescue mapfile; None if missing or malformed."""
+        try:
+            with open(path, "r") as f:
+                lines = [line.split() for line in f if line.strip() and not line.startswith("#")]
+            current_pos, current_status = int(lines[0][0], 0), lines[0][1]
+            entries = [(int(pos, 0), int(size, 0), st) for pos, size, st in (line[:3] for line in lines[1:])]
+        except (OSError, ValueError, IndexError):
+            return None
+        if any(st not in STATUSES for _, _, st in entries):
+            return None
+        rescue_map = cls(sum(size for _, size, _ in entries), entries)
+        rescue_map.current_pos, rescue_map.current_status = current_pos, current_status
+        return rescue_map
+
+
+class DeviceReader:
+    """
+    Plain pread() access to a (possibly failing) device or file. Unlike the
+    memory-mapped sources, a bad sector surfaces as an OSError on the read
+    instead of a SIGBUS.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        # Block devices report size 0 to stat; seek to the end instead
+        self.size = os.lseek(self._fd, 0, os.SEEK_END)
+
+    def read(self, offset: int, length: int) -> bytes:
+        return os.pread(self._fd, length, offset)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class RescueImager:
+    """
+    ddrescue-style imager for failing drives.
+
+    Pass 1 copies everything it can with large reads, marking a failed read
+    as non-trimmed and moving on, so healthy areas are secured before the
+    drive degrades further. Later passes revisit the failed ranges with
+    reads shrinking by SHRINK_FACTOR down to one sector; sectors that still
+    fail after `retries` extra attempts are recorded as bad. Progress is
+    kept in a ddrescue mapfile, so an interrupted run resumes where it
+    stopped, and DiskScanner treats the ranges the map does not mark as
+    rescued as holes.
+    """
+
+    def __init__(self, source, dest_path: str, map_path: Optional[str] = None,
+                 sector_size: int = DEFAULT_SECTOR_SIZE, read_size: int = DEFAULT_READ_SIZE,
+                 retries: int = 1, save_interval: float = 5.0):
+        """
+        Args:
+            source: Device/file path, or an object with `size` and
+                read(offset, length) raising OSError on unreadable data.
+            dest_path: Image file to write (created sparse; reused on resume).
+            map_path: Mapfile path (default: <dest_path>.rescue.map).
+        """
+        self._owns_source = isinstance(source, str)
+        self.source = DeviceReader(source) if self._owns_source else source
+        self.dest_path = dest_path
+        self.map_path = map_path or RescueMap.default_path(dest_path)
+        self.sector_size = sector_size
+        self.read_size = max(sector_size, read_size // sector_size * sector_size)
+        self.retries = retries
+        self.save_interval = save_interval
+        self.read_errors = 0
+        self._last_save = time.monotonic()
+
+        existing = RescueMap.load(self.map_path)
+        self.map = existing if existing is not None and existing.size == self.source.size \
+            else RescueMap(self.source.size)
+
+    def _save(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if force or now - self._last_save >= self.save_interval:
+            self.map.save(self.map_path)
+            self._last_save = now
+
+    def _try_read(self, fd: int, offset: int, length: int, attempts: int = 1) -> bool:
+        """Copies one piece to the image; False if every attempt failed."""
+        for _ in range(attempts):
+            try:
+                data = self.source.read(offset, length)
+            except OSError:
+                self.read_errors += 1
+                continue
+            if len(data) != length:
+                self.read_errors += 1
+                continue
+            os.pwrite(fd, data, offset)
+            return True
+        return False
+
+    def _pass(self, fd: int, status: str, piece_size: int, fail_status: str, attempts: int = 1) -> None:
+        """Reads every `status` range in pieces, marking each piece rescued or `fail_status`."""
+        self.map.current_status = status
+        for start, end in self.map.ranges([status]):
+            pos = start
+            while pos < end:
+                # Keep pieces aligned so a bad sector is isolated in later passes
+                n = min(piece_size - pos % piece_size, end - pos)
+                ok = self._try_read(fd, pos, n, attempts)
+                self.map.set_status(pos, pos + n, FINISHED if ok else fail_status)
+                pos += n
+                self.map.current_pos = pos
+                self._save()
+
+    def piece_sizes(self) -> List[int]:
+        """Read sizes of the retry passes, shrinking down to one sector."""
+        sizes = []
+        size = self.read_size
+        while size > self.sector_size:
+            size = max(self.sector_size, size // SHRINK_FACTOR // self.sector_size * self.sector_size)
+            sizes.append(size)
+        return sizes
+
+    def run(self) -> Dict[str, int]:
+        """Runs (or resumes) all passes; returns byte totals per state."""
+        fd = os.open(self.dest_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < self.map.size:
+                os.ftruncate(fd, self.map.size)  # Sparse until rescued
+            self._pass(fd, NON_TRIED, self.read_size, NON_TRIMMED)
+            sizes = self.piece_sizes()
+            for size in sizes[:-1]:
+                self._pass(fd, NON_TRIMMED, size, NON_TRIMMED)
+            self._pass(fd, NON_TRIMMED, self.sector_size, BAD_SECTOR, attempts=1 + self.retries)
+            self.map.current_status = FINISHED
+        finally:
+            os.close(fd)
+            self._save(force=True)
+        return self.summary()
+
+    def summary(self) -> Dict[str, int]:
+        """Returns { "size", "rescued", "bad", "pending", "read_errors" } in bytes."""
+        totals = self.map.totals()
+        return {
+            "size": self.map.size,
+            "rescued": totals[FINISHED],
+            "bad": totals[BAD_SECTOR],
+            "pending": totals[NON_TRIED] + totals[NON_TRIMMED] + totals["/"],
+            "read_errors": self.read_errors,
+        }
+
+    def close(self) -> None:
+        if self._owns_source:
+            self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
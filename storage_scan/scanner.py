@@ -1,7 +1,70 @@
-import os
 import mmap
-import math
-from typing import Generator, Tuple, Optional
+import time
+from typing import Generator, Iterable, List, NamedTuple, Tuple, Optional
+
+import numpy as np
+
+from storage_scan.cache import BlockCache
+from storage_scan.hashing import DEFAULT_REGION_SIZE, ImageHasher, ImageHashTree
+from storage_scan.extents import subtract_extents
+from storage_scan.rescue import RescueMap
+from storage_scan.sources import ImageSource, image_exists, open_source
+from storage_scan.prefetch import Prefetcher
+from storage_scan.throttle import IOThrottle
+
+# Default size of the zero-copy views yielded by DiskScanner.scan_chunks.
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+# Random-access block cache: chunks of 8 blocks, 4 MiB in total at 512-byte blocks
+DEFAULT_CACHE_CHUNKS = 1024
+CACHE_CHUNK_BLOCKS = 8
+
+
+class ScanSegment(NamedTuple):
+    """
+    A contiguous piece of the image yielded by DiskScanner.scan_segments.
+    Data segments carry a (n_blocks, block_size) view in `blocks`; empty runs
+    carry the fill byte (0x00 or 0xFF) in `fill` and no block data.
+    """
+    offset: int
+    length: int
+    blocks: Optional[np.ndarray]
+    fill: Optional[int]
+
+
+def split_fill_runs(offset: int, blocks: np.ndarray, block_size: int) -> Generator[ScanSegment, None, None]:
+    """Splits a (n_blocks, block_size) chunk into runs of data blocks and constant-fill blocks."""
+    lo = blocks.min(axis=1)
+    hi = blocks.max(axis=1)
+    # -1 marks data blocks, otherwise the fill byte
+    label = np.where((lo == hi) & ((lo == 0x00) | (lo == 0xFF)), lo.astype(np.int16), -1)
+    bounds = [0, *(np.flatnonzero(np.diff(label)) + 1).tolist(), len(blocks)]
+    for first, last in zip(bounds, bounds[1:]):
+        run_offset = offset + first * block_size
+        run_length = (last - first) * block_size
+        if label[first] < 0:
+            yield ScanSegment(run_offset, run_length, blocks[first:last], None)
+        else:
+            yield ScanSegment(run_offset, run_length, None, int(label[first]))
+
+
+def coalesce_fill_runs(segments: Iterable[ScanSegment]) -> Generator[ScanSegment, None, None]:
+    """Merges adjacent fill segments with the same fill byte (e.g. across chunks)."""
+    pending: Optional[ScanSegment] = None
+    for segment in segments:
+        if (segment.fill is not None and pending is not None
+                and pending.fill == segment.fill
+                and pending.offset + pending.length == segment.offset):
+            pending = pending._replace(length=pending.length + segment.length)
+            continue
+        if pending is not None:
+            yield pending
+            pending = None
+        if segment.fill is not None:
+            pending = segment
+        else:
+            yield segment
+    if pending is not None:
+        yield pending
 
 
 class DiskScanner:
@@ -11,31 +74,42 @@ class DiskScanner:
     Operates in a strictly read-only mode.
     """
 
-    def __init__(self, disk_image_path: str, block_size: int = 512):
+    def __init__(self, disk_image_path: str, block_size: int = 512, direct_io: bool = False,
+                 prefetch_window: int = 0, cache_chunks: int = DEFAULT_CACHE_CHUNKS,
+                 max_read_rate: float = 0.0):
         self.disk_image_path = disk_image_path
         self.block_size = block_size
         self.cluster_size: int = block_size  # Default: 1 block per cluster
         self.data_offset: int = 0             # Offset to data area (sectors)
         
-        if not os.path.exists(disk_image_path):
+        if not image_exists(disk_image_path):
             raise FileNotFoundError(f"Storage image not found: {disk_image_path}")
-        
-        self.file_size = os.path.getsize(disk_image_path)
-        self._file_obj = open(self.disk_image_path, "rb")
-        self.mm: Optional[mmap.mmap] = None
-        
-        try:
-            # Create a read-only memory map
-            self.mm = mmap.mmap(self._file_obj.fileno(), 0, access=mmap.ACCESS_READ)
-        except (OSError, ValueError):
-            # Fallback if mmap fails (e.g., zero-length file or OS constraints)
-            self.mm = None
+
+        # Single files, split segment sets, containers and URLs are detected from the path;
+        # direct_io reads raw images with O_DIRECT instead of mmap
+        self.source: ImageSource = open_source(disk_image_path, direct_io=direct_io)
+        self.file_size = self.source.size
+        self.mm: Optional[mmap.mmap] = getattr(self.source, "mm", None)
+        # Chunks loaded ahead by a background thread during scan_chunks (0: off)
+        self.prefetch_window = prefetch_window
+        self._prefetcher: Optional[Prefetcher] = None
+        # Caps scan_chunks reads at max_read_rate MB/s, backing off under contention (0: off)
+        self.throttle: Optional[IOThrottle] = IOThrottle.from_mb_per_second(max_read_rate)
+        # Serves read_block/read_many and small read_range calls
+        self.block_cache = BlockCache(self.source, block_size, cache_chunks, CACHE_CHUNK_BLOCKS)
+        # Fed by scan_segments once enable_hashing() is called
+        self.hasher: Optional[ImageHasher] = None
+        # Ranges a rescue imager could not read are known holes, not zeros
+        rescue_map = RescueMap.load(RescueMap.default_path(disk_image_path))
+        self.unreadable_ranges: List[Tuple[int, int]] = rescue_map.unreadable() if rescue_map else []
 
     def close(self) -> None:
-        """Closes the memory map and file handle."""
-        if self.mm:
-            self.mm.close()
-        self._file_obj.close()
+        """Closes the memory maps and file handles of the image source."""
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+        self.block_cache.clear()
+        self.source.close()
 
     def __enter__(self):
         return self
@@ -44,16 +118,27 @@ class DiskScanner:
         self.close()
 
     def read_block(self, block_index: int) -> bytes:
-        """Reads a specific block from the image."""
+        """Reads a specific block from the image (through the block cache)."""
         offset = block_index * self.block_size
         if offset >= self.file_size:
             return b""
-        
-        if self.mm:
-            return self.mm[offset : offset + self.block_size]
-        else:
-            self._file_obj.seek(offset)
-            return self._file_obj.read(self.block_size)
+        return self.block_cache.read_range(offset, self.block_size)
+
+    def read_many(self, offsets: List[int], length: Optional[int] = None) -> List[bytes]:
+        """
+        Reads `length` bytes (default: one block) at each byte offset in one
+        batch through the block cache, e.g. the neighbours of many fragments.
+        """
+        return self.block_cache.read_many(offsets, length)
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Reads `length` bytes starting at `offset` (truncated at end of image).
+        Short reads go through the block cache; large ones bypass it.
+        """
+        if length <= self.block_cache.chunk_size:
+            return self.block_cache.read_range(offset, length)
+        return self.source.read(offset, length)
 
     def scan_blocks(self) -> Generator[Tuple[int, bytes], None, None]:
         """
@@ -61,7 +146,170 @@ class DiskScanner:
         """
         num_blocks = self.file_size // self.block_size
         for i in range(num_blocks):
-            yield i * self.block_size, self.read_block(i)
+            # Sequential pass: bypass the random-access cache
+            yield i * self.block_size, self.source.read(i * self.block_size, self.block_size)
+
+    def scan_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    start: int = 0, end: Optional[int] = None) -> Generator[Tuple[int, np.ndarray], None, None]:
+        """
+        Reads the disk image in large chunks and yields (base_offset, blocks)
+        pairs, where blocks is a read-only (n_blocks, block_size) uint8 view
+        over the memory map. No bytes are copied; like scan_blocks, a trailing
+        partial block is not yielded.
+        start/end restrict the scan to a byte range; start is rounded down and
+        end rounded up to block boundaries. With a prefetch_window, the next
+        chunks are loaded on a background thread while the caller works.
+        With a throttle, chunks are handed out no faster than its rate.
+        """
+        ranges = self._chunk_ranges(chunk_size, start, end)
+        if self.throttle is not None:
+            ranges = self._throttled(ranges)
+        if self.prefetch_window > 0:
+            # Overlap reading the next chunks with analysis of this one
+            if self._prefetcher is None:
+                self.source.advise_sequential()
+                self._prefetcher = Prefetcher(self.source, self.prefetch_window)
+            ranges = self._prefetcher.iterate(ranges)
+        # With a prefetcher the reads happen on its thread, where they cannot be timed
+        timed = self.throttle is not None and self.throttle.adaptive and self.prefetch_window <= 0
+        for offset, length in ranges:
+            if not timed:
+                yield offset, self._block_view(offset, length // self.block_size)
+                continue
+            # Load the chunk before handing it out so its read latency can be measured:
+            # prefetch() reads lazily mapped sources, view() sources that read into
+            # their own buffers (e.g. O_DIRECT)
+            started = time.perf_counter()
+            self.source.prefetch(offset, length)
+            blocks = self._block_view(offset, length // self.block_size)
+            self.throttle.record_latency(time.perf_counter() - started, length)
+            yield offset, blocks
+
+    def _throttled(self, ranges: Iterable[Tuple[int, int]]) -> Generator[Tuple[int, int], None, None]:
+        """Paces chunk ranges through the throttle."""
+        for offset, length in ranges:
+            self.throttle.acquire(length)
+            yield offset, length
+
+    def _chunk_ranges(self, chunk_size: int, start: int,
+                      end: Optional[int]) -> Generator[Tuple[int, int], None, None]:
+        """Yields the (offset, length) of every chunk scan_chunks will view."""
+        blocks_per_chunk = max(1, chunk_size // self.block_size)
+        num_blocks = self.file_size // self.block_size
+        first_block = start // self.block_size
+        if end is not None:
+            num_blocks = min(num_blocks, -(-end // self.block_size))
+        # Chunks end at source split points (e.g. segment boundaries) so
+        # views stay zero-copy; only a block straddling one is assembled.
+        splits = [p for p in self.source.split_points if first_block * self.block_size < p]
+        block = first_block
+        while block < num_blocks:
+            n_blocks = min(blocks_per_chunk, num_blocks - block)
+            offset = block * self.block_size
+            while splits and splits[0] <= offset:
+                splits.pop(0)
+            if splits and splits[0] < offset + n_blocks * self.block_size:
+                n_blocks = max(1, (splits[0] - offset) // self.block_size)
+            yield offset, n_blocks * self.block_size
+            block += n_blocks
+
+    def scan_segments(self, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      start: int = 0, end: Optional[int] = None) -> Generator[ScanSegment, None, None]:
+        """
+        Like scan_chunks, but skips empty space. Holes of sparse image files
+        are never read, and runs of all-0x00 or all-0xFF blocks are detected
+        per chunk with vectorized min/max. Empty space is yielded as
+        run-length ScanSegments (coalesced across chunks), data as block views.
+        """
+        segments = coalesce_fill_runs(self._raw_segments(chunk_size, start, end))
+        if self.hasher is not None:
+            return self._hashed(segments)
+        return segments
+
+    def _hashed(self, segments: Iterable[ScanSegment]) -> Generator[ScanSegment, None, None]:
+        for segment in segments:
+            self.hasher.update_segment(segment)
+            yield segment
+
+    def enable_hashing(self, region_size: int = DEFAULT_REGION_SIZE) -> ImageHasher:
+        """
+        Hashes the image in the read pass of scan_segments: a full scan from
+        offset 0 then yields its MD5/SHA-256 and region hash tree through
+        finish_hashing() without a separate read of the image.
+        """
+        self.hasher = ImageHasher(region_size)
+        return self.hasher
+
+    def finish_hashing(self) -> Optional[ImageHashTree]:
+        """
+        Completes the hashes of a full scan (adding the trailing partial
+        block scans skip). Returns None if hashing was not enabled or the
+        scan did not cover the whole image.
+        """
+        if self.hasher is None:
+            return None
+        if self.hasher.position < self.file_size:
+            tail = (self.file_size // self.block_size) * self.block_size
+            if self.hasher.position == tail:
+                self.hasher.update(tail, self.source.read(tail, self.file_size - tail))
+        if self.hasher.position != self.file_size:
+            return None
+        return self.hasher.finalize()
+
+    def scan_extents(self, extents: List[Tuple[int, int]],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Generator[ScanSegment, None, None]:
+        """
+        Runs scan_segments over each (start, end) byte range in turn, e.g. the
+        unallocated extents reported by a file system parser.
+        """
+        for start, end in extents:
+            yield from self.scan_segments(chunk_size, start, end)
+
+    def _raw_segments(self, chunk_size: int, start: int,
+                      end: Optional[int]) -> Generator[ScanSegment, None, None]:
+        """Yields uncoalesced hole, fill and data segments in offset order."""
+        limit = (self.file_size // self.block_size) * self.block_size
+        if end is not None:
+            limit = min(limit, -(-end // self.block_size) * self.block_size)
+        cursor = (start // self.block_size) * self.block_size
+
+        for data_start, data_end in self.data_extents(cursor, limit):
+            if data_start > cursor:
+                yield ScanSegment(cursor, data_start - cursor, None, 0)
+            for offset, blocks in self.scan_chunks(chunk_size, data_start, data_end):
+                yield from split_fill_runs(offset, blocks, self.block_size)
+            cursor = data_end
+        if cursor < limit:
+            yield ScanSegment(cursor, limit - cursor, None, 0)
+
+    def data_extents(self, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Returns block-aligned (start, end) byte ranges of the image that hold
+        data, as reported by the image source (SEEK_DATA/SEEK_HOLE on sparse
+        image files). Falls back to the whole range where the OS or file
+        system lacks support. Blocks a rescue map marks as unread are left out.
+        """
+        end = self.file_size if end is None else min(end, self.file_size)
+        extents: List[Tuple[int, int]] = []
+        for data_start, data_end in self.source.data_extents(start, end):
+            # Widen to block boundaries so no partial block is skipped
+            aligned_start = max(start, (data_start // self.block_size) * self.block_size)
+            aligned_end = min(end, -(-data_end // self.block_size) * self.block_size)
+            if extents and aligned_start <= extents[-1][1]:
+                extents[-1] = (extents[-1][0], max(extents[-1][1], aligned_end))
+            else:
+                extents.append((aligned_start, aligned_end))
+        if self.unreadable_ranges:
+            # Only blocks lying entirely inside an unread range are dropped
+            bs = self.block_size
+            holes = [(-(-s // bs) * bs, e // bs * bs) for s, e in self.unreadable_ranges]
+            extents = subtract_extents(extents, holes)
+        return extents
+
+    def _block_view(self, offset: int, n_blocks: int) -> np.ndarray:
+        """Returns n_blocks blocks starting at offset as a 2-D uint8 array."""
+        data = self.source.view(offset, n_blocks * self.block_size)
+        return data.reshape(n_blocks, self.block_size)
 
     def set_filesystem_info(self, cluster_size: int, data_offset: int) -> None:
         """Configures file system specific parameters for mapping."""
@@ -83,17 +331,7 @@ class DiskScanner:
         """
         if not data:
             return 0.0
-        
-        entropy = 0.0
-        # Count frequency of each byte (0-255)
-        counts = [0] * 256
-        for b in data:
-            counts[b] += 1
-        
-        for count in counts:
-            if count == 0:
-                continue
-            p = count / len(data)
-            entropy -= p * math.log2(p)
-            
-        return entropy
+
+        counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        p = counts[counts > 0] / len(data)
+        return float(-(p * np.log2(p)).sum())
@@ -0,0 +1,353 @@
+import abc
+import bisect
+import errno
+import json
+import mmap
+import os
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Numbered split segments: image.001, image.002, ...
+SPLIT_SUFFIX = re.compile(r"^(?P<base>.*)\.(?P<index>\d{3,})$")
+# Piece size of the reads FileSource.prefetch issues to fill the page cache
+PREFETCH_READ_SIZE = 1024 * 1024
+# Image paths served over HTTP(S) range requests
+REMOTE_PREFIXES = ("http://", "https://")
+
+
+def is_remote_path(path: str) -> bool:
+    """Whether an image path is a URL read through HTTPRangeSource."""
+    return path.lower().startswith(REMOTE_PREFIXES)
+
+
+def image_exists(path: str) -> bool:
+    """Whether an image path can be opened (URLs are checked when opened)."""
+    return is_remote_path(path) or os.path.exists(path)
+
+
+def sidecar_path(image_path: str, suffix: str) -> str:
+    """
+    Path of a file stored alongside an image (entropy map, journal, ...).
+    Remote images keep theirs in their local cache directory, which is
+    created on demand.
+    """
+    if is_remote_path(image_path):
+        from storage_scan.remote import remote_sidecar_base
+        base = remote_sidecar_base(image_path)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        return base + suffix
+    return image_path + suffix
+
+
+def seek_data_extents(fd: int, start: int, end: int) -> List[Tuple[int, int]]:
+    """
+    Returns (start, end) ranges of an open file that hold data, using
+    SEEK_DATA/SEEK_HOLE to skip holes of sparse files. Falls back to the
+    whole range where the OS or file system lacks support.
+    """
+    if start >= end:
+        return []
+    if not hasattr(os, "SEEK_DATA"):
+        return [(start, end)]
+
+    extents: List[Tuple[int, int]] = []
+    pos = start
+    try:
+        while pos < end:
+            try:
+                data_start = os.lseek(fd, pos, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # No data past pos
+                    break
+                raise
+            if data_start >= end:
+                break
+            data_end = min(os.lseek(fd, data_start, os.SEEK_HOLE), end)
+            extents.append((data_start, data_end))
+            pos = data_end
+    except OSError:
+        return [(start, end)]
+    return extents
+
+
+class ImageSource(abc.ABC):
+    """
+    Random-access byte source behind a DiskScanner.
+    Subclasses provide `size`, read() and close(); view() and
+    data_extents() have generic fallbacks.
+    """
+
+    path: str = ""
+    size: int = 0
+    # Offsets where zero-copy views cannot continue (e.g. segment boundaries)
+    split_points: List[int] = []
+
+    @abc.abstractmethod
+    def read(self, offset: int, length: int) -> bytes:
+        """Reads `length` bytes starting at `offset` (truncated at the end)."""
+
+    def view(self, offset: int, length: int) -> np.ndarray:
+        """Returns `length` bytes at `offset` as a read-only 1-D uint8 array."""
+        return np.frombuffer(self.read(offset, length), dtype=np.uint8)
+
+    def data_extents(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """(start, end) ranges within [start, end) that may hold data."""
+        return [(start, end)] if start < end else []
+
+    def advise_sequential(self) -> None:
+        """Hints that the source is about to be read front to back."""
+
+    def prefetch(self, offset: int, length: int) -> None:
+        """
+        Loads a range that will be read soon (called from a background
+        thread by Prefetcher; may block until the data is cached).
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Releases the file handles, maps or connections behind the source."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FileSource(ImageSource):
+    """A single raw image file, memory-mapped read-only where possible."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file_obj = open(path, "rb")
+        self.mm: Optional[mmap.mmap] = None
+        try:
+            self.mm = mmap.mmap(self._file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Fallback if mmap fails (e.g., zero-length file or OS constraints)
+            self.mm = None
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset >= self.size or length <= 0:
+            return b""
+        if self.mm:
+            return self.mm[offset:offset + length]
+        self._file_obj.seek(offset)
+        return self._file_obj.read(length)
+
+    def view(self, offset: int, length: int) -> np.ndarray:
+        if self.mm:
+            return np.frombuffer(self.mm, dtype=np.uint8, count=length, offset=offset)
+        return super().view(offset, length)
+
+    def data_extents(self, start: int, end: int) -> List[Tuple[int, int]]:
+        return seek_data_extents(self._file_obj.fileno(), start, min(end, self.size))
+
+    def advise_sequential(self) -> None:
+        """Asks the kernel for aggressive readahead on the memory map."""
+        if self.mm and hasattr(mmap, "MADV_SEQUENTIAL"):
+            self.mm.madvise(mmap.MADV_SEQUENTIAL)
+
+    def prefetch(self, offset: int, length: int) -> None:
+        """
+        Pulls a range into the page cache: MADV_WILLNEED starts readahead,
+        and reading it through the file descriptor makes sure the data is
+        resident even where the hint is ignored (e.g. network file systems).
+        """
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return
+        if self.mm and hasattr(mmap, "MADV_WILLNEED"):
+            start = offset // mmap.PAGESIZE * mmap.PAGESIZE
+            self.mm.madvise(mmap.MADV_WILLNEED, start, end - start)
+        scratch = bytearray(min(PREFETCH_READ_SIZE, end - offset))
+        fd = self._file_obj.fileno()
+        while offset < end:
+            with memoryview(scratch)[:min(len(scratch), end - offset)] as piece:
+                n = os.preadv(fd, [piece], offset)
+            if n <= 0:
+                break
+            offset += n
+
+    def close(self) -> None:
+        if self.mm:
+            try:
+                self.mm.close()
+            except BufferError:
+                # Views handed out by view() are still alive; the map is
+                # released once they are garbage collected.
+                pass
+        self._file_obj.close()
+
+
+class SplitImageSource(ImageSource):
+    """
+    A split raw acquisition (image.001, image.002, ...) presented as one
+    device. Every segment keeps its own memory map; a global offset is
+    mapped to its segment with a binary search over the segment starts.
+    Views inside one segment are zero-copy; only a range that crosses a
+    segment boundary is assembled into a new buffer.
+    """
+
+    def __init__(self, paths: List[str]):
+        if not paths:
+            raise ValueError("SplitImageSource needs at least one segment")
+        self.path = paths[0]
+        self.segments = [FileSource(p) for p in paths]
+        self._starts: List[int] = []
+        total = 0
+        for segment in self.segments:
+            self._starts.append(total)
+            total += segment.size
+        self.size = total
+        self.split_points = self._starts[1:]
+
+    def _locate(self, offset: int) -> int:
+        """Index of the segment containing offset."""
+        return bisect.bisect_right(self._starts, offset) - 1
+
+    def _pieces(self, offset: int, length: int):
+        """Yields (segment, local_offset, piece_length) covering the range."""
+        end = min(offset + length, self.size)
+        index = self._locate(offset)
+        while offset < end:
+            segment = self.segments[index]
+            local = offset - self._starts[index]
+            piece = min(end - offset, segment.size - local)
+            if piece > 0:
+                yield segment, local, piece
+                offset += piece
+            index += 1
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset >= self.size or length <= 0:
+            return b""
+        return b"".join(segment.read(local, piece) for segment, local, piece in self._pieces(offset, length))
+
+    def view(self, offset: int, length: int) -> np.ndarray:
+        pieces = list(self._pieces(offset, length))
+        if len(pieces) == 1:
+            segment, local, piece = pieces[0]
+            return segment.view(local, piece)
+        out = np.empty(sum(piece for _, _, piece in pieces), dtype=np.uint8)
+        pos = 0
+        for segment, local, piece in pieces:
+            out[pos:pos + piece] = segment.view(local, piece)
+            pos += piece
+        out.flags.writeable = False
+        return out
+
+    def data_extents(self, start: int, end: int) -> List[Tuple[int, int]]:
+        extents: List[Tuple[int, int]] = []
+        end = min(end, self.size)
+        if start >= end:
+            return extents
+        for segment, local, piece in self._pieces(start, end - start):
+            base = start - local
+            for s, e in segment.data_extents(local, local + piece):
+                if extents and base + s <= extents[-1][1]:
+                    extents[-1] = (extents[-1][0], base + e)
+                else:
+                    extents.append((base + s, base + e))
+            start += piece
+        return extents
+
+    def advise_sequential(self) -> None:
+        for segment in self.segments:
+            segment.advise_sequential()
+
+    def prefetch(self, offset: int, length: int) -> None:
+        for segment, local, piece in self._pieces(offset, length):
+            segment.prefetch(local, piece)
+
+    def close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+
+
+def split_segments(path: str) -> Optional[List[str]]:
+    """
+    Returns the ordered segment paths of a numbered split image given any
+    of its segments (image.001 -> [image.001, image.002, ...]), or None if
+    path is not part of a split set.
+    """
+    match = SPLIT_SUFFIX.match(path)
+    if not match:
+        return None
+    base, width = match.group("base"), len(match.group("index"))
+    first = 0 if os.path.exists(f"{base}.{0:0{width}d}") else 1
+    paths = []
+    index = first
+    while os.path.exists(f"{base}.{index:0{width}d}"):
+        paths.append(f"{base}.{index:0{width}d}")
+        index += 1
+    return paths if len(paths) > 1 else None
+
+
+def open_source(path: str, direct_io: bool = False) -> ImageSource:
+    """
+    Opens the ImageSource matching an image path (detected from its name and
+    magic bytes). With direct_io, plain raw images are read with O_DIRECT
+    through DirectFileSource instead of being memory-mapped. http(s) URLs
+    are read with range requests through HTTPRangeSource, which keeps
+    downloaded blocks on disk only if STORAGE_SCAN_DISK_CACHE_MB is set.
+    """
+    # Imported here: the container readers build on this module
+    from storage_scan.compressed import CompressedImageSource, is_compressed_image
+    from storage_scan.virtual_disk import Qcow2Source, VHDSource, detect_virtual_disk
+    from storage_scan.raid import RaidSource, SUFFIX as RAID_SUFFIX
+
+    if is_remote_path(path):
+        from storage_scan import remote
+        # Downloaded blocks are only kept on disk when a cache size is configured
+        if remote.DISK_CACHE_BYTES > 0:
+            return remote.HTTPRangeSource(path, cache_dir=remote.remote_cache_dir(path),
+                                          max_disk_cache=remote.DISK_CACHE_BYTES)
+        return remote.HTTPRangeSource(path)
+    if path.endswith(RAID_SUFFIX):
+        return RaidSource.from_descriptor(path)
+    segments = split_segments(path)
+    if segments:
+        return SplitImageSource(segments)
+    if is_compressed_image(path):
+        return CompressedImageSource(path)
+    disk_type = detect_virtual_disk(path)
+    if disk_type == "qcow2":
+        return Qcow2Source(path)
+    if disk_type == "vhd":
+        return VHDSource(path)
+    if direct_io:
+        from storage_scan.direct_io import DirectFileSource
+        return DirectFileSource(path)
+    return FileSource(path)
+
+
+def image_size(path: str) -> int:
+    """Size in bytes of the device an image path describes."""
+    with open_source(path) as source:
+        return source.size
+
+
+def image_mtime(path: str) -> Optional[int]:
+    """
+    Latest modification time (ns) of the local files holding an image:
+    every segment of a split set, or a RAID descriptor and its members.
+    None for URLs and paths that are not files (e.g. streams).
+    """
+    from storage_scan.raid import SUFFIX as RAID_SUFFIX
+
+    if is_remote_path(path):
+        return None
+    paths = split_segments(path) or [path]
+    try:
+        if path.endswith(RAID_SUFFIX):
+            with open(path, "r") as f:
+                members = json.load(f)["members"]
+            base = os.path.dirname(os.path.abspath(path))
+            paths += [os.path.join(base, m) for m in members if m]
+        return max(os.stat(p).st_mtime_ns for p in paths)
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,146 @@
+import contextlib
+import os
+import stat
+import sys
+from collections import deque
+from typing import BinaryIO, Callable, Deque, Generator, Optional, Tuple
+
+import numpy as np
+
+from storage_scan.scanner import DEFAULT_CHUNK_SIZE, ScanSegment, coalesce_fill_runs, split_fill_runs
+
+# Bytes of already-scanned data kept for read_range() look-backs
+DEFAULT_LOOKBACK = 16 * 1024 * 1024
+STDIN_PATH = "-"
+
+
+def is_stream_path(path: str) -> bool:
+    """Whether path names stdin ("-"), a FIFO or a socket rather than a seekable image."""
+    if path == STDIN_PATH:
+        return True
+    try:
+        mode = os.stat(path).st_mode
+    except OSError:
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+
+def open_stream(path: str):
+    """Opens a stream path for binary reading; "-" is stdin (left open on exit)."""
+    if path == STDIN_PATH:
+        return contextlib.nullcontext(sys.stdin.buffer)
+    return open(path, "rb", buffering=0)
+
+
+class StreamScanner:
+    """
+    Forward-only counterpart of DiskScanner for sources that cannot seek or
+    be memory-mapped, e.g. `dd if=/dev/sdb | python main.py --image -`.
+    Chunks are read in order and yielded with the same (offset, blocks)
+    and ScanSegment shapes as DiskScanner, so carvers run unchanged in a
+    single pass. The most recent `lookback` bytes stay available to
+    read_range() for carvers that need context behind the current chunk.
+    """
+
+    def __init__(self, stream: BinaryIO, block_size: int = 512,
+                 lookback: int = DEFAULT_LOOKBACK,
+                 progress: Optional[Callable[[int], None]] = None):
+        self.stream = stream
+        self.block_size = block_size
+        self.lookback = lookback
+        self.progress = progress
+        self.bytes_read = 0
+        self.eof = False
+        # (offset, chunk) pairs, oldest first
+        self._window: Deque[Tuple[int, bytearray]] = deque()
+        self._window_bytes = 0
+
+    @property
+    def file_size(self) -> int:
+        """Bytes consumed so far (the total is only known at end of stream)."""
+        return self.bytes_read
+
+    def _fill(self, buffer: bytearray) -> int:
+        """Reads until buffer is full or the stream ends (pipes return short reads)."""
+        view = memoryview(buffer)
+        total = 0
+        while total < len(buffer):
+            n = self.stream.readinto(view[total:])
+            if not n:
+                self.eof = True
+                break
+            total += n
+        view.release()
+        return total
+
+    def _remember(self, offset: int, chunk: bytearray) -> None:
+        self._window.append((offset, chunk))
+        self._window_bytes += len(chunk)
+        while self._window and self._window_bytes - len(self._window[0][1]) >= self.lookback:
+            self._window_bytes -= len(self._window.popleft()[1])
+
+    def scan_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Generator[Tuple[int, np.ndarray], None, None]:
+        """
+        Reads the stream to its end and yields (base_offset, blocks) pairs,
+        blocks being a read-only (n_blocks, block_size) array. A trailing
+        partial block is not yielded but stays readable via read_range().
+        """
+        chunk_size = max(1, chunk_size // self.block_size) * self.block_size
+        while not self.eof:
+            # A fresh buffer per chunk: yielded views and the look-back window keep it alive
+            buffer = bytearray(chunk_size)
+            n = self._fill(buffer)
+            if n == 0:
+                break
+            offset = self.bytes_read
+            del buffer[n:]
+            self.bytes_read += n
+            self._remember(offset, buffer)
+            if self.progress is not None:
+                self.progress(self.bytes_read)
+            n_blocks = n // self.block_size
+            if n_blocks:
+                blocks = np.frombuffer(buffer, dtype=np.uint8, count=n_blocks * self.block_size)
+                blocks.flags.writeable = False
+                yield offset, blocks.reshape(n_blocks, self.block_size)
+
+    def scan_segments(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Generator[ScanSegment, None, None]:
+        """Like scan_chunks, with 0x00/0xFF runs reported as fill segments (see DiskScanner.scan_segments)."""
+        return coalesce_fill_runs(
+            segment
+            for offset, blocks in self.scan_chunks(chunk_size)
+            for segment in split_fill_runs(offset, blocks, self.block_size)
+        )
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Reads already-scanned bytes from the look-back window (truncated at
+        the data read so far). Raises ValueError for bytes that have been
+        discarded or not read yet.
+        """
+        end = min(offset + length, self.bytes_read)
+        if offset >= end:
+            if length <= 0 or self.eof:
+                return b""
+            raise ValueError(f"Offset {offset} has not been read from the stream yet")
+        if not self._window or offset < self._window[0][0]:
+            raise ValueError(f"Offset {offset} is outside the {self.lookback}-byte look-back window")
+        pieces = []
+        for chunk_offset, chunk in self._window:
+            if chunk_offset + len(chunk) <= offset:
+                continue
+            if chunk_offset >= end:
+                break
+            pieces.append(chunk[max(0, offset - chunk_offset):end - chunk_offset])
+        return b"".join(pieces)
+
+    def close(self) -> None:
+        """Drops the look-back window; the stream belongs to the caller."""
+        self._window.clear()
+        self._window_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
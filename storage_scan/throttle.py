@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+MB = 1024 * 1024
+# Rate never drops below this fraction of the configured maximum
+MIN_RATE_FRACTION = 0.1
+# Latency (per MiB) this many times the best seen counts as contention
+CONTENTION_FACTOR = 2.0
+# Seconds per MiB below which reads count as cache hits, not device latency
+MIN_LATENCY = 1e-4
+BACKOFF = 0.7
+RECOVERY = 1.1
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA = 0.3
+DEFAULT_NICENESS = 10
+
+
+class IOThrottle:
+    """
+    Token bucket limiting scan reads to `max_rate` bytes per second, with
+    up to `burst` seconds of unused budget saved up.
+
+    With `adaptive`, the rate also follows the device: read latency per
+    MiB is tracked as a moving average against the best seen so far; when
+    it climbs past CONTENTION_FACTOR times that baseline (other jobs are
+    queueing on the disk) the rate backs off multiplicatively, and it
+    recovers step by step towards max_rate once latency settles.
+    """
+
+    def __init__(self, max_rate: float, burst: float = 1.0, adaptive: bool = True,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        self.max_rate = float(max_rate)
+        self.rate = float(max_rate)
+        self.burst = burst
+        self.adaptive = adaptive
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.rate * burst
+        self._last = clock()
+        self._lock = threading.Lock()
+        self.baseline_latency: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.throttled_seconds = 0.0
+
+    @classmethod
+    def from_mb_per_second(cls, mb_per_second: Optional[float], **kwargs) -> Optional["IOThrottle"]:
+        """Throttle for a MB/s setting; None (no throttling) for 0 or None."""
+        return cls(mb_per_second * MB, **kwargs) if mb_per_second else None
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.rate * self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, nbytes: int) -> float:
+        """Blocks until `nbytes` may be read; returns the seconds waited."""
+        with self._lock:
+            self._refill()
+            self._tokens -= nbytes
+            # Debt is paid off by waiting; larger-than-burst reads still pass
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+            self.throttled_seconds += wait
+        return wait
+
+    def record_latency(self, seconds: float, nbytes: int) -> None:
+        """Feeds the observed duration of a read of `nbytes` into the adaptive rate."""
+        if not self.adaptive or nbytes <= 0:
+            return
+        per_mb = seconds / (nbytes / MB)
+        with self._lock:
+            self.latency = per_mb if self.latency is None else \
+                LATENCY_EWMA * per_mb + (1 - LATENCY_EWMA) * self.latency
+            if self.baseline_latency is None or per_mb < self.baseline_latency:
+                self.baseline_latency = per_mb
+            if self.latency > CONTENTION_FACTOR * max(self.baseline_latency, MIN_LATENCY):
+                self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate * BACKOFF)
+            else:
+                self.rate = min(self.max_rate, self.rate * RECOVERY)
+
+
+def set_background_priority(niceness: int = DEFAULT_NICENESS) -> int:
+    """
+    Lowers the CPU priority of this process (inherited by worker
+    processes it starts). Returns the new niceness; a no-op where the OS
+    has no nice().
+    """
+    if not hasattr(os, "nice"):
+        return 0
+    return os.nice(niceness)
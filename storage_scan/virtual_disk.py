@@ -0,0 +1,227 @@
+import os
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from storage_scan.cache import LRUCache
+from storage_scan.extents import mask_to_extents, clip_extents, coalesce_extents
+from storage_scan.sources import ImageSource, FileSource
+
+QCOW2_MAGIC = b"QFI\xfb"
+# L1/L2 entry bits
+QCOW2_OFFSET_MASK = 0x00FFFFFFFFFFFE00
+QCOW2_COMPRESSED = 1 << 62
+QCOW2_ZERO = 1  # Standard cluster reads as zeros (version 3)
+# Incompatible feature bits we cannot honour
+QCOW2_INCOMPAT_EXTERNAL_DATA = 1 << 2
+QCOW2_INCOMPAT_COMPRESSION_TYPE = 1 << 3
+QCOW2_INCOMPAT_EXTENDED_L2 = 1 << 4
+
+VHD_FOOTER_COOKIE = b"conectix"
+VHD_DYNAMIC_COOKIE = b"cxsparse"
+VHD_TYPE_FIXED = 2
+VHD_TYPE_DYNAMIC = 3
+VHD_UNALLOCATED = 0xFFFFFFFF
+
+# L2 tables / VHD block bitmaps kept decoded per open image
+DEFAULT_CACHED_TABLES = 256
+
+
+def detect_virtual_disk(path: str) -> Optional[str]:
+    """Returns "qcow2" or "vhd" when path is such a virtual disk, else None."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) == QCOW2_MAGIC:
+                return "qcow2"
+            f.seek(0, os.SEEK_END)
+            if f.tell() >= 512:
+                f.seek(-512, os.SEEK_END)
+                if f.read(8) == VHD_FOOTER_COOKIE:
+                    return "vhd"
+    except OSError:
+        pass
+    return None
+
+
+class Qcow2Source(ImageSource):
+    """
+    Reads the guest view of a qcow2 image (versions 2 and 3) through its
+    two-level cluster tables. Unallocated and zero clusters are reported as
+    holes; compressed clusters are inflated on read. Backing files,
+    encryption and external data files are not supported.
+    """
+
+    def __init__(self, path: str, cached_tables: int = DEFAULT_CACHED_TABLES):
+        self.path = path
+        self._host = FileSource(path)
+        header = self._host.read(0, 104)
+        magic, version, backing_offset, _, self.cluster_bits, self.size, crypt, l1_size, l1_offset = \
+            struct.unpack(">4sIQIIQIIQ", header[:48])
+        if magic != QCOW2_MAGIC or version not in (2, 3):
+            self._host.close()
+            raise ValueError(f"Not a qcow2 version 2/3 image: {path}")
+        incompatible = struct.unpack(">Q", header[72:80])[0] if version == 3 else 0
+        unsupported = QCOW2_INCOMPAT_EXTERNAL_DATA | QCOW2_INCOMPAT_COMPRESSION_TYPE | QCOW2_INCOMPAT_EXTENDED_L2
+        if backing_offset or crypt or incompatible & unsupported:
+            self._host.close()
+            raise ValueError(f"Unsupported qcow2 features (backing file, encryption or extended layout): {path}")
+
+        self.cluster_size = 1 << self.cluster_bits
+        self.l2_entries = self.cluster_size // 8
+        raw = self._host.read(l1_offset, l1_size * 8)
+        self._l1 = np.frombuffer(raw, dtype=">u8").astype(np.uint64)
+        self._tables = LRUCache(cached_tables)
+
+    def _l2_table(self, l1_index: int) -> Optional[np.ndarray]:
+        """L2 table of one L1 entry as uint64, or None if unallocated."""
+        if l1_index >= len(self._l1):
+            return None
+        table_offset = int(self._l1[l1_index]) & QCOW2_OFFSET_MASK
+        if not table_offset:
+            return None
+        table = self._tables.get(l1_index)
+        if table is None:
+            raw = self._host.read(table_offset, self.cluster_size)
+            table = np.frombuffer(raw, dtype=">u8").astype(np.uint64)
+            self._tables.put(l1_index, table)
+        return table
+
+    def _l2_entry(self, cluster: int) -> int:
+        table = self._l2_table(cluster // self.l2_entries)
+        return 0 if table is None else int(table[cluster % self.l2_entries])
+
+    def _read_cluster(self, cluster: int) -> bytes:
+        """Guest cluster contents (zeros when unallocated)."""
+        entry = self._l2_entry(cluster)
+        if entry & QCOW2_COMPRESSED:
+            descriptor = entry & (QCOW2_COMPRESSED - 1)
+            shift = 62 - (self.cluster_bits - 8)
+            host = descriptor & ((1 << shift) - 1)
+            sectors = (descriptor >> shift) + 1
+            packed = self._host.read(host, sectors * 512 - (host & 511))
+            return zlib.decompressobj(-12).decompress(packed)[:self.cluster_size].ljust(self.cluster_size, b"\x00")
+        host = entry & QCOW2_OFFSET_MASK
+        if not host or entry & QCOW2_ZERO:
+            return bytes(self.cluster_size)
+        return self._host.read(host, self.cluster_size).ljust(self.cluster_size, b"\x00")
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset >= self.size or length <= 0:
+            return b""
+        end = min(offset + length, self.size)
+        first, last = offset // self.cluster_size, (end - 1) // self.cluster_size
+        data = b"".join(self._read_cluster(c) for c in range(first, last + 1))
+        start = offset - first * self.cluster_size
+        return data[start:start + end - offset]
+
+    def data_extents(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Guest ranges backed by allocated (non-zero) clusters."""
+        end = min(end, self.size)
+        if start >= end:
+            return []
+        extents: List[Tuple[int, int]] = []
+        span = self.l2_entries * self.cluster_size
+        for l1_index in range(start // span, (end - 1) // span + 1):
+            table = self._l2_table(l1_index)
+            if table is None:
+                continue
+            allocated = ((table & QCOW2_OFFSET_MASK) != 0) & ((table & QCOW2_ZERO) == 0)
+            allocated |= (table & QCOW2_COMPRESSED) != 0
+            extents.extend(mask_to_extents(allocated, self.cluster_size, l1_index * span))
+        return coalesce_extents(clip_extents(extents, start, end))
+
+    def close(self) -> None:
+        self._tables.clear()
+        self._host.close()
+
+
+class VHDSource(ImageSource):
+    """
+    Reads fixed and dynamic VHD images. Dynamic disks are mapped through
+    the Block Allocation Table and each block's sector bitmap; blocks that
+    are not allocated are reported as holes and read as zeros.
+    Differencing disks are not supported.
+    """
+
+    def __init__(self, path: str, cached_tables: int = DEFAULT_CACHED_TABLES):
+        self.path = path
+        self._host = FileSource(path)
+        footer = self._host.read(self._host.size - 512, 512)
+        if footer[0:8] != VHD_FOOTER_COOKIE:
+            self._host.close()
+            raise ValueError(f"Not a VHD image: {path}")
+        data_offset = struct.unpack(">Q", footer[0x10:0x18])[0]
+        self.size = struct.unpack(">Q", footer[0x30:0x38])[0]
+        self.disk_type = struct.unpack(">I", footer[0x3C:0x40])[0]
+        self._bitmaps = LRUCache(cached_tables)
+
+        if self.disk_type == VHD_TYPE_FIXED:
+            self.size = min(self.size, self._host.size - 512)
+            return
+        if self.disk_type != VHD_TYPE_DYNAMIC:
+            self._host.close()
+            raise ValueError(f"Unsupported VHD disk type {self.disk_type}: {path}")
+
+        header = self._host.read(data_offset, 1024)
+        if header[0:8] != VHD_DYNAMIC_COOKIE:
+            self._host.close()
+            raise ValueError(f"Missing VHD dynamic disk header: {path}")
+        table_offset = struct.unpack(">Q", header[0x10:0x18])[0]
+        max_entries, self.block_size = struct.unpack(">II", header[0x1C:0x24])
+        self._bat = np.frombuffer(self._host.read(table_offset, max_entries * 4), dtype=">u4").astype(np.uint32)
+        # Sector bitmap preceding each block, padded to whole sectors
+        bitmap_bytes = -(-(self.block_size // 512) // 8)
+        self.bitmap_size = -(-bitmap_bytes // 512) * 512
+
+    def _sector_bitmap(self, block: int) -> np.ndarray:
+        """Per-sector presence flags of an allocated block (MSB first)."""
+        bitmap = self._bitmaps.get(block)
+        if bitmap is None:
+            raw = np.frombuffer(self._host.read(int(self._bat[block]) * 512, self.bitmap_size), dtype=np.uint8)
+            bitmap = np.unpackbits(raw)[:self.block_size // 512].astype(bool)
+            self._bitmaps.put(block, bitmap)
+        return bitmap
+
+    def _read_block(self, block: int) -> bytes:
+        if block >= len(self._bat) or self._bat[block] == VHD_UNALLOCATED:
+            return bytes(self.block_size)
+        start = int(self._bat[block]) * 512 + self.bitmap_size
+        data = np.frombuffer(self._host.read(start, self.block_size).ljust(self.block_size, b"\x00"),
+                             dtype=np.uint8).reshape(-1, 512)
+        present = self._sector_bitmap(block)
+        if present.all():
+            return data.tobytes()
+        return np.where(present[:, None], data, 0).astype(np.uint8).tobytes()
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset >= self.size or length <= 0:
+            return b""
+        end = min(offset + length, self.size)
+        if self.disk_type == VHD_TYPE_FIXED:
+            return self._host.read(offset, end - offset)
+        first, last = offset // self.block_size, (end - 1) // self.block_size
+        data = b"".join(self._read_block(b) for b in range(first, last + 1))
+        start = offset - first * self.block_size
+        return data[start:start + end - offset]
+
+    def view(self, offset: int, length: int) -> np.ndarray:
+        if self.disk_type == VHD_TYPE_FIXED:
+            return self._host.view(offset, min(length, self.size - offset))
+        return super().view(offset, length)
+
+    def data_extents(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Guest ranges of allocated blocks (fixed disks: the host's own data extents)."""
+        end = min(end, self.size)
+        if start >= end:
+            return []
+        if self.disk_type == VHD_TYPE_FIXED:
+            return self._host.data_extents(start, end)
+        allocated = self._bat != VHD_UNALLOCATED
+        return clip_extents(mask_to_extents(allocated, self.block_size), start, end)
+
+    def close(self) -> None:
+        self._bitmaps.clear()
+        self._host.close()
+
@@ -1,6 +1,7 @@
 import pytest
 import os
 import torch
+import numpy as np
 from carving.ntfs import NTFSParser
 from carving.fat32 import FAT32Parser
 from carving.signature import SignatureCarver
@@ -129,3 +130,524 @@ def test_hybrid_carver_scan_disk(dummy_disk_image):
         # HybridCarver.identify_fragment uses startswith().
         # So it might not detect it via signature if it's in the middle.
         # This is expected for simple HybridCarver.
+
+
+def test_signature_carving_chunks(dummy_disk_image):
+    """Chunked carving finds the same file as block-by-block carving."""
+    with DiskScanner(dummy_disk_image, block_size=512) as scanner:
+        carver = SignatureCarver(block_size=512)
+        for offset, blocks in scanner.scan_chunks(chunk_size=1024):
+            carver.process_chunk(offset, blocks)
+
+        carved_files = carver.get_carved_files()
+        assert len(carved_files) == 1
+        assert carved_files[0]["start_offset"] == 1000
+        assert carved_files[0]["data"].startswith(b"\xff\xd8")
+        assert carved_files[0]["data"].endswith(b"\xff\xd9")
+
+
+def test_signature_carving_chunk_multiple_files():
+    """Every header/footer pair inside one chunk is carved, including split footers."""
+    jpeg = b"\xff\xd8\xff\xe0" + b"\x11" * 20 + b"\xff\xd9"
+    carver = SignatureCarver()
+    carver.process_chunk(0, b"\x00" * 10 + jpeg + b"\x00" * 5 + jpeg[:-1])
+    carver.process_chunk(10 + 2 * len(jpeg) + 4, jpeg[-1:] + b"\x00" * 8)
+
+    carved = carver.get_carved_files()
+    assert [f["start_offset"] for f in carved] == [10, 10 + len(jpeg) + 5]
+    assert all(f["data"] == jpeg for f in carved)
+
+
+def test_hybrid_carver_identify_chunk(monkeypatch):
+    """Batched identification agrees with the per-fragment fast paths."""
+    carver = HybridCarver(checkpoint_path="non_existent.pth")
+
+    def mock_classifier(self, x):
+        logits = torch.zeros((x.shape[0], 3))
+        logits[:, 1] = 10.0
+        return logits
+
+    from models.classifier import FragmentClassifier
+    monkeypatch.setattr(FragmentClassifier, "forward", mock_classifier)
+
+    blocks = np.zeros((4, 512), dtype=np.uint8)
+    blocks[1, :2] = [0xFF, 0xD8]
+    blocks[2, :4] = np.frombuffer(b"%PDF", dtype=np.uint8)
+    blocks[3] = np.frombuffer(os.urandom(512), dtype=np.uint8)
+
+    results = carver.identify_chunk(blocks)
+    assert [r["source"] for r in results] == ["zero_block", "signature", "signature", "ai"]
+    assert [r["type"] for r in results] == ["other", "jpeg", "pdf", "pdf"]
+    for i in range(3):
+        assert results[i] == carver.identify_fragment(blocks[i].tobytes())
+
+
+def test_hybrid_carver_scan_segments_run_records(tmp_path):
+    """Empty runs produce one run-length record instead of per-block results."""
+    img = tmp_path / "runs.dd"
+    header_block = b"%PDF" + b"\x01" * 508
+    img.write_bytes(b"\x00" * 4096 + header_block + b"\xff" * 2048)
+
+    carver = HybridCarver(checkpoint_path="non_existent.pth")
+    with DiskScanner(str(img), block_size=512) as scanner:
+        results = carver.scan_segments(scanner.scan_segments())
+
+    assert len(results) == 3
+    assert results[0]["length"] == 4096 and results[0]["fill"] == 0
+    assert results[0]["identification"]["source"] == "fill_run"
+    assert results[1]["offset"] == 4096
+    assert results[1]["identification"]["type"] == "pdf"
+    assert results[2]["length"] == 2048 and results[2]["fill"] == 0xFF
+
+
+def test_signature_carving_through_fill_run():
+    """A file that spans an empty run keeps the run's bytes."""
+    carver = SignatureCarver()
+    carver.process_chunk(0, b"\xff\xd8\xff\xe0" + b"\x11" * 508)
+    carver.process_fill(512, 1024, 0)
+    carver.process_chunk(1536, b"\x22" * 10 + b"\xff\xd9" + b"\x00" * 500)
+
+    carved = carver.get_carved_files()
+    assert len(carved) == 1
+    assert len(carved[0]["data"]) == 512 + 1024 + 12
+    assert carved[0]["data"][512:1536] == b"\x00" * 1024
+
+
+def test_signature_carving_abandons_oversized_file():
+    """A file growing past max_file_size is dropped; a long empty run is never materialised."""
+    carver = SignatureCarver(max_file_size=4096)
+    carver.process_chunk(0, b"\xff\xd8\xff\xe0" + b"\x11" * 508)
+    carver.process_fill(512, 1 << 40, 0)
+    assert not carver.in_file
+    assert len(carver.current_file_data) == 0
+
+    # Headers after the abandoned file still open new files
+    offset = 512 + (1 << 40)
+    carver.process_chunk(offset, b"\xff\xd8\xff\xe1" + b"\x22" * 8000 + b"\xff\xd9"
+                         + b"\xff\xd8\xff\xe0" + b"\x33" * 10 + b"\xff\xd9")
+    carved = carver.get_carved_files()
+    assert [f["start_offset"] for f in carved] == [offset + 8006]
+    assert carved[0]["data"] == b"\xff\xd8\xff\xe0" + b"\x33" * 10 + b"\xff\xd9"
+
+
+def _fat32_volume(tmp_path, fat_entries, total_clusters=16, clusters=None):
+    """
+    Builds a bare FAT32 volume: 512-byte clusters, 4 reserved sectors, 2 FATs of 1 sector,
+    root directory in cluster 2. `clusters` maps cluster numbers to their contents.
+    """
+    boot = bytearray(512)
+    boot[3:11] = b"MSDOS5.0"
+    boot[0x0B:0x0D] = (512).to_bytes(2, "little")
+    boot[0x0D] = 1
+    boot[0x0E:0x10] = (4).to_bytes(2, "little")
+    boot[0x10] = 2
+    boot[0x20:0x24] = (4 + 2 + total_clusters).to_bytes(4, "little")
+    boot[0x24:0x28] = (1).to_bytes(4, "little")
+    boot[0x2C:0x30] = (2).to_bytes(4, "little")
+    boot[0x52:0x5A] = b"FAT32   "
+    boot[510:512] = b"\x55\xaa"
+
+    fat = np.zeros(128, dtype="<u4")
+    fat[0:2] = [0x0FFFFFF8, 0xFFFFFFFF]
+    for cluster, value in fat_entries.items():
+        fat[cluster] = value
+
+    image = bytearray((4 + 2 + total_clusters) * 512)
+    image[0:512] = boot
+    image[4 * 512:5 * 512] = fat.tobytes()
+    image[5 * 512:6 * 512] = fat.tobytes()
+    for cluster, content in (clusters or {}).items():
+        offset = (6 + cluster - 2) * 512
+        image[offset:offset + len(content)] = content
+    path = tmp_path / "fat32.img"
+    path.write_bytes(bytes(image))
+    return str(path)
+
+
+def test_fat32_free_extents(tmp_path):
+    """Free clusters are derived from the FAT and coalesced into image byte ranges."""
+    # Clusters 2-4 hold a chained file, 7 is a single-cluster file, 9 is bad (top bits ignored)
+    used = {2: 3, 3: 4, 4: 0x0FFFFFFF, 7: 0xFFFFFFFF, 9: 0x0FFFFFF7}
+    path = _fat32_volume(tmp_path, used)
+
+    with DiskScanner(path) as scanner:
+        parser = FAT32Parser(scanner)
+        info = parser.parse()
+        assert info["cluster_count"] == 16
+
+        fat = parser.load_fat()
+        assert fat.dtype == np.uint32
+        assert len(fat) == 18
+        assert fat[7] == 0x0FFFFFFF
+
+        free = parser.free_cluster_bitmap(fat)
+        assert list(np.flatnonzero(free)) == [5, 6, 8] + list(range(10, 18))
+
+        data_start = 6 * 512
+        assert parser.free_extents(fat) == [
+            (data_start + 3 * 512, data_start + 5 * 512),
+            (data_start + 6 * 512, data_start + 7 * 512),
+            (data_start + 8 * 512, data_start + 16 * 512),
+        ]
+        # The scanner's cluster mapping now follows the volume
+        assert scanner.cluster_to_sector(0) == data_start
+
+
+def test_unallocated_ranges_for_fat32_volume(tmp_path):
+    """Only free clusters of a recognised FAT32 volume are scheduled for carving."""
+    from carving.partition import unallocated_ranges, PartitionTable
+
+    path = _fat32_volume(tmp_path, {cluster: 0x0FFFFFFF for cluster in range(2, 16)})
+    with DiskScanner(path) as scanner:
+        # The volume boot record is not mistaken for an MBR
+        assert PartitionTable(scanner).parse() == []
+        ranges = unallocated_ranges(scanner)
+        segments = list(scanner.scan_extents(ranges))
+
+    assert ranges == [(6 * 512 + 14 * 512, 6 * 512 + 16 * 512)]
+    assert sum(s.length for s in segments) == 2 * 512
+
+
+def _dir_entry(name, attr, cluster, size, deleted=False):
+    """32-byte 8.3 directory entry."""
+    entry = bytearray(32)
+    entry[0:11] = name
+    entry[11] = attr
+    entry[20:22] = (cluster >> 16).to_bytes(2, "little")
+    entry[26:28] = (cluster & 0xFFFF).to_bytes(2, "little")
+    entry[28:32] = size.to_bytes(4, "little")
+    if deleted:
+        entry[0] = 0xE5
+    return bytes(entry)
+
+
+def _lfn_entries(long_name, short_name, deleted=False):
+    """Long-file-name entries for long_name, in on-disk order (last fragment first)."""
+    from carving.fat32 import _lfn_checksum
+
+    chars = long_name.encode("utf-16-le") + b"\x00\x00"
+    chars += b"\xff" * (-len(chars) % 26)
+    parts = [chars[i:i + 26] for i in range(0, len(chars), 26)]
+    entries = []
+    for seq, part in enumerate(parts, start=1):
+        entry = bytearray(32)
+        entry[0] = seq | (0x40 if seq == len(parts) else 0)
+        entry[1:11], entry[14:26], entry[28:32] = part[0:10], part[10:22], part[22:26]
+        entry[11] = 0x0F
+        entry[13] = _lfn_checksum(short_name)
+        if deleted:
+            entry[0] = 0xE5
+        entries.append(bytes(entry))
+    return b"".join(reversed(entries))
+
+
+def test_fat32_undelete_recovers_deleted_entries(tmp_path):
+    """Deleted entries are found in the root and in subdirectories and read back without carving."""
+    from carving.fat32 import FAT32Undeleter, deduplicate_carved
+
+    photo = b"\xff\xd8\xff" + bytes(range(256)) * 3 + b"\xff\xd9"
+    root = (
+        _dir_entry(b"LIVE    TXT", 0x20, 4, 5)
+        + _lfn_entries("holiday photo.jpg", b"HOLIDA~1JPG", deleted=True)
+        + _dir_entry(b"HOLIDA~1JPG", 0x20, 10, len(photo), deleted=True)
+        + _dir_entry(b"SUB        ", 0x10, 5, 0)
+    )
+    sub = (
+        _dir_entry(b".          ", 0x10, 5, 0)
+        + _dir_entry(b"..         ", 0x10, 0, 0)
+        + _dir_entry(b"NOTES   TXT", 0x20, 14, 600, deleted=True)
+    )
+    # Cluster 14 was reused by a live file after NOTES.TXT was deleted
+    fat = {2: 0x0FFFFFFF, 4: 0x0FFFFFFF, 5: 0x0FFFFFFF, 15: 0x0FFFFFFF}
+    path = _fat32_volume(tmp_path, fat, clusters={2: root, 5: sub, 4: b"hello", 10: photo})
+
+    with DiskScanner(path) as scanner:
+        parser = FAT32Parser(scanner)
+        assert parser.parse()["root_cluster"] == 2
+        undeleter = FAT32Undeleter(parser)
+        assert undeleter.cluster_chain(2) == [2]
+
+        entries = {e["path"]: e for e in undeleter.deleted_entries()}
+        assert set(entries) == {"/holiday photo.jpg", "/SUB/_OTES.TXT"}
+
+        photo_entry = entries["/holiday photo.jpg"]
+        photo_offset = (6 + 10 - 2) * 512
+        assert photo_entry["extents"] == [(photo_offset, photo_offset + len(photo))]
+        assert not photo_entry["overwritten"]
+        assert entries["/SUB/_OTES.TXT"]["overwritten"]
+
+        recovered = list(undeleter.recover_files())
+        assert len(recovered) == 1
+        assert recovered[0][1] == photo
+
+    carved = [{"start_offset": photo_offset, "data": photo}, {"start_offset": 0, "data": b""}]
+    assert deduplicate_carved(carved, list(entries.values())) == [carved[1]]
+
+
+def test_recover_volumes_writes_deleted_files(tmp_path):
+    """Deleted files that were not overwritten are written out; directories and overwritten files are not."""
+    from carving.partition import recover_volumes
+
+    photo = b"\xff\xd8\xff" + bytes(range(256)) * 3 + b"\xff\xd9"
+    root = (
+        _dir_entry(b"PHOTO   JPG", 0x20, 10, len(photo), deleted=True)
+        + _dir_entry(b"OLD        ", 0x10, 12, 0, deleted=True)
+        + _dir_entry(b"NOTES   TXT", 0x20, 14, 600, deleted=True)
+    )
+    fat = {2: 0x0FFFFFFF, 15: 0x0FFFFFFF}
+    path = _fat32_volume(tmp_path, fat, clusters={2: root, 10: photo})
+    out = tmp_path / "out"
+
+    with DiskScanner(path) as scanner:
+        entries = {e["path"]: e for e in recover_volumes(scanner, str(out))}
+
+    assert set(entries) == {"/_HOTO.JPG", "/_LD", "/_OTES.TXT"}
+    saved = entries["/_HOTO.JPG"]["recovered_path"]
+    assert saved == str(out / "part_0" / "_HOTO.JPG")
+    with open(saved, "rb") as f:
+        assert f.read() == photo
+    assert "recovered_path" not in entries["/_LD"]
+    assert "recovered_path" not in entries["/_OTES.TXT"]
+    assert os.listdir(out / "part_0") == ["_HOTO.JPG"]
+
+
+def test_recover_volumes_handles_clashing_and_invalid_names(tmp_path, monkeypatch):
+    """Clashing, unprintable or unwritable names never abort recovery of the other files."""
+    import carving.partition as partition
+
+    def entry(path):
+        return {"path": path, "is_dir": False, "overwritten": False, "data": path.encode()}
+
+    entries = [entry("/a"), entry("/a/b"), entry("/a/c"), entry("/bad\x00name"),
+               entry("/" + "x" * 300), entry("/ok")]
+    monkeypatch.setattr(partition, "_volume_undeleters",
+                        lambda scanner, table: [(0, entries, lambda e: e["data"])])
+    result = partition.recover_volumes(None, str(tmp_path), table=object())
+
+    volume = tmp_path / "part_0"
+    assert [e.get("recovered_path") for e in result[:4]] == [
+        str(volume / "a"), str(volume / "a~1" / "b"), str(volume / "a~1" / "c"), str(volume / "bad_name")]
+    assert (volume / "a~1" / "b").read_bytes() == b"/a/b"
+    assert "recovery_error" in result[4] and "recovered_path" not in result[4]
+    assert (volume / "ok").read_bytes() == b"/ok"
+
+
+def test_fat32_undelete_restores_short_name_from_lfn_checksum(tmp_path):
+    """The first 8.3 character lost to 0xE5 is recovered through the LFN checksum."""
+    from carving.fat32 import FAT32Undeleter
+
+    root = (
+        _dir_entry(b"KEEP    TXT", 0x20, 3, 0, deleted=True)
+        + _dir_entry(b"ORPHAN  BIN", 0x20, 6, 10, deleted=True)
+    )
+    lfn = _lfn_entries("k", b"KEEP    TXT")
+    # A lone LFN entry carries the checksum but (deleted) no usable name here
+    lfn = bytes([0xE5]) + bytes(10) + lfn[11:]
+    path = _fat32_volume(tmp_path, {2: 0x0FFFFFFF}, clusters={2: lfn + root})
+
+    with DiskScanner(path) as scanner:
+        names = [e["name"] for e in FAT32Undeleter(FAT32Parser(scanner)).deleted_entries()]
+    assert names == ["KEEP.TXT", "_RPHAN.BIN"]
+
+
+def test_subtract_extents():
+    """Recovered ranges are cut out of the ranges scheduled for carving."""
+    from storage_scan.extents import subtract_extents
+
+    assert subtract_extents([(0, 100), (200, 300)], [(10, 20), (90, 210), (250, 300)]) == [
+        (0, 10), (20, 90), (210, 250)
+    ]
+    assert subtract_extents([(0, 100)], []) == [(0, 100)]
+
+
+def _runlist(runs):
+    """Encodes (lcn, count) runs as NTFS mapping pairs; lcn None is sparse."""
+    out = bytearray()
+    previous = 0
+    for lcn, count in runs:
+        length = count.to_bytes(2, "little")
+        if lcn is None:
+            out += bytes([0x02]) + length
+            continue
+        delta = (lcn - previous).to_bytes(3, "little", signed=True)
+        out += bytes([0x32]) + length + delta
+        previous = lcn
+    return bytes(out) + b"\x00"
+
+
+def _mft_record(flags, name=None, parent=5, data=None, runs=None, size=0, base=0):
+    """1024-byte MFT record with $STANDARD_INFORMATION, $FILE_NAME and $DATA, fixups applied."""
+    record = bytearray(1024)
+    record[0:4] = b"FILE"
+    record[0x04:0x06] = (0x30).to_bytes(2, "little")
+    record[0x06:0x08] = (3).to_bytes(2, "little")
+    record[0x14:0x16] = (0x38).to_bytes(2, "little")
+    record[0x16:0x18] = flags.to_bytes(2, "little")
+    record[0x20:0x28] = base.to_bytes(8, "little")
+
+    def resident(attr_type, value):
+        header = bytearray(0x18)
+        header[0:4] = attr_type.to_bytes(4, "little")
+        length = (0x18 + len(value) + 7) // 8 * 8
+        header[4:8] = length.to_bytes(4, "little")
+        header[0x10:0x14] = len(value).to_bytes(4, "little")
+        header[0x14:0x16] = (0x18).to_bytes(2, "little")
+        return bytes(header + value).ljust(length, b"\x00")
+
+    attrs = resident(0x10, (132000000000000000).to_bytes(8, "little") * 4)
+    if name is not None:
+        encoded = name.encode("utf-16-le")
+        value = bytearray(0x42)
+        value[0:8] = parent.to_bytes(8, "little")
+        value[0x40] = len(name)
+        value[0x41] = 1
+        attrs += resident(0x30, bytes(value) + encoded)
+    if data is not None:
+        attrs += resident(0x80, data)
+    if runs is not None:
+        encoded = _runlist(runs)
+        header = bytearray(0x40)
+        header[0:4] = (0x80).to_bytes(4, "little")
+        length = (0x40 + len(encoded) + 7) // 8 * 8
+        header[4:8] = length.to_bytes(4, "little")
+        header[8] = 1
+        header[0x20:0x22] = (0x40).to_bytes(2, "little")
+        header[0x30:0x38] = size.to_bytes(8, "little")
+        attrs += bytes(header + encoded).ljust(length, b"\x00")
+    attrs += b"\xff\xff\xff\xff"
+    record[0x38:0x38 + len(attrs)] = attrs
+    record[0x18:0x1C] = (0x38 + len(attrs)).to_bytes(4, "little")
+
+    # Update sequence: save each sector tail and replace it with the USN
+    record[0x30:0x32] = b"\x07\x00"
+    for i in (1, 2):
+        record[0x30 + 2 * i:0x32 + 2 * i] = record[i * 512 - 2:i * 512]
+        record[i * 512 - 2:i * 512] = b"\x07\x00"
+    return bytes(record)
+
+
+def _ntfs_volume(tmp_path, records, writes=()):
+    """Bare NTFS volume, 512-byte clusters, MFT fragmented over clusters 16-23 and 40-47."""
+    boot = bytearray(512)
+    boot[3:11] = b"NTFS    "
+    boot[0x0B:0x0D] = (512).to_bytes(2, "little")
+    boot[0x0D] = 1
+    boot[0x28:0x30] = (128).to_bytes(8, "little")
+    boot[0x30:0x38] = (16).to_bytes(8, "little")
+    boot[0x40] = 0xF6  # 2^10 = 1024-byte records
+    boot[510:512] = b"\x55\xaa"
+
+    image = bytearray(128 * 512)
+    image[0:512] = boot
+    slots = [16 * 512 + i * 1024 for i in range(4)] + [40 * 512 + i * 1024 for i in range(4)]
+    for number, record in records.items():
+        image[slots[number]:slots[number] + 1024] = record
+    for offset, data in writes:
+        image[offset:offset + len(data)] = data
+    path = tmp_path / "ntfs.img"
+    path.write_bytes(bytes(image))
+    return str(path)
+
+
+def test_decode_data_runs():
+    """Run offsets are signed and relative to the previous run; sparse runs have no offset."""
+    from carving.ntfs import decode_data_runs
+
+    assert decode_data_runs(_runlist([(100, 4), (None, 2), (40, 1)])) == [(100, 4), (None, 2), (40, 1)]
+    assert decode_data_runs(b"") == []
+
+
+def test_mft_parser_recovers_deleted_records(tmp_path):
+    """Deleted records are decoded from a fragmented MFT and read back from runs or resident data."""
+    from carving.ntfs import MFTParser
+
+    payload = bytes(range(256)) * 8
+    records = {
+        0: _mft_record(0x01, "$MFT", runs=[(16, 8), (40, 8)], size=8 * 1024),
+        1: _mft_record(0x03, "Docs"),
+        2: _mft_record(0x00, "photo.jpg", parent=1, runs=[(60, 2), (None, 1), (70, 1)], size=1800),
+        3: _mft_record(0x00, "note.txt", data=b"hello ntfs"),
+        4: _mft_record(0x01, "live.txt", data=b"live"),
+        6: _mft_record(0x00, "torn.txt", data=b"x")[:600] + b"\x00" * 424,
+        7: _mft_record(0x00, "ext.txt", data=b"x", base=2),
+    }
+    writes = [(60 * 512, payload[:1024]), (70 * 512, payload[1024:1288])]
+    path = _ntfs_volume(tmp_path, records, writes)
+
+    with DiskScanner(path) as scanner:
+        ntfs = NTFSParser(scanner)
+        assert ntfs.parse()["record_size"] == 1024
+        mft = MFTParser(ntfs, batch_records=3)
+        assert mft.mft_extents() == [(16 * 512, 24 * 512), (40 * 512, 48 * 512)]
+
+        entries = {e["path"]: e for e in mft.deleted_records()}
+        assert set(entries) == {"/Docs/photo.jpg", "/note.txt"}
+        photo = entries["/Docs/photo.jpg"]
+        assert photo["record_number"] == 2
+        assert photo["extents"] == [(60 * 512, 62 * 512), (70 * 512, 70 * 512 + 264)]
+        assert photo["created"] > 1.2e9
+
+        recovered = dict((e["name"], data) for e, data in mft.recover_files())
+        assert recovered["photo.jpg"] == payload[:1024] + bytes(512) + payload[1024:1288]
+        assert recovered["note.txt"] == b"hello ntfs"
+
+
+def test_mft_parser_on_4kn_volume(tmp_path):
+    """4096-byte sectors still use a 512-byte update sequence stride in MFT records."""
+    from carving.ntfs import MFTParser
+
+    boot = bytearray(4096)
+    boot[3:11] = b"NTFS    "
+    boot[0x0B:0x0D] = (4096).to_bytes(2, "little")
+    boot[0x0D] = 1
+    boot[0x28:0x30] = (16).to_bytes(8, "little")
+    boot[0x30:0x38] = (4).to_bytes(8, "little")
+    boot[0x40] = 0xF6
+    image = bytearray(16 * 4096)
+    image[0:4096] = boot
+    records = [
+        _mft_record(0x01, "$MFT", runs=[(4, 2)], size=8 * 1024),
+        _mft_record(0x00, "gone.txt", data=b"4kn data"),
+    ]
+    for number, record in enumerate(records):
+        image[4 * 4096 + number * 1024:4 * 4096 + (number + 1) * 1024] = record
+    path = tmp_path / "ntfs4k.img"
+    path.write_bytes(bytes(image))
+
+    with DiskScanner(str(path)) as scanner:
+        ntfs = NTFSParser(scanner)
+        assert ntfs.parse()["sector_size"] == 4096
+        mft = MFTParser(ntfs)
+        assert mft.mft_extents() == [(4 * 4096, 6 * 4096)]
+        recovered = {e["name"]: data for e, data in mft.recover_files()}
+    assert recovered == {"gone.txt": b"4kn data"}
+
+
+def test_ntfs_bitmap_unallocated_extents(tmp_path):
+    """$Bitmap becomes a cluster map; only free clusters are scheduled for carving."""
+    from carving.ntfs import MFTParser
+    from carving.partition import unallocated_ranges
+
+    allocated = np.zeros(128, dtype=bool)
+    allocated[0:24] = True  # Boot sector and first MFT fragment
+    allocated[40:48] = True  # Second MFT fragment
+    allocated[100:128] = True  # A live file; cluster 100 was reused
+    bitmap = np.packbits(allocated, bitorder="little").tobytes()
+    records = {
+        0: _mft_record(0x01, "$MFT", runs=[(16, 8), (40, 8)], size=8 * 1024),
+        2: _mft_record(0x00, "old.bin", runs=[(100, 1)], size=512),
+        3: _mft_record(0x00, "kept.bin", runs=[(60, 2)], size=1024),
+        6: _mft_record(0x01, "$Bitmap", data=bitmap),
+    }
+    path = _ntfs_volume(tmp_path, records)
+
+    with DiskScanner(path) as scanner:
+        mft = MFTParser(NTFSParser(scanner))
+        cluster_map = mft.allocated_cluster_bitmap()
+        assert cluster_map.dtype == bool
+        assert (cluster_map == allocated).all()
+        assert mft.free_extents(cluster_map) == [(24 * 512, 40 * 512), (48 * 512, 100 * 512)]
+        assert unallocated_ranges(scanner) == [(24 * 512, 40 * 512), (48 * 512, 100 * 512)]
+
+        overwritten = {e["name"]: e["overwritten"] for e in mft.deleted_records()}
+        assert overwritten == {"old.bin": True, "kept.bin": False}
@@ -0,0 +1,144 @@
+import os
+import json
+from storage_scan.scanner import DiskScanner
+from storage_scan.checkpoint import ScanCheckpoint
+from carving.signature import SignatureCarver
+
+JPEG = b"\xff\xd8\xff\xe0" + bytes(range(1, 201)) * 20 + b"\xff\xd9"
+
+
+def _make_image(tmp_path):
+    img = tmp_path / "resume.dd"
+    img.write_bytes(os.urandom(3000) + JPEG + b"\x00" * 5000 + JPEG + os.urandom(700))
+    return str(img)
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    """Offset, carver state and byte payloads survive a save/load cycle."""
+    img = _make_image(tmp_path)
+    journal = ScanCheckpoint(img)
+    carver_state = {"in_file": True, "start_offset": 10, "current_file_data": b"\xff\xd8\x00",
+                    "carved_files": [{"start_offset": 1, "data": b"\x01\x02"}]}
+    results = [{"Offset": "0x200", "data": b"\xaa" * 4}]
+
+    journal.save(4096, carver_state, results)
+    assert not os.path.exists(journal.journal_path + ".tmp")
+
+    state = ScanCheckpoint(img).load()
+    assert state["offset"] == 4096
+    assert state["carver"] == carver_state
+    assert state["results"] == results
+
+    journal.clear()
+    assert ScanCheckpoint(img).load() is None
+
+
+def test_checkpoint_appends_only_new_entries(tmp_path):
+    """Repeated saves log each carved file and result once instead of rewriting them."""
+    img = _make_image(tmp_path)
+    journal = ScanCheckpoint(img)
+    carved, results = [], []
+    sizes = []
+    for i in range(5):
+        carved.append({"start_offset": i * 1000, "data": bytes([i]) * 1000})
+        results.append({"Offset": hex(i), "data": b"\xbb" * 512})
+        journal.save(i * 1000, {"in_file": False, "carved_files": carved}, results)
+        sizes.append(os.path.getsize(journal.log_path))
+    # Each save adds one carved file and one result, about the same number of bytes
+    growth = [b - a for a, b in zip(sizes, sizes[1:])]
+    assert max(growth) - min(growth) < 16
+    assert os.path.getsize(journal.journal_path) < 1024
+
+    # Bytes of a save that never reached the journal are ignored, then overwritten
+    with open(journal.log_path, "ab") as f:
+        f.write(b'{"list": "carved", "item": {"start_offset": 9')
+    resumed = ScanCheckpoint(img)
+    state = resumed.load()
+    assert state["carver"]["carved_files"] == carved
+    assert state["results"] == results
+    carved.append({"start_offset": 9000, "data": b"\x09"})
+    resumed.save(9000, {"in_file": False, "carved_files": carved}, results)
+    assert ScanCheckpoint(img).load()["carver"]["carved_files"] == carved
+
+    resumed.clear()
+    assert not os.path.exists(resumed.log_path)
+
+
+def test_checkpoint_rejects_mismatched_image(tmp_path):
+    """A journal written for a different image size or block size is ignored."""
+    img = _make_image(tmp_path)
+    journal = ScanCheckpoint(img)
+    journal.save(512, {}, [])
+
+    assert ScanCheckpoint(img, block_size=4096).load() is None
+    with open(img, "ab") as f:
+        f.write(b"\x00" * 512)
+    assert ScanCheckpoint(img).load() is None
+
+    with open(journal.journal_path, "w") as f:
+        f.write("{ not json")
+    assert ScanCheckpoint(img).load() is None
+
+
+def test_checkpoint_maybe_save_interval(tmp_path):
+    """maybe_save only writes once the interval has elapsed."""
+    img = _make_image(tmp_path)
+    journal = ScanCheckpoint(img, interval=3600)
+    assert journal.maybe_save(512, {}, []) is False
+    assert not os.path.exists(journal.journal_path)
+
+    journal.interval = 0
+    assert journal.maybe_save(512, {}, []) is True
+    with open(journal.journal_path) as f:
+        assert json.load(f)["offset"] == 512
+
+
+def test_checkpoint_maybe_save_builds_state_lazily(tmp_path):
+    """A callable carver state is only called when the journal is written."""
+    img = _make_image(tmp_path)
+    journal = ScanCheckpoint(img, interval=3600)
+    calls = []
+
+    def get_state():
+        calls.append(1)
+        return {"in_file": False}
+
+    assert journal.maybe_save(512, get_state, []) is False
+    assert calls == []
+    journal.interval = 0
+    assert journal.maybe_save(1024, get_state, []) is True
+    assert calls == [1]
+    assert ScanCheckpoint(img).load()["carver"] == {"in_file": False}
+
+
+def test_resumed_scan_matches_full_scan(tmp_path):
+    """Resuming from a mid-file checkpoint carves exactly what a full scan carves."""
+    img = _make_image(tmp_path)
+
+    with DiskScanner(img) as scanner:
+        full = SignatureCarver()
+        for segment in scanner.scan_segments(chunk_size=1024):
+            if segment.fill is None:
+                full.process_chunk(segment.offset, segment.blocks)
+            else:
+                full.process_fill(segment.offset, segment.length, segment.fill)
+
+        # Interrupt inside the first JPEG (which starts at 3000)
+        journal = ScanCheckpoint(img)
+        first = SignatureCarver()
+        for segment in scanner.scan_segments(chunk_size=1024, end=4096):
+            first.process_chunk(segment.offset, segment.blocks)
+        assert first.in_file
+        journal.save(4096, first.get_state(), [])
+
+        state = ScanCheckpoint(img).load()
+        resumed = SignatureCarver()
+        resumed.load_state(state["carver"])
+        for segment in scanner.scan_segments(chunk_size=1024, start=state["offset"]):
+            if segment.fill is None:
+                resumed.process_chunk(segment.offset, segment.blocks)
+            else:
+                resumed.process_fill(segment.offset, segment.length, segment.fill)
+
+    assert len(full.get_carved_files()) == 2
+    assert resumed.get_carved_files() == full.get_carved_files()
@@ -0,0 +1,91 @@
+import gzip
+import os
+import numpy as np
+from storage_scan.scanner import DiskScanner
+from storage_scan.sources import image_size
+from storage_scan.compressed import CompressedImageSource, write_compressed_image
+from storage_scan.cache import LRUCache
+from carving.signature import SignatureCarver
+
+
+def _image(tmp_path):
+    """128 KiB image: random data, an all-zero stretch and a JPEG inside a frame boundary."""
+    rng = np.random.default_rng(0)
+    data = bytearray(rng.integers(0, 256, 128 * 1024, dtype=np.uint8).tobytes())
+    data[32 * 1024:80 * 1024] = bytes(48 * 1024)
+    jpeg = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00" + bytes(range(1, 200)) * 20 + b"\xff\xd9"
+    data[30 * 1024:30 * 1024 + len(jpeg)] = jpeg
+    path = tmp_path / "disk.dd"
+    path.write_bytes(bytes(data))
+    return str(path), bytes(data)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_compressed_image_random_access(tmp_path):
+    raw_path, data = _image(tmp_path)
+    out = str(tmp_path / "disk.szi")
+    assert write_compressed_image(raw_path, out, frame_size=16 * 1024) == len(data)
+    assert os.path.getsize(out) < len(data)
+    assert image_size(out) == len(data)
+
+    with CompressedImageSource(out, cached_frames=2) as source:
+        assert source.read(16 * 1024 - 10, 40) == data[16 * 1024 - 10:16 * 1024 + 30]
+        assert source.read(len(data) - 5, 100) == data[-5:]
+        # Frames 2-4 are all zero and are not reported as data
+        assert source.data_extents(0, len(data)) == [(0, 48 * 1024), (80 * 1024, len(data))]
+        assert len(source.cache) <= 2
+
+
+class ShortReader:
+    """Binary file object returning at most 1000 bytes per read, like a raw pipe."""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def read(self, size=-1):
+        size = min(size, 1000)
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        return chunk
+
+
+def test_compressed_image_from_short_reads(tmp_path):
+    _, data = _image(tmp_path)
+    out = str(tmp_path / "short.szi")
+    assert write_compressed_image(ShortReader(data), out, frame_size=16 * 1024) == len(data)
+    with CompressedImageSource(out) as source:
+        assert source.read(0, len(data)) == data
+
+
+def test_scanner_reads_compressed_image(tmp_path):
+    """DiskScanner detects the container; chunked scans and carving see the raw bytes."""
+    raw_path, data = _image(tmp_path)
+    gz_path = raw_path + ".gz"
+    with gzip.open(gz_path, "wb") as f:
+        f.write(data)
+    out = str(tmp_path / "disk.szi")
+    write_compressed_image(gz_path, out, frame_size=16 * 1024)
+
+    with DiskScanner(out) as scanner:
+        assert scanner.file_size == len(data)
+        joined = b"".join(blocks.tobytes() for _, blocks in scanner.scan_chunks(chunk_size=20 * 1024))
+        assert joined == data
+
+        carver = SignatureCarver()
+        for segment in scanner.scan_segments(chunk_size=20 * 1024):
+            if segment.fill is None:
+                carver.process_chunk(segment.offset, segment.blocks)
+            else:
+                carver.process_fill(segment.offset, segment.length, segment.fill)
+        assert [f["start_offset"] for f in carver.get_carved_files()] == [30 * 1024]
@@ -0,0 +1,84 @@
+import os
+import numpy as np
+import pytest
+from storage_scan.scanner import DiskScanner
+from storage_scan.sources import FileSource, open_source
+from storage_scan.direct_io import DirectFileSource, ALIGNMENT
+from carving.signature import SignatureCarver
+
+
+@pytest.fixture
+def large_image(tmp_path):
+    """Random image that is not a multiple of the O_DIRECT alignment."""
+    rng = np.random.default_rng(7)
+    data = rng.integers(0, 256, size=5 * ALIGNMENT * 16 + 1536, dtype=np.uint8).tobytes()
+    path = tmp_path / "large.img"
+    path.write_bytes(data)
+    return str(path), data
+
+
+@pytest.fixture(params=["direct", "buffered"])
+def direct_source(request, large_image, monkeypatch):
+    """Opens the image with O_DIRECT where the file system allows, and with the fallback."""
+    path, data = large_image
+    if request.param == "buffered":
+        real_open = os.open
+
+        def no_direct(p, flags, *args):
+            if flags & getattr(os, "O_DIRECT", 0):
+                raise OSError(22, "Invalid argument")
+            return real_open(p, flags, *args)
+        monkeypatch.setattr(os, "open", no_direct)
+    source = DirectFileSource(path)
+    if request.param == "direct" and not source.direct:
+        source.close()
+        pytest.skip("O_DIRECT not supported here")
+    yield source, data
+    source.close()
+
+
+def test_open_source_direct_io(large_image):
+    path, _ = large_image
+    with open_source(path) as source:
+        assert isinstance(source, FileSource)
+    with open_source(path, direct_io=True) as source:
+        assert isinstance(source, DirectFileSource)
+
+
+def test_sequential_views_are_prefetched(direct_source):
+    source, data = direct_source
+    chunk = 3 * ALIGNMENT + 512  # Unaligned chunk size
+    views = []
+    for offset in range(0, source.size, chunk):
+        view = source.view(offset, chunk)
+        assert not view.flags.writeable
+        assert view.tobytes() == data[offset:offset + chunk]
+        views.append(view)
+        if len(views) > 1:
+            # The previous chunk stays valid while the next one is in use
+            assert views[-2].tobytes() == data[offset - chunk:offset]
+
+
+def test_random_reads_and_views(direct_source):
+    source, data = direct_source
+    assert source.read(0, 10) == data[:10]
+    assert source.read(ALIGNMENT - 3, 7) == data[ALIGNMENT - 3:ALIGNMENT + 4]
+    assert source.read(len(data) - 5, 100) == data[-5:]
+    assert source.read(len(data), 10) == b""
+    # Jumping around discards the read-ahead without corrupting views
+    for offset in (50_000, 123, 200_000, 50_000 + 4096):
+        assert source.view(offset, 3000).tobytes() == data[offset:offset + 3000]
+    assert source.data_extents(0, len(data))[0][0] == 0
+
+
+def test_direct_io_scan_matches_mmap(dummy_disk_image):
+    """A carving pass over O_DIRECT chunks finds the same files as over the mmap."""
+    results = []
+    for direct_io in (False, True):
+        carver = SignatureCarver(block_size=512)
+        with DiskScanner(dummy_disk_image, direct_io=direct_io) as scanner:
+            for offset, blocks in scanner.scan_chunks(chunk_size=1024):
+                carver.process_chunk(offset, blocks)
+        results.append([(f["start_offset"], f["data"]) for f in carver.get_carved_files()])
+    assert results[0] == results[1]
+    assert results[1] and results[1][0][0] == 1000
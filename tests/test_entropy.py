@@ -0,0 +1,88 @@
+import math
+import os
+import numpy as np
+from storage_scan.scanner import DiskScanner
+from storage_scan.entropy import (
+    EntropyMap,
+    block_statistics,
+    FLAG_ZERO_FILL,
+    FLAG_FF_FILL,
+)
+
+
+def test_block_statistics_matches_scalar_entropy():
+    """Batched entropy agrees with DiskScanner.calculate_entropy per block."""
+    blocks = np.frombuffer(os.urandom(4 * 512), dtype=np.uint8).reshape(4, 512).copy()
+    blocks[1] = 0x00
+    blocks[2] = 0xFF
+    blocks[3] = np.frombuffer(b"AB" * 256, dtype=np.uint8)
+
+    stats = block_statistics(blocks)
+    for i, row in enumerate(blocks):
+        assert math.isclose(stats["entropy"][i], DiskScanner.calculate_entropy(row.tobytes()), abs_tol=1e-9)
+        assert stats["histograms"][i].sum() == 512
+
+    assert list(stats["zero_fill"]) == [False, True, False, False]
+    assert list(stats["ff_fill"]) == [False, False, True, False]
+    assert stats["printable_ratio"][3] == 1.0
+    assert stats["printable_ratio"][1] == 0.0
+
+
+def test_entropy_map_build_save_load(tmp_path):
+    """Builds a map over an image and round-trips it through disk."""
+    img_path = tmp_path / "stats.dd"
+    img_path.write_bytes(b"\x00" * 512 + os.urandom(512) + b"\xff" * 512 + b"tail")
+
+    with DiskScanner(str(img_path), block_size=512) as scanner:
+        entropy_map = EntropyMap.build(scanner, chunk_size=1024)
+
+    assert entropy_map.entropy.dtype == np.float16
+    assert len(entropy_map.entropy) == 3
+    assert list(entropy_map.flags) == [FLAG_ZERO_FILL, 0, FLAG_FF_FILL]
+    assert entropy_map.entropy_at(600) > 7.0
+    assert entropy_map.is_fill(0) and entropy_map.is_fill(1024)
+    assert int(entropy_map.histogram.sum()) == 3 * 512
+
+    path = EntropyMap.default_path(str(img_path))
+    entropy_map.save(path)
+    loaded = EntropyMap.load(path)
+    assert loaded.block_size == 512
+    assert loaded.image_size == entropy_map.image_size
+    assert np.array_equal(loaded.entropy, entropy_map.entropy)
+    assert np.array_equal(loaded.flags, entropy_map.flags)
+
+
+def test_entropy_map_load_or_build_reuses_stored_map(tmp_path):
+    """A stored map for the same image is reused instead of rebuilt."""
+    img_path = tmp_path / "reuse.dd"
+    img_path.write_bytes(os.urandom(2048))
+
+    with DiskScanner(str(img_path)) as scanner:
+        first = EntropyMap.load_or_build(scanner)
+        assert os.path.exists(EntropyMap.default_path(str(img_path)))
+
+        # Tamper with the stored map; a reload must return the stored values
+        first.entropy[:] = 0
+        first.save(EntropyMap.default_path(str(img_path)))
+        second = EntropyMap.load_or_build(scanner)
+        assert not second.entropy.any()
+
+
+def test_entropy_map_rebuilt_after_in_place_edit(tmp_path):
+    """A stored map is discarded when the image changes without changing size."""
+    img_path = tmp_path / "edited.dd"
+    img_path.write_bytes(os.urandom(2048))
+
+    with DiskScanner(str(img_path)) as scanner:
+        first = EntropyMap.load_or_build(scanner)
+    assert first.image_mtime == os.stat(img_path).st_mtime_ns
+    assert EntropyMap.load(EntropyMap.default_path(str(img_path))).image_mtime == first.image_mtime
+
+    # Same size, new contents and a later modification time
+    img_path.write_bytes(b"\x00" * 2048)
+    stat = os.stat(img_path)
+    os.utime(img_path, ns=(stat.st_atime_ns, first.image_mtime + 10**9))
+    with DiskScanner(str(img_path)) as scanner:
+        second = EntropyMap.load_or_build(scanner)
+    assert not second.entropy.any()
+    assert second.is_fill(0)
@@ -0,0 +1,88 @@
+import numpy as np
+from storage_scan.scanner import DiskScanner
+from carving.ext import EXTParser, BG_BLOCK_UNINIT
+from carving.partition import unallocated_ranges
+
+BLOCK = 1024
+
+
+def _ext_volume(tmp_path, blocks_count=700):
+    """
+    ext4-style volume with 1 KiB blocks, 256 blocks per group (3 groups) and
+    flex_bg: every group's bitmaps and inode table live in group 0.
+    Group 2 is BLOCK_UNINIT.
+    """
+    sb = bytearray(1024)
+    sb[0x04:0x08] = blocks_count.to_bytes(4, "little")
+    sb[0x14:0x18] = (1).to_bytes(4, "little")  # First data block
+    sb[0x18:0x1C] = (0).to_bytes(4, "little")  # 1024 << 0
+    sb[0x20:0x24] = (256).to_bytes(4, "little")
+    sb[0x28:0x2C] = (16).to_bytes(4, "little")
+    sb[0x38:0x3A] = (0xEF53).to_bytes(2, "little")
+    sb[0x4C:0x50] = (1).to_bytes(4, "little")
+    sb[0x58:0x5A] = (128).to_bytes(2, "little")
+    sb[0x60:0x64] = (0x0200).to_bytes(4, "little")  # flex_bg
+    sb[0x64:0x68] = (0x0011).to_bytes(4, "little")  # sparse_super, gdt_csum
+    sb[0x174] = 2
+
+    gdt = bytearray()
+    for g in range(3):
+        d = bytearray(32)
+        d[0x00:0x04] = (10 + g).to_bytes(4, "little")
+        d[0x04:0x08] = (13 + g).to_bytes(4, "little")
+        d[0x08:0x0C] = (16 + 2 * g).to_bytes(4, "little")
+        d[0x12:0x14] = (BG_BLOCK_UNINIT if g == 2 else 0).to_bytes(2, "little")
+        gdt += d
+
+    used = np.zeros((2, 256), dtype=bool)
+    used[0, 0:31] = True  # Blocks 1-31: superblock, GDT, bitmaps, inode tables
+    used[1, 0:3] = True  # Superblock backup in group 1
+    used[1, 100:110] = True  # A live file
+    bitmaps = np.packbits(used, axis=1, bitorder="little")
+
+    image = bytearray(blocks_count * BLOCK)
+    image[BLOCK:2 * BLOCK] = sb
+    image[2 * BLOCK:2 * BLOCK + len(gdt)] = gdt
+    for g in range(2):
+        image[(10 + g) * BLOCK:(10 + g) * BLOCK + 32] = bitmaps[g].tobytes()
+    path = tmp_path / "ext4.img"
+    path.write_bytes(bytes(image))
+    return str(path)
+
+
+def test_ext_superblock_and_descriptors(tmp_path):
+    path = _ext_volume(tmp_path)
+    with DiskScanner(path) as scanner:
+        parser = EXTParser(scanner)
+        info = parser.parse()
+        descriptors = parser.group_descriptors()
+
+    assert info["block_size"] == 1024
+    assert info["group_count"] == 3
+    assert info["flex_bg"] and info["groups_per_flex"] == 4
+    assert [d["block_bitmap"] for d in descriptors] == [10, 11, 12]
+    assert descriptors[2]["flags"] & BG_BLOCK_UNINIT
+
+
+def test_ext_free_extents(tmp_path, monkeypatch):
+    """Block bitmaps become free extents; adjacent flex_bg bitmaps are read in one request."""
+    path = _ext_volume(tmp_path)
+    with DiskScanner(path) as scanner:
+        parser = EXTParser(scanner)
+        parser.parse()
+        descriptors = parser.group_descriptors()
+
+        reads = []
+        original = scanner.read_range
+        monkeypatch.setattr(scanner, "read_range", lambda o, n: reads.append((o, n)) or original(o, n))
+        allocated = parser.allocated_block_bitmap(descriptors)
+        assert reads == [(10 * BLOCK, 2 * BLOCK)]
+
+        assert len(allocated) == 700
+        assert list(np.flatnonzero(allocated)) == list(range(0, 32)) + [257, 258, 259] + list(range(357, 367))
+        expected = [(32 * BLOCK, 257 * BLOCK), (260 * BLOCK, 357 * BLOCK), (367 * BLOCK, 700 * BLOCK)]
+        assert parser.free_extents(allocated) == expected
+        monkeypatch.undo()
+
+        # A bare ext volume is recognised and restricted to its free blocks
+        assert unallocated_ranges(scanner) == expected
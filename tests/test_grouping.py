@@ -161,6 +161,21 @@ def test_footer_detection():
     assert 1024 not in results[0]['fragment_offsets']
     assert results[0]['completed'] == True
 
+def test_grouping_reads_missing_data_from_scanner(dummy_disk_image):
+    """Fragments carrying only an offset are read through the scanner's block cache."""
+    from storage_scan.scanner import DiskScanner
+
+    image = open(dummy_disk_image, "rb").read()
+    fragments = [
+        {'offset': 1024, 'identification': {'type': 'jpeg', 'source': 'signature'}},
+        {'offset': 1536, 'identification': {'type': 'jpeg', 'source': 'ai'}},
+    ]
+    with DiskScanner(dummy_disk_image) as scanner:
+        results = FragmentGrouper(scanner=scanner).group_fragments(fragments)
+        assert scanner.block_cache.misses == 1
+    assert results[0]['data'] == image[1024:2048]
+    assert 'data' not in fragments[0]
+
 if __name__ == "__main__":
     import sys
     # For --parallel flag mentioned in the plan
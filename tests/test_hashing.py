@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+from storage_scan.scanner import DiskScanner
+from storage_scan.hashing import ImageHasher, ImageHashTree, hash_regions, merkle_root
+
+
+def _image(tmp_path):
+    """Image with data, zero runs and a trailing partial block."""
+    rng = np.random.default_rng(11)
+    data = (rng.integers(0, 256, size=6000, dtype=np.uint8).tobytes() + bytes(9000)
+            + b"\xff" * 4096 + rng.integers(0, 256, size=3333, dtype=np.uint8).tobytes())
+    path = tmp_path / "hashed.img"
+    path.write_bytes(data)
+    return str(path), data
+
+
+def test_hashes_computed_in_scan_pass(tmp_path):
+    path, data = _image(tmp_path)
+    with DiskScanner(path) as scanner:
+        scanner.enable_hashing(region_size=4096)
+        segments = list(scanner.scan_segments(chunk_size=2048))
+        assert any(s.fill is not None for s in segments)
+        tree = scanner.finish_hashing()
+
+    assert tree.size == len(data)
+    assert tree.md5 == hashlib.md5(data).hexdigest()
+    assert tree.sha256 == hashlib.sha256(data).hexdigest()
+    expected = [hashlib.sha256(data[i:i + 4096]).hexdigest() for i in range(0, len(data), 4096)]
+    assert tree.leaves == expected
+    assert tree.root == merkle_root(expected)
+
+
+def test_hash_regions_are_tree_leaves(tmp_path):
+    """Region hashes for incremental rescans use the hash tree's regions and digest."""
+    path, data = _image(tmp_path)
+    whole = len(data) // 512 * 512
+    with DiskScanner(path) as scanner:
+        leaves = hash_regions(scanner, region_size=4096)
+    assert leaves == [hashlib.sha256(data[i:min(i + 4096, whole)]).hexdigest() for i in range(0, whole, 4096)]
+
+    aligned = tmp_path / "aligned.img"
+    aligned.write_bytes(data[:whole])
+    with DiskScanner(str(aligned)) as scanner:
+        scanner.enable_hashing(region_size=4096)
+        list(scanner.scan_segments())
+        assert scanner.finish_hashing().leaves == leaves
+
+
+def test_incomplete_scan_has_no_hash(tmp_path):
+    path, _ = _image(tmp_path)
+    with DiskScanner(path) as scanner:
+        scanner.enable_hashing(region_size=4096)
+        list(scanner.scan_segments(start=4096))
+        assert scanner.finish_hashing() is None
+    with DiskScanner(path) as scanner:
+        assert scanner.finish_hashing() is None
+
+
+def test_merkle_root_shape():
+    leaves = [hashlib.sha256(bytes([i])).hexdigest() for i in range(3)]
+    assert merkle_root(leaves) != merkle_root(leaves[:2])
+    assert merkle_root(leaves) != merkle_root(list(reversed(leaves)))
+    # A single leaf is still domain-separated from its raw digest
+    assert merkle_root(leaves[:1]) != leaves[0]
+
+
+def test_verify_only_touched_regions(tmp_path):
+    path, data = _image(tmp_path)
+    hasher = ImageHasher(region_size=4096)
+    hasher.update(0, data)
+    tree = hasher.finalize()
+    tree_path = ImageHashTree.default_path(path)
+    tree.save(tree_path)
+
+    # Corrupt one byte in region 2
+    with open(path, "r+b") as f:
+        f.seek(9000)
+        f.write(b"\x01")
+
+    loaded = ImageHashTree.load(tree_path)
+    with DiskScanner(path) as scanner:
+        assert loaded.verify_ranges(scanner, [(0, 8192), (16384, 20000)]) == []
+        assert loaded.verify_ranges(scanner, [(8500, 8600)]) == [(8192, 12288)]
+        assert loaded.verify_ranges(scanner) == [(8192, 12288)]
+
+    # Tampered leaves no longer match the stored root
+    stored = json.load(open(tree_path))
+    stored["leaves"][0] = stored["leaves"][1]
+    json.dump(stored, open(tree_path, "w"))
+    assert ImageHashTree.load(tree_path) is None
+
+
+def test_main_hash_and_verify(dummy_disk_image):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data = open(dummy_disk_image, "rb").read()
+    result = subprocess.run([sys.executable, "main.py", "--image", str(dummy_disk_image), "--hash"],
+                            cwd=root, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert hashlib.sha256(data).hexdigest() in result.stdout
+    assert os.path.exists(ImageHashTree.default_path(str(dummy_disk_image)))
+
+    result = subprocess.run([sys.executable, "main.py", "--image", str(dummy_disk_image), "--verify-hash"],
+                            cwd=root, capture_output=True, text=True, timeout=120)
+    assert "Hash verification passed for 1 regions" in result.stdout
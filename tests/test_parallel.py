@@ -0,0 +1,80 @@
+import os
+import pytest
+from storage_scan.scanner import DiskScanner
+from storage_scan.parallel import plan_shards, scan_shard, merge_shard_results, parallel_scan
+from carving.signature import SignatureCarver
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+JPEG_FOOTER = b"\xff\xd9"
+
+
+def _jpeg(size: int) -> bytes:
+    # Body without any 0xFF so no spurious footers appear
+    return JPEG_HEADER + bytes((i % 250) + 1 for i in range(size)) + JPEG_FOOTER
+
+
+@pytest.fixture
+def multi_jpeg_image(tmp_path):
+    """64 KiB image with JPEGs placed so that two cross 16 KiB shard boundaries."""
+    image = bytearray(64 * 1024)
+    placements = [(1000, 3000), (16 * 1024 - 700, 5000), (40000, 200), (48 * 1024 - 100, 9000)]
+    for offset, size in placements:
+        data = _jpeg(size)
+        image[offset:offset + len(data)] = data
+    path = tmp_path / "multi.dd"
+    path.write_bytes(bytes(image))
+    return str(path), [offset for offset, _ in placements]
+
+
+def _sequential_carve(path):
+    with DiskScanner(path) as scanner:
+        carver = SignatureCarver()
+        for offset, block in scanner.scan_blocks():
+            carver.process_block(offset, block)
+        return carver.get_carved_files()
+
+
+def test_plan_shards_covers_image():
+    """Shards are block-aligned, contiguous and cover every whole block."""
+    shards = plan_shards(10 * 512 + 100, 3)
+    assert shards[0][0] == 0
+    assert shards[-1][1] == 10 * 512
+    for (_, end), (start, _) in zip(shards, shards[1:]):
+        assert end == start
+    assert all(start % 512 == 0 and end % 512 == 0 for start, end in shards)
+    # Never more shards than blocks
+    assert len(plan_shards(2 * 512, 8)) == 2
+
+
+def test_scan_shard_follows_file_across_boundary(multi_jpeg_image):
+    """A file starting in one shard is finished from the overlap, not by the next shard."""
+    path, offsets = multi_jpeg_image
+    first = scan_shard(path, 0, 16 * 1024)
+    second = scan_shard(path, 16 * 1024, 32 * 1024)
+
+    assert [f["start_offset"] for f in first["carved_files"]] == offsets[:2]
+    assert second["carved_files"] == []
+
+
+def test_parallel_scan_matches_sequential(multi_jpeg_image):
+    """Sharded multi-process carving returns the sequential results in offset order."""
+    path, offsets = multi_jpeg_image
+    results = parallel_scan(path, workers=2, chunk_size=4096)
+
+    expected = _sequential_carve(path)
+    assert [f["start_offset"] for f in results["carved_files"]] == offsets
+    assert [f["start_offset"] for f in results["carved_files"]] == [f["start_offset"] for f in expected]
+    assert [f["data"] for f in results["carved_files"]] == [f["data"] for f in expected]
+
+
+def test_merge_drops_carves_inside_earlier_file():
+    """A header found inside a file carved by an earlier shard is not reported twice."""
+    outer = {"start_offset": 100, "data": b"x" * 1000}
+    nested = {"start_offset": 600, "data": b"y" * 10}
+    later = {"start_offset": 2000, "data": b"z" * 10}
+    merged = merge_shard_results([
+        {"carved_files": [outer], "fragments": [], "bytes_scanned": 512},
+        {"carved_files": [nested, later], "fragments": [], "bytes_scanned": 512},
+    ])
+    assert merged["carved_files"] == [outer, later]
+    assert merged["bytes_scanned"] == 1024
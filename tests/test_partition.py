@@ -0,0 +1,180 @@
+import struct
+import uuid
+import zlib
+from storage_scan.scanner import DiskScanner
+from storage_scan.parallel import plan_range_shards
+from carving.partition import PartitionTable, ScanUnit
+
+SECTOR = 512
+
+
+def _entry(part_type, lba_start, num_sectors):
+    return b"\x00" * 4 + bytes([part_type]) + b"\x00" * 3 + struct.pack("<II", lba_start, num_sectors)
+
+
+def _boot_record(entries):
+    sector = bytearray(SECTOR)
+    for slot, entry in enumerate(entries):
+        sector[446 + slot * 16:446 + (slot + 1) * 16] = entry
+    sector[510:512] = b"\x55\xaa"
+    return sector
+
+
+def _fat32_boot():
+    boot = bytearray(SECTOR)
+    boot[0x52:0x5A] = b"FAT32   "
+    return boot
+
+
+def _ntfs_boot():
+    boot = bytearray(SECTOR)
+    boot[3:11] = b"NTFS    "
+    return boot
+
+
+def _write(path, size, writes):
+    image = bytearray(size)
+    for offset, data in writes:
+        image[offset:offset + len(data)] = data
+    path.write_bytes(bytes(image))
+    return str(path)
+
+
+def test_mbr_with_extended_partitions(tmp_path):
+    """Primary and logical partitions (via the EBR chain) are listed with detected file systems."""
+    writes = [
+        (0, _boot_record([_entry(0x0C, 64, 64), _entry(0x05, 192, 256)])),
+        # First EBR: logical at +8 for 32 sectors, link to next EBR at extended+128
+        (192 * SECTOR, _boot_record([_entry(0x07, 8, 32), _entry(0x05, 128, 100)])),
+        # Second EBR: logical at +4 for 16 sectors, end of chain
+        (320 * SECTOR, _boot_record([_entry(0x83, 4, 16)])),
+        (64 * SECTOR, _fat32_boot()),
+        (200 * SECTOR, _ntfs_boot()),
+    ]
+    path = _write(tmp_path / "mbr.dd", 512 * SECTOR, writes)
+
+    with DiskScanner(path) as scanner:
+        table = PartitionTable(scanner)
+        partitions = table.parse()
+        units = table.scan_units()
+
+    assert table.scheme == "mbr"
+    assert [(p["start"], p["length"]) for p in partitions] == [
+        (64 * SECTOR, 64 * SECTOR),
+        (200 * SECTOR, 32 * SECTOR),
+        (324 * SECTOR, 16 * SECTOR),
+    ]
+    assert [p["name"] for p in partitions] == ["primary", "logical", "logical"]
+    assert [p["fs_type"] for p in partitions] == ["fat32", "ntfs", None]
+
+    assert units == [
+        ScanUnit(0, 64 * SECTOR, "gap", None, None),
+        ScanUnit(64 * SECTOR, 128 * SECTOR, "partition", "fat32", 0),
+        ScanUnit(128 * SECTOR, 200 * SECTOR, "gap", None, None),
+        ScanUnit(200 * SECTOR, 232 * SECTOR, "partition", "ntfs", 1),
+        ScanUnit(232 * SECTOR, 324 * SECTOR, "gap", None, None),
+        ScanUnit(324 * SECTOR, 340 * SECTOR, "partition", None, 2),
+        ScanUnit(340 * SECTOR, 512 * SECTOR, "gap", None, None),
+    ]
+
+
+def _gpt_entry(type_guid, first, last, name):
+    entry = bytearray(128)
+    entry[0:16] = uuid.UUID(type_guid).bytes_le
+    entry[16:32] = uuid.uuid4().bytes_le
+    entry[32:48] = struct.pack("<QQ", first, last)
+    encoded = name.encode("utf-16-le")
+    entry[56:56 + len(encoded)] = encoded
+    return entry
+
+
+def _gpt_header(entries, entries_lba=2, num_entries=4):
+    header = bytearray(SECTOR)
+    header[0:8] = b"EFI PART"
+    header[0x0C:0x10] = struct.pack("<I", 92)
+    header[0x48:0x5C] = struct.pack("<QIII", entries_lba, num_entries, 128, zlib.crc32(entries))
+    header[0x10:0x14] = struct.pack("<I", zlib.crc32(header[:92]))
+    return header
+
+
+def _gpt_disk(tmp_path, entries, header=None, backup=None):
+    ext_super = bytearray(2048)
+    ext_super[1024 + 0x38:1024 + 0x3A] = b"\x53\xef"
+    writes = [
+        (0, _boot_record([_entry(0xEE, 1, 199)])),
+        (SECTOR, header if header is not None else _gpt_header(entries)),
+        (2 * SECTOR, entries),
+        (40 * SECTOR, _ntfs_boot()),
+        (100 * SECTOR, ext_super),
+    ]
+    if backup is not None:
+        writes.append((199 * SECTOR, backup))
+    return _write(tmp_path / "gpt.dd", 200 * SECTOR, writes)
+
+
+GPT_ENTRIES = _gpt_entry("ebd0a0a2-b9e5-4433-87c0-68b6b72699c7", 40, 99, "Data") + \
+    bytes(128) + _gpt_entry("0fc63daf-8483-4772-8e79-3d69d8477de4", 100, 163, "root") + bytes(128)
+
+
+def test_gpt_partitions(tmp_path):
+    """A protective MBR leads to the GPT header and entry array."""
+    path = _gpt_disk(tmp_path, GPT_ENTRIES)
+
+    with DiskScanner(path) as scanner:
+        table = PartitionTable(scanner)
+        partitions = table.parse()
+
+    assert table.scheme == "gpt"
+    assert [(p["start"], p["length"]) for p in partitions] == [(40 * SECTOR, 60 * SECTOR), (100 * SECTOR, 64 * SECTOR)]
+    assert [p["type"] for p in partitions] == ["Microsoft Basic Data", "Linux Filesystem"]
+    assert [p["name"] for p in partitions] == ["Data", "root"]
+    assert [p["fs_type"] for p in partitions] == ["ntfs", "ext"]
+
+
+def _gpt_starts(path):
+    with DiskScanner(path) as scanner:
+        return [p["start"] for p in PartitionTable(scanner).parse()]
+
+
+def test_gpt_rejects_corrupt_headers(tmp_path):
+    """CRC32 mismatches and implausible entry counts invalidate a GPT header."""
+    header = _gpt_header(GPT_ENTRIES)
+    header[0x20] ^= 0x01  # Any header byte covered by the CRC
+    assert _gpt_starts(_gpt_disk(tmp_path, GPT_ENTRIES, header=header)) == []
+
+    corrupt_entries = bytearray(GPT_ENTRIES)
+    corrupt_entries[32] ^= 0x01
+    header = _gpt_header(GPT_ENTRIES)
+    assert _gpt_starts(_gpt_disk(tmp_path, corrupt_entries, header=header)) == []
+
+    # A header claiming millions of entries is not trusted, even with valid CRCs
+    huge = _gpt_header(GPT_ENTRIES, num_entries=4_000_000)
+    assert _gpt_starts(_gpt_disk(tmp_path, GPT_ENTRIES, header=huge)) == []
+
+    # A damaged primary header falls back to the backup in the last sector
+    header = _gpt_header(GPT_ENTRIES)
+    header[0x20] ^= 0x01
+    backup = _gpt_header(GPT_ENTRIES)
+    assert _gpt_starts(_gpt_disk(tmp_path, GPT_ENTRIES, header=header, backup=backup)) == [40 * SECTOR, 100 * SECTOR]
+
+
+def test_gpt_skips_inverted_entries(tmp_path):
+    """Entries whose last LBA precedes their first LBA are ignored."""
+    entries = _gpt_entry("ebd0a0a2-b9e5-4433-87c0-68b6b72699c7", 99, 40, "Bad") + \
+        _gpt_entry("0fc63daf-8483-4772-8e79-3d69d8477de4", 100, 163, "root")
+    assert _gpt_starts(_gpt_disk(tmp_path, entries + bytes(256))) == [100 * SECTOR]
+
+
+def test_unpartitioned_image_is_one_gap(dummy_disk_image):
+    with DiskScanner(dummy_disk_image) as scanner:
+        table = PartitionTable(scanner)
+        assert table.parse() == []
+        assert table.scan_units() == [ScanUnit(0, 5 * SECTOR, "gap", None, None)]
+
+
+def test_plan_range_shards_stays_within_units():
+    ranges = [(0, 100 * SECTOR), (300 * SECTOR, 320 * SECTOR)]
+    shards = plan_range_shards(ranges, 6)
+    assert shards[0][0] == 0 and shards[-1][1] == 320 * SECTOR
+    assert all(end <= 100 * SECTOR or start >= 300 * SECTOR for start, end in shards)
+    assert sum(end - start for start, end in shards) == 120 * SECTOR
@@ -0,0 +1,105 @@
+import os
+import random
+import numpy as np
+import pytest
+from carving.patterns import DEFAULT_SIGNATURES, MultiPatternMatcher, Signature, SignatureHit
+from carving.signature import SignatureCarver
+from storage_scan.checkpoint import ScanCheckpoint
+
+
+def _planted_data(seed=1, size=64 * 1024, count=100):
+    """Random bytes with default signatures written at random places."""
+    rng = random.Random(seed)
+    data = bytearray(rng.randbytes(size))
+    for _ in range(count):
+        signature = rng.choice(DEFAULT_SIGNATURES)
+        pos = rng.randrange(size - len(signature.pattern))
+        data[pos:pos + len(signature.pattern)] = signature.pattern
+    return bytes(data)
+
+
+def _brute_force(data, signatures):
+    hits = []
+    for pattern_id, signature in enumerate(signatures):
+        pos = data.find(signature.pattern)
+        while pos != -1:
+            hits.append((pos, pattern_id))
+            pos = data.find(signature.pattern, pos + 1)
+    return sorted(hits)
+
+
+@pytest.mark.parametrize("signatures", [DEFAULT_SIGNATURES, DEFAULT_SIGNATURES[:5]])
+def test_find_matches_every_pattern(signatures):
+    # Many distinct first bytes use the pair table, few the first-byte passes
+    data = _planted_data()
+    matcher = MultiPatternMatcher(signatures)
+    hits = matcher.find(data)
+    assert [tuple(h) for h in hits] == _brute_force(data, signatures)
+    assert all(isinstance(h, SignatureHit) for h in hits)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 512, 4096])
+def test_scan_finds_signatures_straddling_chunks(chunk_size):
+    data = _planted_data(seed=2, size=16 * 1024, count=60)
+    matcher = MultiPatternMatcher()
+    hits = []
+    for offset in range(0, len(data), chunk_size):
+        hits.extend(matcher.scan(offset, data[offset:offset + chunk_size]))
+    # Exactly once each, in offset order within every chunk
+    assert sorted(tuple(h) for h in hits) == _brute_force(data, DEFAULT_SIGNATURES)
+
+
+def test_scan_accepts_block_views_and_resets_on_gaps():
+    matcher = MultiPatternMatcher([Signature("pdf", "header", b"%PDF-")])
+    blocks = np.zeros((2, 8), dtype=np.uint8)
+    blocks[0, 6:] = np.frombuffer(b"%P", dtype=np.uint8)
+    blocks[1, :3] = np.frombuffer(b"DF-", dtype=np.uint8)
+    assert matcher.scan(100, blocks[:1]) == []
+    assert matcher.scan(108, blocks[1:]) == [SignatureHit(106, 0)]
+    # The same split across a gap is not a match
+    matcher.scan(0, b"xxx%P")
+    assert matcher.scan(50, b"DF-") == []
+
+
+def test_fill_runs_advance_the_carry():
+    matcher = MultiPatternMatcher([Signature("x", "header", b"A\x00\x00B")])
+    assert matcher.scan(0, b"zzA") == []
+    assert matcher.feed_fill(3, 2, 0) == []
+    assert matcher.scan(5, b"B") == [SignatureHit(2, 0)]
+    # A long run leaves only fill bytes in the carry
+    matcher.feed_fill(6, 1000, 0)
+    assert matcher.carry == b"\x00" * 3 and matcher.next_offset == 1006
+
+
+def test_rejects_short_patterns():
+    with pytest.raises(ValueError):
+        MultiPatternMatcher([Signature("x", "header", b"A")])
+    with pytest.raises(ValueError):
+        MultiPatternMatcher([])
+
+
+def test_carver_finds_header_split_across_blocks():
+    jpeg = b"\xff\xd8\xff\xe0" + b"\x11" * 600 + b"\xff\xd9"
+    image = b"\x22" * 510 + jpeg + b"\x22" * (1536 - 510 - len(jpeg))
+    carver = SignatureCarver()
+    for offset in range(0, len(image), 512):
+        carver.process_block(offset, image[offset:offset + 512])
+    assert carver.get_carved_files() == [{"start_offset": 510, "data": jpeg}]
+
+
+def test_carver_state_keeps_split_header(tmp_path):
+    jpeg = b"\xff\xd8\xff\xe1" + b"\x11" * 100 + b"\xff\xd9"
+    image = b"\x22" * 1022 + jpeg + b"\x22" * (2048 - 1022 - len(jpeg))
+    first = SignatureCarver()
+    first.process_chunk(0, image[:1024])
+    assert not first.in_file
+
+    # The header bytes carried over survive a checkpoint round trip
+    img = tmp_path / "img.dd"
+    img.write_bytes(image)
+    journal = ScanCheckpoint(str(img), str(tmp_path / "journal.json"))
+    journal.save(1024, first.get_state(), [])
+    resumed = SignatureCarver()
+    resumed.load_state(journal.load()["carver"])
+    resumed.process_chunk(1024, image[1024:])
+    assert resumed.get_carved_files() == [{"start_offset": 1022, "data": jpeg}]
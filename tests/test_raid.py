@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from storage_scan.scanner import DiskScanner
+from storage_scan.raid import RaidSource, raid5_map, guess_raid_geometry
+
+STRIPE = 16 * 1024
+
+
+def _logical_volume(size, seed=0):
+    """MBR followed by 'files' of random, text-like and zero content, each 64-192 KiB."""
+    rng = np.random.default_rng(seed)
+    volume = bytearray()
+    while len(volume) < size:
+        kind = len(volume) // 1024 % 3
+        length = int(rng.integers(128, 384)) * 512
+        if kind == 0:
+            volume += rng.integers(0, 256, length, dtype=np.uint8).tobytes()
+        elif kind == 1:
+            volume += rng.choice(np.frombuffer(b"etaoin shrdlu", dtype=np.uint8), length).tobytes()
+        else:
+            volume += bytes(length)
+    volume = volume[:size]
+    volume[510:512] = b"\x55\xaa"
+    return bytes(volume)
+
+
+def _stripe(tmp_path, volume, num_disks, level, layout="left-symmetric"):
+    """Splits a logical volume into RAID member images; returns their paths."""
+    data_disks = num_disks - 1 if level == 5 else num_disks
+    rows = len(volume) // (STRIPE * data_disks)
+    members = [bytearray(rows * STRIPE) for _ in range(num_disks)]
+    for row in range(rows):
+        chunks = []
+        for i in range(data_disks):
+            start = (row * data_disks + i) * STRIPE
+            chunk = volume[start:start + STRIPE]
+            disk = raid5_map(row, i, num_disks, layout)[0] if level == 5 else i
+            members[disk][row * STRIPE:(row + 1) * STRIPE] = chunk
+            chunks.append(np.frombuffer(chunk, dtype=np.uint8))
+        if level == 5:
+            parity = raid5_map(row, 0, num_disks, layout)[1]
+            members[parity][row * STRIPE:(row + 1) * STRIPE] = np.bitwise_xor.reduce(chunks).tobytes()
+    paths = []
+    for disk, data in enumerate(members):
+        path = tmp_path / f"member{disk}.img"
+        path.write_bytes(bytes(data))
+        paths.append(str(path))
+    return paths
+
+
+def test_raid5_layouts_place_parity_once_per_row():
+    for layout in ("left-symmetric", "left-asymmetric", "right-symmetric", "right-asymmetric"):
+        for row in range(8):
+            disks = [raid5_map(row, i, 4, layout) for i in range(3)]
+            parity = disks[0][1]
+            assert sorted([d for d, _ in disks] + [parity]) == [0, 1, 2, 3]
+
+
+def test_raid0_reassembly(tmp_path):
+    volume = _logical_volume(3 * STRIPE * 8)
+    paths = _stripe(tmp_path, volume, 3, level=0)
+    with RaidSource(paths, level=0, stripe_size=STRIPE) as source:
+        assert source.size == len(volume)
+        assert source.read(STRIPE - 100, 3 * STRIPE) == volume[STRIPE - 100:4 * STRIPE - 100]
+        assert source.read(0, len(volume)) == volume
+
+
+@pytest.mark.parametrize("layout", ["left-symmetric", "right-asymmetric"])
+def test_raid5_rebuilds_missing_member(tmp_path, layout):
+    volume = _logical_volume(3 * STRIPE * 8)
+    paths = _stripe(tmp_path, volume, 4, level=5, layout=layout)
+    for missing in range(4):
+        members = [p if i != missing else None for i, p in enumerate(paths)]
+        with RaidSource(members, level=5, stripe_size=STRIPE, layout=layout) as source:
+            assert source.read(0, len(volume)) == volume
+
+
+def test_raid_descriptor_opens_in_scanner(tmp_path):
+    volume = _logical_volume(3 * STRIPE * 8)
+    paths = _stripe(tmp_path, volume, 4, level=5)
+    descriptor = str(tmp_path / "nas.raid.json")
+    RaidSource.write_descriptor(descriptor, [paths[0], None, paths[2], paths[3]], level=5, stripe_size=STRIPE)
+    with DiskScanner(descriptor) as scanner:
+        assert scanner.file_size == len(volume)
+        joined = b"".join(blocks.tobytes() for _, blocks in scanner.scan_chunks(chunk_size=20 * 1024))
+    assert joined == volume
+
+
+def test_guess_raid_geometry(tmp_path):
+    volume = _logical_volume(3 * STRIPE * 64, seed=3)
+    paths = _stripe(tmp_path, volume, 3, level=0)
+    shuffled = [paths[2], paths[0], paths[1]]
+    guess = guess_raid_geometry(shuffled)
+    assert guess["level"] == 0
+    assert guess["stripe_size"] == STRIPE
+    assert [shuffled[i] for i in guess["order"]] == paths
+
+    raid5_paths = _stripe(tmp_path, _logical_volume(3 * STRIPE * 64, seed=4), 4, level=5)
+    guess = guess_raid_geometry(raid5_paths)
+    assert guess["level"] == 5
+    assert guess["stripe_size"] == STRIPE
+    assert guess["layout"] == "left-symmetric"
+    assert guess["order"] == [0, 1, 2, 3]
+    assert guess["order_search"] == "exhaustive"
+
+
+def test_guess_raid_geometry_many_members(tmp_path):
+    """Large sets are ordered greedily instead of trying every permutation."""
+    num_disks = 10
+    volume = _logical_volume(num_disks * STRIPE * 32, seed=5)
+    paths = _stripe(tmp_path, volume, num_disks, level=0)
+    shuffled = [paths[i] for i in (7, 2, 9, 0, 4, 1, 8, 3, 6, 5)]
+    guess = guess_raid_geometry(shuffled)
+    assert guess["order_search"] == "greedy"
+    assert guess["stripe_size"] == STRIPE
+    assert [shuffled[i] for i in guess["order"]] == paths
@@ -0,0 +1,189 @@
+import os
+import pytest
+from storage_scan.scanner import DiskScanner
+from storage_scan.regions import IncrementalScanner
+from storage_scan.hashing import hash_regions
+from carving.signature import SignatureCarver
+
+REGION = 4096
+
+
+def _jpeg(size: int) -> bytes:
+    return b"\xff\xd8\xff\xe0" + bytes((i % 200) + 1 for i in range(size)) + b"\xff\xd9"
+
+
+def _write_image(path, placements, size=32 * 1024):
+    image = bytearray(size)
+    for offset, data in placements:
+        image[offset:offset + len(data)] = data
+    path.write_bytes(bytes(image))
+
+
+def _full_carve(path):
+    with DiskScanner(str(path)) as scanner:
+        carver = SignatureCarver()
+        for offset, blocks in scanner.scan_chunks():
+            carver.process_chunk(offset, blocks)
+        return [(f["start_offset"], f["data"]) for f in carver.get_carved_files()]
+
+
+def _incremental(path, hybrid=None, classifier_key=""):
+    with DiskScanner(str(path)) as scanner:
+        result = IncrementalScanner(scanner, region_size=REGION, hybrid=hybrid,
+                                    classifier_key=classifier_key).scan()
+    result["carved"] = [(f["start_offset"], f["data"]) for f in result["carved_files"]]
+    return result
+
+
+class CountingHybrid:
+    """Stand-in for HybridCarver that labels every block as jpeg and counts calls."""
+
+    def __init__(self):
+        self.blocks_seen = 0
+
+    def identify_chunk(self, blocks):
+        self.blocks_seen += len(blocks)
+        return [{"type": "jpeg", "confidence": 1.0, "source": "ai"}] * len(blocks)
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "inc.dd"
+    # Second file spans regions 2-4
+    _write_image(path, [(100, _jpeg(1000)), (3 * REGION - 300, _jpeg(6000)), (6 * REGION + 10, _jpeg(50))])
+    return path
+
+
+def test_hash_regions_detects_change(image):
+    with DiskScanner(str(image)) as scanner:
+        before = hash_regions(scanner, REGION)
+    assert len(before) == 8
+
+    data = bytearray(image.read_bytes())
+    data[5 * REGION + 7] ^= 0x01
+    image.write_bytes(bytes(data))
+    with DiskScanner(str(image)) as scanner:
+        after = hash_regions(scanner, REGION)
+    assert [i for i in range(8) if before[i] != after[i]] == [5]
+
+
+def test_first_scan_matches_full_scan(image):
+    result = _incremental(image)
+    assert result["dirty_regions"] == 8
+    assert result["carved"] == _full_carve(image)
+    assert os.path.exists(IncrementalScanner.default_path(str(image)))
+
+
+def test_unchanged_rescan_reuses_everything(image, monkeypatch):
+    first = _incremental(image)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("no region should be re-carved")
+
+    monkeypatch.setattr(IncrementalScanner, "_resume_carver", fail)
+    second = _incremental(image)
+    assert second["dirty_regions"] == 0
+    assert second["reused_regions"] == 8
+    assert second["carved"] == first["carved"]
+
+
+def test_change_inside_spanning_file_recarves_it(image):
+    _incremental(image)
+
+    # Alter the body of the file spanning regions 2-4, inside region 4 only
+    data = bytearray(image.read_bytes())
+    data[4 * REGION + 100:4 * REGION + 110] = b"\x07" * 10
+    # ...and add a new file in an otherwise empty region
+    data[7 * REGION + 200:7 * REGION + 200 + 60] = _jpeg(56)
+    image.write_bytes(bytes(data))
+
+    result = _incremental(image)
+    assert result["dirty_regions"] == 2
+    assert result["carved"] == _full_carve(image)
+    assert len(result["carved"]) == 4
+
+
+def test_change_in_middle_region_keeps_spanning_file(image):
+    _incremental(image)
+
+    # Edit region 3, strictly inside the file spanning regions 2-4
+    data = bytearray(image.read_bytes())
+    data[3 * REGION + 100:3 * REGION + 104] = b"\x07" * 4
+    image.write_bytes(bytes(data))
+
+    result = _incremental(image)
+    assert result["dirty_regions"] == 1
+    assert result["carved"] == _full_carve(image)
+    assert [start for start, _ in result["carved"]] == [100, 3 * REGION - 300, 6 * REGION + 10]
+    # The index written by this run stays consistent for the next one
+    assert _incremental(image)["carved"] == result["carved"]
+
+
+def test_change_in_header_region_keeps_spanning_file(image):
+    _incremental(image)
+
+    # Edit region 2, which holds the header of the file spanning regions 2-4
+    data = bytearray(image.read_bytes())
+    data[3 * REGION - 200:3 * REGION - 192] = b"\x07" * 8
+    image.write_bytes(bytes(data))
+
+    result = _incremental(image)
+    assert result["dirty_regions"] == 1
+    assert result["carved"] == _full_carve(image)
+    assert [start for start, _ in result["carved"]] == [100, 3 * REGION - 300, 6 * REGION + 10]
+    assert _incremental(image)["carved"] == result["carved"]
+
+
+def test_incremental_on_split_set(tmp_path):
+    data = bytearray(20480)
+    data[5000:5000 + 2006] = _jpeg(2000)  # Straddles the segment boundary at 6000
+    data[9000:9000 + 106] = _jpeg(100)
+    base = tmp_path / "split.dd"
+    (tmp_path / "split.dd.001").write_bytes(bytes(data[:6000]))
+    (tmp_path / "split.dd.002").write_bytes(bytes(data[6000:]))
+    first_segment = str(tmp_path / "split.dd.001")
+    flat = tmp_path / "flat.dd"
+    flat.write_bytes(bytes(data))
+
+    with DiskScanner(first_segment) as scanner:
+        hashes = hash_regions(scanner, REGION)
+    # One hash per fixed region, equal to the hashes of the same bytes in one file
+    with DiskScanner(str(flat)) as scanner:
+        assert hashes == hash_regions(scanner, REGION)
+    assert len(hashes) == 5
+
+    first = _incremental(first_segment)
+    assert first["carved"] == _full_carve(flat)
+    second = _incremental(first_segment)
+    assert second["dirty_regions"] == 0
+    assert second["carved"] == first["carved"]
+
+    # An edit in the second segment dirties only its region
+    data[9050] ^= 0x01
+    (tmp_path / "split.dd.002").write_bytes(bytes(data[6000:]))
+    flat.write_bytes(bytes(data))
+    third = _incremental(first_segment)
+    assert third["dirty_regions"] == 1
+    assert third["carved"] == _full_carve(flat)
+
+
+def test_new_classifier_reclassifies_without_recarving(image, monkeypatch):
+    hybrid = CountingHybrid()
+    _incremental(image, hybrid=hybrid, classifier_key="v1")
+    assert hybrid.blocks_seen > 0
+
+    # Same classifier: nothing is classified again
+    again = CountingHybrid()
+    result = _incremental(image, hybrid=again, classifier_key="v1")
+    assert again.blocks_seen == 0
+    assert len(result["fragments"]) > 0
+
+    # New classifier: all regions are classified again, carving is reused
+    def fail(*args, **kwargs):
+        raise AssertionError("carving results should be reused")
+
+    monkeypatch.setattr(IncrementalScanner, "_resume_carver", fail)
+    updated = CountingHybrid()
+    result = _incremental(image, hybrid=updated, classifier_key="v2")
+    assert updated.blocks_seen == hybrid.blocks_seen
+    assert result["carved"] == _full_carve(image)
@@ -0,0 +1,172 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pytest
+import storage_scan.remote as remote
+from storage_scan.scanner import DiskScanner
+from storage_scan.sources import open_source, sidecar_path
+from storage_scan.remote import HTTPRangeSource
+from storage_scan.entropy import EntropyMap
+from carving.signature import SignatureCarver
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves server.files[path] with single-range support (like nginx)."""
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        return self.server.files.get(self.path)
+
+    def do_HEAD(self):
+        data = self._body()
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", self.server.etag)
+        self.end_headers()
+
+    def do_GET(self):
+        data = self._body()
+        if data is None:
+            self.send_error(404)
+            return
+        self.server.ranges.append(self.headers.get("Range"))
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range") or "")
+        if not match or not self.server.supports_ranges:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        start, end = int(match.group(1)), min(int(match.group(2)), len(data) - 1)
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start:end + 1])
+
+
+@pytest.fixture
+def server(dummy_disk_image):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    rng = np.random.default_rng(3)
+    httpd.files = {
+        "/disk.img": open(dummy_disk_image, "rb").read(),
+        "/random.img": rng.integers(0, 256, size=100_000, dtype=np.uint8).tobytes(),
+    }
+    httpd.ranges = []
+    httpd.etag = '"v1"'
+    httpd.supports_ranges = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_remote_reads_and_coalescing(server):
+    data = server.files["/random.img"]
+    with HTTPRangeSource(server.url + "/random.img", block_size=4096, max_readahead=0) as source:
+        assert source.size == len(data)
+        assert source.read(5000, 20_000) == data[5000:25_000]
+        # Five missing blocks, one request
+        assert source.requests == 1
+        assert source.read(6000, 100) == data[6000:6100]
+        assert source.requests == 1
+        assert source.read(99_990, 100) == data[99_990:]
+        assert source.read(len(data), 10) == b""
+
+
+def test_remote_parallel_requests_are_split(server):
+    data = server.files["/random.img"]
+    with HTTPRangeSource(server.url + "/random.img", block_size=4096, max_request=16384,
+                         max_readahead=0) as source:
+        assert source.read(0, len(data)) == data
+        # 25 blocks in runs of at most 4
+        assert source.requests == 7
+
+
+def test_remote_sequential_readahead(server):
+    data = server.files["/random.img"]
+    with HTTPRangeSource(server.url + "/random.img", block_size=4096, max_readahead=8) as source:
+        chunks = [source.read(offset, 4096) for offset in range(0, len(data), 4096)]
+        assert b"".join(chunks) == data
+        # Growing readahead needs far fewer requests than one per block
+        assert source.requests < 8
+        # A random read resets it
+        source.read(0, 10)
+        assert source._readahead == 0
+
+
+def test_remote_disk_cache(server, tmp_path):
+    url = server.url + "/random.img"
+    data = server.files["/random.img"]
+    with HTTPRangeSource(url, block_size=4096, cache_dir=str(tmp_path)) as source:
+        source.read(0, 50_000)
+    with HTTPRangeSource(url, block_size=4096, cache_dir=str(tmp_path)) as source:
+        assert source.read(10_000, 30_000) == data[10_000:40_000]
+        assert source.requests == 0
+    # A changed image invalidates the cached blocks
+    server.etag = '"v2"'
+    with HTTPRangeSource(url, block_size=4096, cache_dir=str(tmp_path)) as source:
+        source.read(0, 100)
+        assert source.requests == 1
+
+
+def test_remote_disk_cache_evicts_least_recently_used(server, tmp_path):
+    url = server.url + "/random.img"
+    data = server.files["/random.img"]
+    with HTTPRangeSource(url, block_size=4096, cache_dir=str(tmp_path), max_disk_cache=3 * 4096) as source:
+        source.read(0, 4096)
+        source.read(4 * 4096, 2 * 4096)
+        source.read(0, 10)  # Block 0 becomes the most recently used
+        source.read(8 * 4096, 4096)
+        blocks = sorted(p.name for p in tmp_path.rglob("*.blk"))
+        assert blocks == ["000000000000.blk", "000000000005.blk", "000000000008.blk"]
+    # The next session reuses the cached blocks and respects the cap
+    with HTTPRangeSource(url, block_size=4096, cache_dir=str(tmp_path), max_disk_cache=2 * 4096) as source:
+        assert len(list(tmp_path.rglob("*.blk"))) == 2
+        assert source.read(8 * 4096, 4096) == data[8 * 4096:9 * 4096]
+        assert source.requests == 0
+
+
+def test_remote_requires_range_support(server):
+    server.supports_ranges = False
+    with HTTPRangeSource(server.url + "/random.img", block_size=4096) as source:
+        with pytest.raises(IOError):
+            source.read(100, 10)
+
+
+def test_disk_scanner_over_http(server, tmp_path, monkeypatch, dummy_disk_image):
+    monkeypatch.setattr(remote, "DEFAULT_CACHE_ROOT", str(tmp_path / "cache"))
+    url = server.url + "/disk.img"
+    with open_source(url) as source:
+        assert isinstance(source, HTTPRangeSource)
+
+    carver = SignatureCarver(block_size=512)
+    with DiskScanner(url, prefetch_window=2) as scanner:
+        assert scanner.file_size == len(server.files["/disk.img"])
+        for segment in scanner.scan_segments(chunk_size=1024):
+            if segment.fill is None:
+                carver.process_chunk(segment.offset, segment.blocks)
+            else:
+                carver.process_fill(segment.offset, segment.length, segment.fill)
+        EntropyMap.build(scanner).save(EntropyMap.default_path(url))
+    assert [f["start_offset"] for f in carver.get_carved_files()] == [1000]
+    # Sidecar files of remote images live in the local cache
+    assert sidecar_path(url, ".x").startswith(str(tmp_path / "cache"))
+    # ...but downloaded blocks are not kept unless a disk cache size is configured
+    assert not list((tmp_path / "cache").rglob("*.blk"))
+    monkeypatch.setattr(remote, "DISK_CACHE_BYTES", 1024 * 1024)
+    with DiskScanner(url) as scanner:
+        scanner.read_range(0, 4096)
+    assert list((tmp_path / "cache").rglob("*.blk"))
+
+    with pytest.raises(IOError):
+        DiskScanner(server.url + "/missing.img")
@@ -0,0 +1,135 @@
+import errno
+import numpy as np
+import pytest
+from storage_scan.scanner import DiskScanner
+from storage_scan.rescue import RescueImager, RescueMap, FINISHED, BAD_SECTOR, NON_TRIED
+from carving.signature import SignatureCarver
+
+
+class FaultyReader:
+    """Wraps image bytes and fails reads that touch a bad sector, like a dying drive."""
+
+    def __init__(self, data: bytes, bad_sectors, sector_size=512, flaky=()):
+        self.data = data
+        self.size = len(data)
+        self.bad = set(bad_sectors)
+        self.flaky = {s: 1 for s in flaky}  # Sectors failing only once
+        self.sector_size = sector_size
+        self.reads = []
+
+    def read(self, offset, length):
+        self.reads.append((offset, length))
+        sectors = range(offset // self.sector_size, (offset + length - 1) // self.sector_size + 1)
+        for sector in sectors:
+            if self.flaky.get(sector):
+                self.flaky[sector] -= 1
+                raise OSError(errno.EIO, "Input/output error")
+            if sector in self.bad:
+                raise OSError(errno.EIO, "Input/output error")
+        return self.data[offset:offset + length]
+
+
+@pytest.fixture
+def drive():
+    rng = np.random.default_rng(5)
+    return rng.integers(0, 256, size=64 * 1024 + 300, dtype=np.uint8).tobytes()
+
+
+def test_rescue_map_set_status_and_roundtrip(tmp_path):
+    m = RescueMap(10_000)
+    m.set_status(0, 4096, FINISHED)
+    m.set_status(5000, 5512, BAD_SECTOR)
+    m.set_status(4096, 5000, FINISHED)
+    assert m.entries == [(0, 5000, FINISHED), (5000, 512, BAD_SECTOR), (5512, 4488, NON_TRIED)]
+    assert m.unreadable() == [(5000, 5512), (5512, 10_000)]
+    path = str(tmp_path / "x.map")
+    m.save(path)
+    loaded = RescueMap.load(path)
+    assert loaded.entries == m.entries and loaded.size == 10_000
+    assert open(path).read().splitlines()[4] == "0x00000000  0x00001388  +"
+
+
+def test_rescue_isolates_bad_sectors(tmp_path, drive):
+    reader = FaultyReader(drive, bad_sectors={20, 21, 100}, flaky={50})
+    dest = str(tmp_path / "rescued.img")
+    with RescueImager(reader, dest, read_size=16384, retries=2) as imager:
+        result = imager.run()
+
+    assert result["bad"] == 3 * 512 and result["pending"] == 0
+    assert result["rescued"] == len(drive) - 3 * 512
+    rescued = open(dest, "rb").read()
+    assert len(rescued) == len(drive)
+    bad = [(20 * 512, 22 * 512), (100 * 512, 101 * 512)]
+    assert RescueMap.load(RescueMap.default_path(dest)).ranges([BAD_SECTOR]) == bad
+    good = np.ones(len(drive), dtype=bool)
+    for s, e in bad:
+        good[s:e] = False
+        assert rescued[s:e] == bytes(e - s)
+    assert np.array_equal(np.frombuffer(rescued, np.uint8)[good], np.frombuffer(drive, np.uint8)[good])
+    # Large reads are used away from the damage
+    assert max(length for _, length in reader.reads) == 16384
+
+
+def test_rescue_resumes_from_map(tmp_path, drive):
+    dest = str(tmp_path / "resumed.img")
+    first = FaultyReader(drive, bad_sectors=set())
+
+    class Interrupt(Exception):
+        pass
+
+    def interrupt_after(n):
+        read = first.read
+
+        def wrapped(offset, length):
+            if len(first.reads) >= n:
+                raise Interrupt()
+            return read(offset, length)
+        return wrapped
+
+    first.read = interrupt_after(2)
+    with pytest.raises(Interrupt):
+        with RescueImager(first, dest, read_size=8192) as imager:
+            imager.run()
+    partial = RescueMap.load(RescueMap.default_path(dest))
+    assert partial.ranges([FINISHED]) == [(0, 16384)]
+
+    second = FaultyReader(drive, bad_sectors=set())
+    with RescueImager(second, dest, read_size=8192) as imager:
+        assert imager.run()["rescued"] == len(drive)
+    assert second.reads[0][0] == 16384
+    assert open(dest, "rb").read() == drive
+
+
+def test_scanner_treats_unread_ranges_as_holes(tmp_path, dummy_disk_image):
+    data = open(dummy_disk_image, "rb").read()
+    dest = str(tmp_path / "disk.img")
+    # Sector 2 (inside the JPEG body) is unreadable
+    with RescueImager(FaultyReader(data, bad_sectors={2}), dest, read_size=1024, retries=0) as imager:
+        imager.run()
+
+    with DiskScanner(dest) as scanner:
+        assert scanner.unreadable_ranges == [(1024, 1536)]
+        assert scanner.data_extents() == [(0, 1024), (1536, 2822)]
+        segments = list(scanner.scan_segments(chunk_size=1024))
+        hole = [s for s in segments if s.offset == 1024]
+        assert hole and hole[0].fill == 0 and hole[0].blocks is None
+        carver = SignatureCarver()
+        for s in segments:
+            if s.fill is None:
+                carver.process_chunk(s.offset, s.blocks)
+            else:
+                carver.process_fill(s.offset, s.length, s.fill)
+        # The file is still carved, with the unread sector zero-filled
+        assert [f["start_offset"] for f in carver.get_carved_files()] == [1000]
+
+    with DiskScanner(dummy_disk_image) as scanner:
+        assert scanner.unreadable_ranges == []
+
+
+def test_device_reader(tmp_path, drive):
+    path = tmp_path / "device.img"
+    path.write_bytes(drive)
+    dest = str(tmp_path / "copy.img")
+    with RescueImager(str(path), dest) as imager:
+        assert imager.run()["rescued"] == len(drive)
+    assert open(dest, "rb").read() == drive
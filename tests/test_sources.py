@@ -0,0 +1,84 @@
+import os
+import pytest
+from storage_scan.scanner import DiskScanner
+from storage_scan.sources import ImageSource, FileSource, SplitImageSource, open_source, split_segments, image_size
+from storage_scan.parallel import parallel_scan
+from carving.signature import SignatureCarver
+
+
+def _split(path, sizes):
+    """Writes the bytes of `path` out as numbered segments path.001, path.002, ..."""
+    data = open(path, "rb").read()
+    base = str(path) + ".split"
+    paths, pos = [], 0
+    for i, size in enumerate(sizes + [len(data) - sum(sizes)], start=1):
+        segment = f"{base}.{i:03d}"
+        with open(segment, "wb") as f:
+            f.write(data[pos:pos + size])
+        paths.append(segment)
+        pos += size
+    return paths
+
+
+@pytest.fixture
+def split_image(tmp_path, dummy_disk_image):
+    # Boundaries: one block-aligned, one in the middle of a block and the JPEG
+    paths = _split(dummy_disk_image, [1024, 1300])
+    return dummy_disk_image, paths
+
+
+def test_split_segments_detected(split_image):
+    original, paths = split_image
+    assert split_segments(paths[1]) == paths
+    assert split_segments(original) is None
+    assert image_size(paths[0]) == os.path.getsize(original)
+    assert isinstance(open_source(original), FileSource)
+    with open_source(paths[0]) as source:
+        assert isinstance(source, SplitImageSource)
+        assert source.split_points == [1024, 2324]
+
+
+def test_split_reads_match_single_file(split_image):
+    """Reads and chunked views over a split set return the bytes of the joined image."""
+    original, paths = split_image
+    data = open(original, "rb").read()
+
+    with DiskScanner(paths[0]) as scanner:
+        assert scanner.file_size == len(data)
+        assert scanner.read_range(1000, 400) == data[1000:1400]
+        assert scanner.read_range(2300, 10_000) == data[2300:]
+        assert scanner.read_block(4) == data[2048:2560]
+
+        chunks = list(scanner.scan_chunks(chunk_size=4096))
+        # Chunks stop at segment boundaries; only the straddling block is its own chunk
+        assert [(offset, len(blocks)) for offset, blocks in chunks] == [(0, 2), (1024, 2), (2048, 1)]
+        joined = b"".join(blocks.tobytes() for _, blocks in chunks)
+        assert joined == data[:len(joined)]
+        assert not any(blocks.flags.writeable for _, blocks in chunks)
+
+        assert scanner.data_extents() == [(0, len(data))]
+
+
+def test_split_image_carving_and_parallel(split_image):
+    """Sequential and parallel scans find the JPEG that spans a segment boundary."""
+    original, paths = split_image
+    with DiskScanner(paths[0]) as scanner:
+        carver = SignatureCarver()
+        for offset, blocks in scanner.scan_chunks(chunk_size=1024):
+            carver.process_chunk(offset, blocks)
+    assert [f["start_offset"] for f in carver.get_carved_files()] == [1000]
+
+    results = parallel_scan(paths[0], workers=2, block_size=512, overlap=4096)
+    assert [f["start_offset"] for f in results["carved_files"]] == [1000]
+
+
+def test_image_source_requires_read_and_close():
+    """A source missing read() or close() cannot be instantiated."""
+    class ReadOnly(ImageSource):
+        def read(self, offset, length):
+            return b""
+
+    with pytest.raises(TypeError):
+        ImageSource()
+    with pytest.raises(TypeError):
+        ReadOnly()
@@ -0,0 +1,96 @@
+import io
+import os
+import subprocess
+import sys
+import pytest
+from storage_scan.scanner import DiskScanner
+from storage_scan.stream import StreamScanner, is_stream_path
+from carving.signature import SignatureCarver
+
+
+class TrickleStream(io.RawIOBase):
+    """Non-seekable stream that returns short reads, like a pipe."""
+
+    def __init__(self, data: bytes, piece: int = 700):
+        self.data = data
+        self.pos = 0
+        self.piece = piece
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self.piece, len(self.data) - self.pos)
+        buffer[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+
+def _carve(segments):
+    carver = SignatureCarver(block_size=512)
+    for segment in segments:
+        if segment.fill is None:
+            carver.process_chunk(segment.offset, segment.blocks)
+        else:
+            carver.process_fill(segment.offset, segment.length, segment.fill)
+    return [(f["start_offset"], f["data"]) for f in carver.get_carved_files()]
+
+
+def test_stream_segments_match_disk_scanner(dummy_disk_image):
+    data = open(dummy_disk_image, "rb").read()
+    with DiskScanner(dummy_disk_image) as scanner:
+        expected_segments = [(s.offset, s.length, s.fill) for s in scanner.scan_segments(chunk_size=1024)]
+        expected_files = _carve(scanner.scan_segments(chunk_size=1024))
+
+    progress = []
+    scanner = StreamScanner(TrickleStream(data), progress=progress.append)
+    segments = list(scanner.scan_segments(chunk_size=1024))
+    assert [(s.offset, s.length, s.fill) for s in segments] == expected_segments
+    assert _carve(StreamScanner(TrickleStream(data)).scan_segments(chunk_size=1024)) == expected_files
+    assert scanner.bytes_read == len(data) and progress[-1] == len(data)
+    assert all(s.blocks is None or not s.blocks.flags.writeable for s in segments)
+
+
+def test_stream_lookback_window():
+    data = bytes(range(256)) * 64  # 16 KiB
+    scanner = StreamScanner(io.BytesIO(data), lookback=4096)
+    chunks = scanner.scan_chunks(chunk_size=2048)
+    next(chunks)
+    assert scanner.read_range(100, 50) == data[100:150]
+    with pytest.raises(ValueError):
+        scanner.read_range(3000, 10)  # Not read yet
+    for _ in chunks:
+        pass
+    # Only the last 4 KiB are retained once the stream has ended
+    assert scanner.read_range(len(data) - 4000, 10_000) == data[-4000:]
+    with pytest.raises(ValueError):
+        scanner.read_range(len(data) - 5000, 10)
+    assert scanner.read_range(len(data), 10) == b""
+    with pytest.raises(ValueError):
+        scanner.read_range(0, 10)
+
+
+def test_stream_trailing_partial_block():
+    data = b"\x01" * 1100
+    scanner = StreamScanner(io.BytesIO(data))
+    assert [(o, b.shape) for o, b in scanner.scan_chunks(chunk_size=4096)] == [(0, (2, 512))]
+    assert scanner.read_range(1024, 100) == data[1024:]
+
+
+def test_is_stream_path(tmp_path, dummy_disk_image):
+    assert is_stream_path("-")
+    assert not is_stream_path(dummy_disk_image)
+    assert not is_stream_path(str(tmp_path / "missing.img"))
+    fifo = tmp_path / "pipe"
+    os.mkfifo(fifo)
+    assert is_stream_path(str(fifo))
+
+
+def test_main_carves_from_stdin(dummy_disk_image):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(dummy_disk_image, "rb") as stdin:
+        result = subprocess.run([sys.executable, "main.py", "--image", "-"], cwd=root, stdin=stdin,
+                                capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "Found 1 carved JPEG" in result.stdout
+    assert "Offset: 1000" in result.stdout
@@ -0,0 +1,122 @@
+import os
+import time
+import pytest
+import storage_scan.throttle as throttle
+from storage_scan.scanner import DiskScanner
+from storage_scan.throttle import IOThrottle, MB, set_background_priority
+from carving.signature import SignatureCarver
+
+
+class FakeClock:
+    """Clock advanced only by the throttle's own sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_throttle(rate, **kwargs):
+    clock = FakeClock()
+    return IOThrottle(rate, clock=clock, sleep=clock.sleep, **kwargs), clock
+
+
+def test_token_bucket_limits_rate():
+    bucket, clock = make_throttle(1000, burst=1.0)
+    # The initial burst passes without waiting
+    assert bucket.acquire(1000) == 0
+    # Then reads are paced at the rate
+    for _ in range(5):
+        bucket.acquire(500)
+    assert clock.now == pytest.approx(2.5)
+    assert bucket.throttled_seconds == pytest.approx(2.5)
+    # Idle time refills the bucket up to the burst only
+    clock.now += 10
+    assert bucket.acquire(1000) == 0
+    assert bucket.acquire(1000) == pytest.approx(1.0)
+
+
+def test_adaptive_backoff_and_recovery():
+    bucket, _ = make_throttle(100 * MB)
+    bucket.record_latency(0.01, MB)  # Baseline: 10 ms per MiB
+    assert bucket.rate == 100 * MB
+    for _ in range(10):
+        bucket.record_latency(0.2, MB)  # Contention: 20x slower
+    assert bucket.rate < 50 * MB
+    # Never below the floor
+    assert bucket.rate >= 100 * MB * throttle.MIN_RATE_FRACTION
+    for _ in range(50):
+        bucket.record_latency(0.01, MB)
+    assert bucket.rate == 100 * MB
+
+
+def test_cache_hits_do_not_trigger_backoff():
+    bucket, _ = make_throttle(100 * MB)
+    bucket.record_latency(1e-7, MB)
+    bucket.record_latency(5e-5, MB)
+    assert bucket.rate == 100 * MB
+
+
+def test_non_adaptive_ignores_latency():
+    bucket, _ = make_throttle(100 * MB, adaptive=False)
+    bucket.record_latency(0.001, MB)
+    bucket.record_latency(1.0, MB)
+    assert bucket.rate == 100 * MB
+
+
+def test_from_mb_per_second():
+    assert IOThrottle.from_mb_per_second(0) is None
+    assert IOThrottle.from_mb_per_second(None) is None
+    assert IOThrottle.from_mb_per_second(2).max_rate == 2 * MB
+    with pytest.raises(ValueError):
+        IOThrottle(0)
+
+
+def test_throttled_scan_is_paced_and_unchanged(dummy_disk_image):
+    with DiskScanner(dummy_disk_image, block_size=512, max_read_rate=1) as scanner:
+        bucket, clock = make_throttle(1024, burst=1.0, adaptive=False)
+        scanner.throttle = bucket
+        carver = SignatureCarver(block_size=512)
+        for offset, blocks in scanner.scan_chunks(chunk_size=512):
+            carver.process_chunk(offset, blocks)
+        # 2560 bytes at 1 KiB/s with a 1 KiB burst
+        assert clock.now == pytest.approx(1.5)
+    assert [f["start_offset"] for f in carver.get_carved_files()] == [1000]
+
+
+def test_throttled_scan_measures_read_latency(dummy_disk_image):
+    with DiskScanner(dummy_disk_image, block_size=512, max_read_rate=100) as scanner:
+        assert list(scanner.scan_chunks(chunk_size=1024))
+        assert scanner.throttle.latency is not None
+
+
+def test_throttled_direct_io_scan_times_view_reads(dummy_disk_image, monkeypatch):
+    """Sources that read in view() (O_DIRECT buffers) report their real read latency."""
+    with DiskScanner(dummy_disk_image, block_size=512, direct_io=True, max_read_rate=100) as scanner:
+        view = scanner.source.view
+
+        def slow_view(offset, length):
+            time.sleep(0.01)
+            return view(offset, length)
+
+        monkeypatch.setattr(scanner.source, "view", slow_view)
+        assert list(scanner.scan_chunks(chunk_size=1024))
+        assert scanner.throttle.latency >= 0.01 / (1024 / MB)
+
+
+def test_unthrottled_by_default(dummy_disk_image):
+    with DiskScanner(dummy_disk_image) as scanner:
+        assert scanner.throttle is None
+
+
+def test_set_background_priority(monkeypatch):
+    calls = []
+    monkeypatch.setattr(os, "nice", lambda inc: calls.append(inc) or 10 + inc)
+    assert set_background_priority(5) == 15
+    assert calls == [5]
@@ -0,0 +1,103 @@
+import struct
+import zlib
+import numpy as np
+from storage_scan.scanner import DiskScanner
+from storage_scan.sources import image_size
+from storage_scan.virtual_disk import Qcow2Source, VHDSource, detect_virtual_disk, QCOW2_COMPRESSED
+
+CLUSTER = 4096
+
+
+def _pattern(seed, size=CLUSTER):
+    return np.random.default_rng(seed).integers(0, 256, size, dtype=np.uint8).tobytes()
+
+
+def _qcow2(tmp_path):
+    """
+    qcow2 v3, 4 KiB clusters, 3 MiB guest. Guest cluster 0 and 5 are stored,
+    7 is a zero cluster, 9 is compressed; L1 entry 1 is unallocated.
+    """
+    host = bytearray(6 * CLUSTER + 4096)
+    header = struct.pack(">4sIQIIQIIQQIIQ", b"QFI\xfb", 3, 0, 0, 12, 3 * 1024 * 1024, 0, 2, CLUSTER,
+                         0, 0, 0, 0)
+    host[0:len(header)] = header
+    host[CLUSTER:CLUSTER + 16] = struct.pack(">QQ", (1 << 63) | 2 * CLUSTER, 0)
+
+    deflate = zlib.compressobj(9, zlib.DEFLATED, -12)
+    packed = deflate.compress(_pattern(9)[:64] * 64) + deflate.flush()
+    sectors = -(-len(packed) // 512)
+    l2 = np.zeros(512, dtype=">u8")
+    l2[0] = 3 * CLUSTER
+    l2[5] = (1 << 63) | 4 * CLUSTER
+    l2[7] = 4 * CLUSTER | 1
+    l2[9] = QCOW2_COMPRESSED | ((sectors - 1) << 58) | 5 * CLUSTER
+    host[2 * CLUSTER:3 * CLUSTER] = l2.tobytes()
+    host[3 * CLUSTER:4 * CLUSTER] = _pattern(0)
+    host[4 * CLUSTER:5 * CLUSTER] = _pattern(5)
+    host[5 * CLUSTER:5 * CLUSTER + len(packed)] = packed
+    path = tmp_path / "vm.qcow2"
+    path.write_bytes(bytes(host))
+    return str(path)
+
+
+def _vhd(tmp_path):
+    """Dynamic VHD with 4 KiB blocks; blocks 0 and 2 allocated, block 2 has only its first half present."""
+    footer = bytearray(512)
+    footer[0:8] = b"conectix"
+    footer[0x10:0x18] = struct.pack(">Q", 512)
+    footer[0x30:0x38] = struct.pack(">Q", 4 * CLUSTER)
+    footer[0x3C:0x40] = struct.pack(">I", 3)
+    dynamic = bytearray(1024)
+    dynamic[0:8] = b"cxsparse"
+    dynamic[0x10:0x18] = struct.pack(">Q", 1536)
+    dynamic[0x1C:0x24] = struct.pack(">II", 4, CLUSTER)
+
+    host = bytearray(2048 + 2 * (512 + CLUSTER))
+    host[0:512] = footer
+    host[512:1536] = dynamic
+    host[1536:1552] = struct.pack(">IIII", 4, 0xFFFFFFFF, 13, 0xFFFFFFFF)
+    host[2048] = 0xFF
+    host[2560:2560 + CLUSTER] = _pattern(1)
+    host[6656] = 0xF0  # Sectors 0-3 present
+    host[7168:7168 + CLUSTER] = _pattern(2)
+    path = tmp_path / "vm.vhd"
+    path.write_bytes(bytes(host) + bytes(footer))
+    return str(path)
+
+
+def test_qcow2_reads_and_holes(tmp_path):
+    path = _qcow2(tmp_path)
+    assert detect_virtual_disk(path) == "qcow2"
+    with Qcow2Source(path) as source:
+        assert source.size == 3 * 1024 * 1024
+        assert source.read(0, CLUSTER) == _pattern(0)
+        assert source.read(5 * CLUSTER - 10, 20) == bytes(10) + _pattern(5)[:10]
+        assert source.read(7 * CLUSTER, CLUSTER) == bytes(CLUSTER)
+        assert source.read(9 * CLUSTER, CLUSTER) == _pattern(9)[:64] * 64
+        assert source.read(2 * 1024 * 1024, 100) == bytes(100)
+        assert source.data_extents(0, source.size) == [
+            (0, CLUSTER), (5 * CLUSTER, 6 * CLUSTER), (9 * CLUSTER, 10 * CLUSTER)
+        ]
+
+
+def test_vhd_dynamic_reads_and_holes(tmp_path):
+    path = _vhd(tmp_path)
+    assert detect_virtual_disk(path) == "vhd"
+    with VHDSource(path) as source:
+        assert source.size == 4 * CLUSTER
+        assert source.read(0, CLUSTER) == _pattern(1)
+        assert source.read(CLUSTER, 100) == bytes(100)
+        # Sectors missing from the block bitmap read as zeros
+        assert source.read(2 * CLUSTER, CLUSTER) == _pattern(2)[:2048] + bytes(2048)
+        assert source.data_extents(0, source.size) == [(0, CLUSTER), (2 * CLUSTER, 3 * CLUSTER)]
+
+
+def test_scanner_skips_unallocated_grains(tmp_path):
+    """DiskScanner opens virtual disks directly; unallocated space comes back as holes."""
+    path = _vhd(tmp_path)
+    assert image_size(path) == 4 * CLUSTER
+    with DiskScanner(path) as scanner:
+        segments = list(scanner.scan_segments(chunk_size=CLUSTER))
+    data = [(s.offset, s.length) for s in segments if s.fill is None]
+    assert data == [(0, CLUSTER), (2 * CLUSTER, 2048)]
+    assert sum(s.length for s in segments) == 4 * CLUSTER
@@ -1,6 +1,6 @@
 import streamlit as st
 
-def render_hex_viewer(data, length=16, max_rows=64):
+def render_hex_viewer(data, length=16, max_rows=64, base_offset=0):
     """
     Renders a monospaced hex dump (offset, hex, ascii) with clean styling using st.html.
     
@@ -8,6 +8,7 @@ def render_hex_viewer(data, length=16, max_rows=64):
         data (bytes): The binary data to display.
         length (int): Number of bytes per row.
         max_rows (int): Maximum number of rows to display to prevent UI lag.
+        base_offset (int): Image offset of the first byte, shown in the offset column.
     """
     if not data:
         st.info("No data available to display.")
@@ -23,7 +24,7 @@ def render_hex_viewer(data, length=16, max_rows=64):
     lines = []
     for i in range(0, len(data), length):
         chunk = data[i:i + length]
-        offset = f"{i:08x}"
+        offset = f"{base_offset + i:08x}"
         # Format hex values with fixed width
         hex_vals = " ".join(f"{b:02x}" for b in chunk).ljust(length * 3 - 1)
         # Format ASCII values, replacing non-printable with dots
@@ -18,3 +18,25 @@ def init_session_state():
         st.session_state.logs = []
     if "scanning_active" not in st.session_state:
         st.session_state.scanning_active = False
+    if "max_read_rate" not in st.session_state:
+        st.session_state.max_read_rate = 0.0
+    if "background_scan" not in st.session_state:
+        st.session_state.background_scan = False
+
+
+def get_image_scanner():
+    """
+    Returns a DiskScanner for the session's disk image, kept open across
+    reruns so its block cache serves repeated lookups (hex viewer, review).
+    """
+    from storage_scan.scanner import DiskScanner
+
+    path = st.session_state.disk_image_path
+    scanner = st.session_state.get("image_scanner")
+    if scanner is not None and scanner.disk_image_path != path:
+        scanner.close()
+        scanner = None
+    if scanner is None and path:
+        scanner = DiskScanner(path)
+    st.session_state.image_scanner = scanner
+    return scanner
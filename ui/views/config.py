@@ -3,6 +3,7 @@ import os
 import glob
 from ui.components.hex_viewer import render_hex_viewer
 from ui.components.logger import setup_streamlit_logging
+from ui.state import get_image_scanner
 
 # Setup logger for this page
 logger = setup_streamlit_logging(__name__)
@@ -83,6 +84,23 @@ with st.form("config_form"):
             index=ae_idx,
             help="Select the trained autoencoder model (.pth)"
         )
+
+    st.subheader("Scan Impact")
+    col3, col4 = st.columns(2)
+    with col3:
+        max_read_rate = st.number_input(
+            "Max Read Rate (MB/s)",
+            min_value=0.0,
+            value=float(st.session_state.max_read_rate),
+            step=10.0,
+            help="Caps image reads during the scan and backs off further while the disk is busy (0 = unlimited)"
+        )
+    with col4:
+        background_scan = st.checkbox(
+            "Background Priority",
+            value=st.session_state.background_scan,
+            help="Run the scan at reduced CPU priority so it yields to other work on the machine"
+        )
     
     submit_button = st.form_submit_button("Initialize Session")
 
@@ -105,6 +123,9 @@ if submit_button:
             st.session_state.ae_checkpoint = checkpoint_paths[idx]
         else:
             st.session_state.ae_checkpoint = None
+
+        st.session_state.max_read_rate = max_read_rate
+        st.session_state.background_scan = background_scan
             
         st.session_state.recovery_session = True
         
@@ -120,11 +141,17 @@ if st.session_state.disk_image_path:
     valid, msg = validate_path(st.session_state.disk_image_path)
     if valid:
         try:
-            with open(st.session_state.disk_image_path, "rb") as f:
-                preview_data = f.read(512)
+            scanner = get_image_scanner()
+            num_sectors = max(1, scanner.file_size // scanner.block_size)
+            sector = st.number_input("Sector", min_value=0, max_value=num_sectors - 1, value=0, step=1)
+            # Served from the scanner's block cache after the first lookup
+            preview_data = scanner.read_block(int(sector))
             
             st.info(f"Successfully accessed: {os.path.basename(st.session_state.disk_image_path)}")
-            render_hex_viewer(preview_data)
+            render_hex_viewer(preview_data, base_offset=int(sector) * scanner.block_size)
+            stats = scanner.block_cache.stats()
+            st.caption(f"Block cache: {stats['hits']} hits, {stats['misses']} misses, "
+                       f"{stats['cached_bytes'] // 1024} KiB cached")
             
         except Exception as e:
             st.error(f"Error reading disk image: {str(e)}")
@@ -11,6 +11,7 @@ from reconstruction.denoise import DenoisingPipeline
 from reconstruction.repair import repair_jpeg, repair_pdf
 from reconstruction.enhancement import apply_super_resolution, denoise_image
 from ui.components.hex_viewer import render_hex_viewer
+from ui.state import get_image_scanner
 from models.classifier import FragmentClassifier
 from models.autoencoder import FragmentAutoencoder
 
@@ -38,7 +39,13 @@ def run_reassembly():
                 st.error(f"Failed to load classifier: {e}")
 
         st.write("Grouping fragments...")
-        grouper = FragmentGrouper(classifier=classifier)
+        # Fragment data missing from session state is read through the shared scanner's cache
+        try:
+            scanner = get_image_scanner()
+        except Exception as e:
+            st.warning(f"Disk image not readable, using fragment data from the scan only: {e}")
+            scanner = None
+        grouper = FragmentGrouper(classifier=classifier, scanner=scanner)
         # The fragments in session state need to have 'offset' and 'data'
         # Scanning page should ensure this.
         reconstructed = grouper.group_fragments(st.session_state.carved_fragments)
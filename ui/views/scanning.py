@@ -7,65 +7,123 @@ import os
 from streamlit.runtime.scriptrunner import add_script_run_ctx
 from ui.components.logger import setup_streamlit_logging
 from storage_scan.scanner import DiskScanner
+from storage_scan.checkpoint import ScanCheckpoint
+from storage_scan.throttle import set_background_priority
 from carving.hybrid import HybridCarver
 
 # Setup streamlit-specific logging for this view
 logger = setup_streamlit_logging(__name__)
 
-def scanning_worker(disk_path, clf_path, result_queue, stop_event):
+def scanning_worker(disk_path, clf_path, result_queue, stop_event, resume=False,
+                    max_read_rate=0.0, background=False):
     """
     Background worker that runs the HybridCarver.
-    Emits results to the queue.
+    Emits results to the queue and journals progress so an interrupted
+    scan can be resumed. Reads are capped at max_read_rate MB/s (0: off).
     """
+    journal = ScanCheckpoint(disk_path)
+    fragments = []
+    offset_done = 0
     try:
         logger.info(f"Starting scan on {disk_path}")
-        scanner = DiskScanner(disk_path)
+        if background:
+            # On Linux this lowers only the scan thread, not the UI server
+            set_background_priority()
+        scanner = DiskScanner(disk_path, max_read_rate=max_read_rate)
         carver = HybridCarver(checkpoint_path=clf_path)
         
         total_size = scanner.file_size
         block_size = scanner.block_size
         num_blocks = total_size // block_size
+
+        if resume:
+            state = journal.load()
+            if state:
+                offset_done = state["offset"]
+                fragments = state["results"]
+                logger.info(f"Resuming scan at offset {offset_done} with {len(fragments)} fragments")
+                for fragment in fragments:
+                    result_queue.put({"type": "fragment", "data": fragment})
+            else:
+                logger.info("No usable checkpoint found; scanning from the beginning.")
         
-        for i, (offset, block) in enumerate(scanner.scan_blocks()):
+        blocks_done = offset_done // block_size
+        for segment in scanner.scan_segments(start=offset_done):
             if stop_event.is_set():
                 logger.info("Scan stopped by user.")
                 break
                 
-            identification = carver.identify_fragment(block)
+            # Empty (zero/0xFF-filled or sparse) runs are skipped without per-block work
+            identifications = [] if segment.fill is not None else carver.identify_chunk(segment.blocks)
             
             # Only report non-other fragments to the UI to avoid flooding
-            if identification["type"] != "other":
-                result_queue.put({
-                    "type": "fragment",
-                    "data": {
-                        "Offset": hex(offset),
-                        "Type": identification["type"],
-                        "Confidence": f"{identification['confidence']:.2f}",
-                        "Source": identification["source"],
-                        "Size": f"{block_size} B",
-                        "data": block,
-                        "identification": identification
-                    }
-                })
+            for i, identification in enumerate(identifications):
+                if identification["type"] == "other":
+                    continue
+                fragment = {
+                    "Offset": hex(segment.offset + i * block_size),
+                    "Type": identification["type"],
+                    "Confidence": f"{identification['confidence']:.2f}",
+                    "Source": identification["source"],
+                    "Size": f"{block_size} B",
+                    "data": segment.blocks[i].tobytes(),
+                    "identification": identification
+                }
+                fragments.append(fragment)
+                result_queue.put({"type": "fragment", "data": fragment})
             
-            # Periodically report progress
-            if i % 100 == 0 or i == num_blocks - 1:
-                progress = (i + 1) / num_blocks
-                result_queue.put({
-                    "type": "progress",
-                    "data": {
-                        "value": progress,
-                        "text": f"Scanning sector {i}/{num_blocks} ({int(progress*100)}%)"
-                    }
-                })
+            # Report progress once per segment
+            blocks_done += segment.length // block_size
+            progress = blocks_done / num_blocks
+            result_queue.put({
+                "type": "progress",
+                "data": {
+                    "value": progress,
+                    "text": f"Scanning sector {blocks_done}/{num_blocks} ({int(progress*100)}%)"
+                }
+            })
+
+            offset_done = segment.offset + segment.length
+            journal.maybe_save(offset_done, {}, fragments)
         
+        if stop_event.is_set():
+            journal.save(offset_done, {}, fragments)
+        else:
+            journal.clear()
         result_queue.put({"type": "done", "data": None})
         scanner.close()
         
     except Exception as e:
         logger.error(f"Error in scanning worker: {str(e)}")
+        if offset_done:
+            journal.save(offset_done, {}, fragments)
         result_queue.put({"type": "error", "data": str(e)})
 
+def start_scan(resume=False):
+    """Starts the background scanning thread, optionally resuming from the journal."""
+    st.session_state.scanning_active = True
+    st.session_state.carved_fragments = []
+    st.session_state.scan_progress = 0.0
+    st.session_state.scan_status_text = "Resuming..." if resume else "Initializing..."
+    
+    # Setup background thread
+    result_queue = queue.Queue()
+    stop_event = threading.Event()
+    st.session_state.scan_queue = result_queue
+    st.session_state.scan_stop_event = stop_event
+    
+    # Get paths from session state
+    disk_path = st.session_state.disk_image_path
+    clf_path = st.session_state.clf_checkpoint or "models/checkpoints/classifier_best.pth"
+    
+    thread = threading.Thread(
+        target=scanning_worker,
+        args=(disk_path, clf_path, result_queue, stop_event, resume,
+              st.session_state.get("max_read_rate", 0.0), st.session_state.get("background_scan", False))
+    )
+    add_script_run_ctx(thread)
+    thread.start()
+
 def render_scanning_page():
     st.title("Disk Scanning & Data Carving")
     st.markdown("""
@@ -91,27 +149,14 @@ def render_scanning_page():
     with col1:
         start_disabled = st.session_state.scanning_active or not st.session_state.disk_image_path
         if st.button("Start Scan", type="primary", use_container_width=True, disabled=start_disabled):
-            st.session_state.scanning_active = True
-            st.session_state.carved_fragments = []
-            st.session_state.scan_progress = 0.0
-            st.session_state.scan_status_text = "Initializing..."
-            
-            # Setup background thread
-            result_queue = queue.Queue()
-            stop_event = threading.Event()
-            st.session_state.scan_queue = result_queue
-            st.session_state.scan_stop_event = stop_event
-            
-            # Get paths from session state
-            disk_path = st.session_state.disk_image_path
-            clf_path = st.session_state.clf_checkpoint or "models/checkpoints/classifier_best.pth"
-            
-            thread = threading.Thread(
-                target=scanning_worker,
-                args=(disk_path, clf_path, result_queue, stop_event)
-            )
-            add_script_run_ctx(thread)
-            thread.start()
+            start_scan()
+            st.rerun()
+        
+        has_journal = bool(st.session_state.disk_image_path) and os.path.exists(
+            ScanCheckpoint.default_path(st.session_state.disk_image_path)
+        )
+        if st.button("Resume Scan", use_container_width=True, disabled=start_disabled or not has_journal):
+            start_scan(resume=True)
             st.rerun()
         
         if st.button("Stop Scan", type="secondary", use_container_width=True, disabled=not st.session_state.scanning_active):